@@ -1,15 +1,16 @@
 import streamlit as st
-import pandas as pd
 from datetime import datetime
 from io import BytesIO
 
 from core.app_config import configure_app
 from core.session import update_session_state
-from core.display import display_url
+from core.display import display_url, schedule_url, PLATFORM_CONCURRENCY
+from core.scheduler import URLScheduler
 from core.display.utils import display_labels, display_urls_list
-from utils.io_utils import get_size
-from utils.url_utils import extract_and_clean_urls
-from utils.func_utils import get_unique_elems_ordered
+from core.display.details import display_postprocess_summary
+from music_downloader.youtube import get_postprocess_summary
+from utils.memory_utils import get_memory_accountant, replace_spilled
+from utils.url_utils import extract_media_urls
 from utils.zip_utils import zip_audio_files
 
 
@@ -22,37 +23,36 @@ def launch_app():
     )
     st.info("👇 Enter a URL or list of URLs of a song/video or playlist from Spotify, YouTube, or Soundcloud")
     input_str = st.text_area("Enter URLs here:", key="input_str_field", height=150)
-    warning_container = st.empty()
     download_all_button = st.empty()
     st.session_state["urls"] = st.session_state.get("urls", {})
-    urls = get_unique_elems_ordered(extract_and_clean_urls(input_str))
+    urls = extract_media_urls(input_str)
     update_session_state(urls)
     display_urls_list("Click here to see extracted URLs", urls)
     st.session_state["default_batch_size"] = 50
     data = {}
-    data_limit, units, total_size, total_songs = 2, "gb", 0, 0
-    for i, url in enumerate(urls):
-        with st.container(border=True):
-            results = display_url(url)
-            num_songs, download_kwargs = results
-            download_kwargs = [download_kwargs] if isinstance(download_kwargs, dict) else download_kwargs
-            if download_kwargs:
-                for kwargs in download_kwargs:
-                    data_iter, filename = kwargs["data"], kwargs["file_name"]
-                    data[filename] = BytesIO(data_iter) if isinstance(data_iter, bytes) else data_iter
-                    total_size += sum([get_size(buf, units=units) for _, buf in data.items()])
+    total_songs = 0
+    accountant = get_memory_accountant()
+
+    def _spill_data(buffer: BytesIO, load_spilled):
+        # Past the memory limit, buffers held for the combined zip are swapped for files on disk
+        for filename in list(data):
+            data[filename] = replace_spilled(data[filename], buffer, load_spilled)
+
+    with URLScheduler(PLATFORM_CONCURRENCY) as scheduler:
+        # Start every URL at once; results are still displayed in input order
+        scheduled = {url: schedule_url(scheduler, url) for url in urls}
+        for i, url in enumerate(urls):
+            with st.container(border=True):
+                prefetched, progress = scheduled[url]
+                results = display_url(url, prefetched=prefetched, progress=progress)
+                num_songs, download_kwargs = results
+                download_kwargs = [download_kwargs] if isinstance(download_kwargs, dict) else download_kwargs
+                if download_kwargs:
+                    for kwargs in download_kwargs:
+                        data_iter, filename = kwargs["data"], kwargs["file_name"]
+                        data[filename] = BytesIO(data_iter) if isinstance(data_iter, bytes) else data_iter
+                        accountant.track_all(data[filename], _spill_data)
                     total_songs += num_songs
-                    if total_size > data_limit:
-                        with warning_container:
-                            st.warning(
-                                f"Warning: The total data size exceeds the {data_limit} {units.upper()}"
-                                "limit, the number of downloads has been capped"
-                            )
-                            included = list(pd.Index(data.keys()).intersection(urls))
-                            excluded = list(pd.Index(data.keys()).difference(urls))
-                            display_urls_list("URLs Extracted", included)
-                            display_urls_list("URLs Not Extracted", excluded)
-                            break
     if len(urls) >= 2:
         with download_all_button:
             with st.spinner(f"Zipping all audio into single zip file..."):
@@ -63,6 +63,7 @@ def launch_app():
                 file_name=f"all_songs_{str(datetime.today()).split()[0]}.zip",
                 mime="application/zip",
             )
+    display_postprocess_summary(get_postprocess_summary())
     
 
 def main():
@@ -0,0 +1,92 @@
+"""
+Captures a real YouTube player (base.js) as a cipher benchmark fixture.
+
+Takes a watch page URL (whose player is downloaded), a base.js URL or a local base.js
+file, saves the player as fixtures/<player id>.js.gz and records its expected outputs in
+fixtures/expected.json. The outputs are computed with patch/cipher.py as of a baseline
+commit, so the benchmarks check the current cipher against the one it replaced rather
+than against itself. The parsed state is left out of them, as the baseline cipher has
+no serializable state; the benchmarks only check the outputs that were recorded.
+
+Usage: python -m benchmarks.capture_fixture SOURCE [--baseline REVISION]
+"""
+from typing import Any, Dict, Tuple
+import argparse
+import gzip
+import hashlib
+import json
+import os
+import re
+import subprocess
+import types
+
+from pytube import extract
+
+from benchmarks.cipher_benchmark import FIXTURES_DIR, EXPECTED_FILENAME, REAL_FIXTURE_PREFIX, SIGNATURE_SAMPLES, N_SAMPLES
+from utils.http_utils import fetch_text
+
+
+# Last commit before patch/cipher.py was rewritten for speed; its outputs are the reference
+BASELINE_REVISION = "f3dc5e6"
+PLAYER_ID_REGEX = re.compile(r"/s/player/([\w-]+)/")
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def load_baseline_cipher(revision: str = BASELINE_REVISION) -> types.ModuleType:
+    """Imports patch/cipher.py as of revision, as a standalone module."""
+    source = subprocess.run(
+        ["git", "show", f"{revision}:patch/cipher.py"],
+        cwd=REPO_DIR, capture_output=True, text=True, check=True,
+    ).stdout
+    module = types.ModuleType(f"baseline_cipher_{revision}")
+    exec(compile(source, f"{revision}:patch/cipher.py", "exec"), module.__dict__)
+    return module
+
+def get_player(source: str) -> Tuple[str, str]:
+    """Returns the player ID and base.js of a watch page URL, base.js URL or base.js file."""
+    if os.path.exists(source):
+        with open(source, "r", encoding="utf-8") as f:
+            js = f.read()
+        match = PLAYER_ID_REGEX.search(source)
+        return (match.group(1) if match else os.path.basename(source).split(".")[0]), js
+    js_url = source if source.endswith(".js") else extract.js_url(fetch_text(source))
+    match = PLAYER_ID_REGEX.search(js_url)
+    player_id = match.group(1) if match else hashlib.sha1(js_url.encode()).hexdigest()[:8]
+    return player_id, fetch_text(js_url)
+
+def get_baseline_outputs(js: str, baseline_cipher: types.ModuleType) -> Dict[str, Any]:
+    """The outputs of cipher_benchmark.get_outputs that the baseline cipher computes."""
+    return {
+        "initial_function_name": baseline_cipher.get_initial_function_name(js),
+        "throttling_function_name": baseline_cipher.get_throttling_function_name(js),
+        "signatures": {signature: baseline_cipher.Cipher(js).get_signature(signature) for signature in SIGNATURE_SAMPLES},
+        # The baseline Cipher keeps the first n it calculates (and edits its array), so one per n
+        "n": {n: baseline_cipher.Cipher(js).calculate_n(list(n)) for n in N_SAMPLES},
+    }
+
+def capture(source: str, fixtures_dir: str = FIXTURES_DIR, revision: str = BASELINE_REVISION) -> str:
+    """Saves the player of source as a fixture and records its baseline outputs; returns its name."""
+    player_id, js = get_player(source)
+    name = f"{REAL_FIXTURE_PREFIX}{player_id}"
+    outputs = get_baseline_outputs(js, load_baseline_cipher(revision))
+    os.makedirs(fixtures_dir, exist_ok=True)
+    # mtime=0 keeps the archive identical across captures of the same player
+    with gzip.GzipFile(os.path.join(fixtures_dir, f"{name}.js.gz"), "wb", mtime=0) as f:
+        f.write(js.encode("utf-8"))
+    expected_path = os.path.join(fixtures_dir, EXPECTED_FILENAME)
+    expected = {}
+    if os.path.exists(expected_path):
+        with open(expected_path, "r", encoding="utf-8") as f:
+            expected = json.load(f)
+    expected[name] = outputs
+    with open(expected_path, "w", encoding="utf-8") as f:
+        json.dump(expected, f, indent=2, sort_keys=True)
+        f.write("\n")
+    return name
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("source", help="Watch page URL, base.js URL or base.js file")
+    parser.add_argument("--baseline", default=BASELINE_REVISION, help="Commit whose cipher computes the expected outputs")
+    parser.add_argument("--fixtures-dir", default=FIXTURES_DIR)
+    args = parser.parse_args()
+    print(capture(args.source, args.fixtures_dir, args.baseline))
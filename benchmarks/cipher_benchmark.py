@@ -0,0 +1,217 @@
+"""
+Offline micro-benchmarks of the signature and throttling cipher (patch/cipher.py).
+
+For every base.js fixture in benchmarks/fixtures (``*.js`` or ``*.js.gz``: real players
+captured with capture_fixture.py, and synthetic ones from make_fixtures.py), checks that
+the extracted objects, deciphered signatures and throttling parameters match the values
+recorded in fixtures/expected.json, then times
+Cipher.__init__ (parsing, disk cache and memory cache), get_signature, calculate_n and
+each extraction helper. Results are written as JSON, which can be compared with the
+results of another commit.
+
+Usage:
+    python -m benchmarks.cipher_benchmark [--output results.json] [--compare baseline.json]
+    python -m benchmarks.cipher_benchmark --record  # after an intended change of outputs
+
+--record leaves the expected outputs of real players alone: they come from the baseline
+cipher (see capture_fixture.py), so they are changed by capturing the player again.
+"""
+from typing import Any, Callable, Dict, List, Optional, Tuple
+import argparse
+import gzip
+import hashlib
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import timeit
+
+from patch import cipher
+
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+EXPECTED_FILENAME = "expected.json"
+DEFAULT_REPEAT = 5
+# Ratio of timings to a baseline past which a benchmark is reported as slower or faster
+COMPARE_THRESHOLD = 1.10
+# Name prefix of the fixtures captured from real players by capture_fixture.py
+REAL_FIXTURE_PREFIX = "real_"
+
+# Inputs deciphered for each fixture; the n values mimic the real 14-16 character ones
+SIGNATURE_SAMPLES = [
+    "AOq0QJ8wRQIhAKi9qaFtbOGkHbw0vgUtW2Y6j7xD4qWb0ksc6PkTyIBgAiAzPrJ0tZ8xk1ogVpY2QVOPv8l2O9lXdYGhIHD7IcnNmw==",
+    "ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789-_ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghij",
+]
+N_SAMPLES = ["Xk9_qPz3LmA0wQ", "aBcDeFgHiJkLmNo", "-_0123456789abcD"]
+
+def load_fixtures(fixtures_dir: str = FIXTURES_DIR) -> Dict[str, str]:
+    """Returns the base.js of each fixture by name, e.g. 'player_split_direct'."""
+    fixtures = {}
+    for filename in sorted(os.listdir(fixtures_dir)):
+        path = os.path.join(fixtures_dir, filename)
+        if filename.endswith(".js.gz"):
+            with gzip.open(path, "rb") as f:
+                fixtures[filename[:-len(".js.gz")]] = f.read().decode("utf-8")
+        elif filename.endswith(".js"):
+            with open(path, "r", encoding="utf-8") as f:
+                fixtures[filename[:-len(".js")]] = f.read()
+    return fixtures
+
+def get_outputs(js: str) -> Dict[str, Any]:
+    """Everything the cipher extracts from and computes with js, as JSON-compatible data."""
+    state = cipher.parse_cipher_state(js)
+    player_cipher = cipher.Cipher(js)
+    return {
+        "initial_function_name": cipher.get_initial_function_name(js),
+        "throttling_function_name": cipher.get_throttling_function_name(js),
+        "state": json.loads(json.dumps(cipher.serialize_cipher_state(state))),
+        "signatures": {signature: player_cipher.get_signature(signature) for signature in SIGNATURE_SAMPLES},
+        "n": {n: player_cipher.calculate_n(list(n)) for n in N_SAMPLES},
+    }
+
+def get_mismatches(outputs: Dict[str, Any], expected: Optional[Dict[str, Any]]) -> List[str]:
+    """Names of the recorded outputs that differ from the expected ones (real players have no recorded state)."""
+    if expected is None:
+        return ["<no expected outputs recorded>"]
+    return sorted(key for key in expected if outputs.get(key) != expected[key])
+
+def get_benchmarks(js: str, cache_dir: str) -> Dict[str, Callable[[], Any]]:
+    """Functions to time for one fixture, by benchmark name."""
+    var = cipher.BaseJsParser(js).transform_var
+    player_cipher = cipher.Cipher(js)
+    signature = SIGNATURE_SAMPLES[0]
+    n = N_SAMPLES[0]
+    memory_cache = cipher.CipherStateCache(cache_dir=None)
+    memory_cache.get(js)
+    cipher.CipherStateCache(cache_dir=cache_dir).get(js)
+
+    def cipher_init(cache_factory: Callable[[], cipher.CipherStateCache]) -> Callable[[], Any]:
+        def run():
+            cipher._cipher_state_cache = cache_factory()
+            return cipher.Cipher(js)
+        return run
+
+    return {
+        "Cipher.__init__[parse]": cipher_init(lambda: cipher.CipherStateCache(cache_dir=None)),
+        "Cipher.__init__[disk_cache]": cipher_init(lambda: cipher.CipherStateCache(cache_dir=cache_dir)),
+        "Cipher.__init__[memory_cache]": cipher_init(lambda: memory_cache),
+        "Cipher.get_signature": lambda: player_cipher.get_signature(signature),
+        "Cipher.calculate_n[uncached]": lambda: player_cipher.throttling_program.run(n),
+        "Cipher.calculate_n[memoized]": lambda: player_cipher.calculate_n(list(n)),
+        "parse_cipher_state": lambda: cipher.parse_cipher_state(js),
+        "get_initial_function_name": lambda: cipher.get_initial_function_name(js),
+        "get_transform_plan": lambda: cipher.get_transform_plan(js),
+        "get_transform_object": lambda: cipher.get_transform_object(js, var),
+        "get_transform_map": lambda: cipher.get_transform_map(js, var),
+        "get_throttling_function_name": lambda: cipher.get_throttling_function_name(js),
+        "get_throttling_function_code": lambda: cipher.get_throttling_function_code(js),
+        "get_throttling_function_array": lambda: cipher.get_throttling_function_array(js),
+        "get_throttling_plan": lambda: cipher.get_throttling_plan(js),
+    }
+
+def time_function(function: Callable[[], Any], repeat: int = DEFAULT_REPEAT) -> Dict[str, float]:
+    """Timings of one call of function in microseconds, over repeat runs of about 0.2s each."""
+    timer = timeit.Timer(function)
+    loops, _ = timer.autorange()
+    per_call = [total / loops * 1e6 for total in timer.repeat(repeat=repeat, number=loops)]
+    return {
+        "min_us": round(min(per_call), 3),
+        "median_us": round(statistics.median(per_call), 3),
+        "loops": loops,
+        "repeat": repeat,
+    }
+
+def get_commit() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+            capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def run(fixtures_dir: str = FIXTURES_DIR, repeat: int = DEFAULT_REPEAT, record: bool = False) -> Dict[str, Any]:
+    """Checks and times every fixture; with record, saves their outputs as the expected ones instead of checking."""
+    expected_path = os.path.join(fixtures_dir, EXPECTED_FILENAME)
+    expected = {}
+    if os.path.exists(expected_path):
+        with open(expected_path, "r", encoding="utf-8") as f:
+            expected = json.load(f)
+    # Keep the benchmarks off the process-wide cipher cache and its default disk store
+    default_cache = cipher._cipher_state_cache
+    cipher._cipher_state_cache = cipher.CipherStateCache(cache_dir=None)
+    results = {
+        "commit": get_commit(),
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "fixtures": {},
+    }
+    try:
+        with tempfile.TemporaryDirectory() as cache_dir:
+            for name, js in load_fixtures(fixtures_dir).items():
+                outputs = get_outputs(js)
+                record_fixture = record and not name.startswith(REAL_FIXTURE_PREFIX)
+                mismatches = [] if record_fixture else get_mismatches(outputs, expected.get(name))
+                if record_fixture:
+                    expected[name] = outputs
+                print(f"{name} ({len(js)} bytes): outputs {'mismatch: ' + ', '.join(mismatches) if mismatches else 'ok'}", file=sys.stderr)
+                benchmarks = {}
+                for benchmark, function in get_benchmarks(js, cache_dir).items():
+                    benchmarks[benchmark] = time_function(function, repeat)
+                    print(f"  {benchmark:<36} {benchmarks[benchmark]['min_us']:>12.1f} us", file=sys.stderr)
+                    cipher._cipher_state_cache = cipher.CipherStateCache(cache_dir=None)
+                results["fixtures"][name] = {
+                    "size": len(js),
+                    "sha1": hashlib.sha1(js.encode("utf-8")).hexdigest(),
+                    "outputs_match": not mismatches,
+                    "mismatches": mismatches,
+                    "benchmarks": benchmarks,
+                }
+    finally:
+        cipher._cipher_state_cache = default_cache
+    if record:
+        with open(expected_path, "w", encoding="utf-8") as f:
+            json.dump(expected, f, indent=2, sort_keys=True)
+            f.write("\n")
+    return results
+
+def compare(results: Dict[str, Any], baseline: Dict[str, Any], threshold: float = COMPARE_THRESHOLD) -> List[Tuple[str, str, float]]:
+    """Ratios of the minimum timings to the baseline's, for benchmarks found in both."""
+    ratios = []
+    for name, fixture in results["fixtures"].items():
+        baseline_benchmarks = baseline.get("fixtures", {}).get(name, {}).get("benchmarks", {})
+        for benchmark, timing in fixture["benchmarks"].items():
+            if benchmark in baseline_benchmarks:
+                ratio = timing["min_us"] / baseline_benchmarks[benchmark]["min_us"]
+                ratios.append((name, benchmark, ratio))
+                verdict = "slower" if ratio > threshold else "faster" if ratio < 1 / threshold else ""
+                print(f"{name:<24} {benchmark:<36} x{ratio:>7.2f} {verdict}", file=sys.stderr)
+    return ratios
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--fixtures-dir", default=FIXTURES_DIR)
+    parser.add_argument("--repeat", type=int, default=DEFAULT_REPEAT, help="Timing runs per benchmark")
+    parser.add_argument("--output", help="Write the results to this JSON file instead of stdout")
+    parser.add_argument("--compare", help="Results JSON of another commit to compare the timings with")
+    parser.add_argument("--record", action="store_true", help="Record the current outputs as the expected ones")
+    args = parser.parse_args()
+
+    results = run(args.fixtures_dir, args.repeat, args.record)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+    else:
+        json.dump(results, sys.stdout, indent=2)
+        print()
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as f:
+            compare(results, json.load(f))
+    if not all(fixture["outputs_match"] for fixture in results["fixtures"].values()):
+        sys.exit(1)
@@ -0,0 +1,167 @@
+"""
+Generates the synthetic base.js fixtures of the cipher benchmarks.
+
+Each player version reproduces the layout of a real base.js: the signature transform
+object and function, the throttling function with its array and plan, and the code
+that calls it, buried in filler code with the same kinds of near misses (``.set(``
+calls, ``function(a)`` definitions) as the real player. Versions differ in which
+extraction patterns find their functions, in their transforms and in their size.
+
+Usage: python -m benchmarks.make_fixtures [--size BYTES]
+"""
+from typing import Dict, List
+import argparse
+import gzip
+import os
+import random
+
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+# Real players are 2-3 MB; scans scale linearly, and smaller fixtures keep the repo light
+DEFAULT_FIXTURE_SIZE = 512 * 1024
+FILLER_IDENTIFIERS = 300
+
+THROTTLING_CIPHER_FUNCTION = (
+    'function(d,e){for(var f=64,h=[];++f-h.length-32;){switch(f){case 58:f=96;continue;case 91:f=44;break;'
+    'case 65:f=47;continue;case 46:f=153;case 123:f-=58;default:h.push(String.fromCharCode(f))}}'
+    'd.forEach(function(l,m,n){this.push(n[m]=h[(h.indexOf(l)-h.indexOf(this[m])+m-32+f--)%h.length])},e.split(""))}'
+)
+THROTTLING_FUNCTIONS = {
+    "reverse": "function(d){d.reverse()}",
+    "reverse_loop": "function(d){for(var e=d.length;e;)d.push(d.splice(--e,1)[0])}",
+    "push": "function(d,e){d.push(e)}",
+    "swap": "function(d,e){e=(e%d.length+d.length)%d.length;var f=d[0];d[0]=d[e];d[e]=f}",
+    "unshift": "function(d,e){for(e=(e%d.length+d.length)%d.length;e--;)d.unshift(d.pop())}",
+    "nested_splice": "function(d,e){e=(e%d.length+d.length)%d.length;d.splice(0,1,d.splice(e,1,d[0])[0])}",
+    "prepend": "function(d,e){e=(e%d.length+d.length)%d.length;d.splice(-e).reverse().forEach(function(f){d.unshift(f)})}",
+    "splice": "function(d,e){e=(e%d.length+d.length)%d.length;d.splice(e,1)}",
+    "cipher": THROTTLING_CIPHER_FUNCTION,
+}
+TRANSFORM_FUNCTIONS = {
+    "reverse": "function(a){a.reverse()}",
+    "splice": "function(a,b){a.splice(0,b)}",
+    "swap": "function(a,b){var c=a[0];a[0]=a[b%a.length];a[b%a.length]=c}",
+}
+
+# Player versions by name: how the signature and throttling functions are found
+# (see SIGNATURE_FUNCTION_PATTERNS and THROTTLING_FUNCTION_NAME_PATTERNS in
+# patch/cipher.py), and the seed of everything else
+PLAYER_VERSIONS = {
+    "player_split_direct": {"signature": "split", "throttling": "direct", "seed": 1},
+    "player_set_indexed": {"signature": "set", "throttling": "indexed", "seed": 2},
+    "player_sig_direct": {"signature": "sig", "throttling": "direct", "seed": 3},
+}
+
+def _identifier(rng: random.Random, length: int = 3) -> str:
+    first = rng.choice("abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ")
+    return first + "".join(rng.choice("abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789") for _ in range(length - 1))
+
+def _filler_statement(rng: random.Random, identifiers: List[str]) -> str:
+    """One statement of filler code, often a near miss of an extraction pattern."""
+    a, b, c = rng.choice(identifiers), rng.choice(identifiers)[:2], rng.choice(identifiers) + "a"
+    n = rng.randint(0, 999)
+    return rng.choice((
+        f"var {a}=function(a){{return a+{n}}};",
+        f"g.{a}=function(a,b){{if(!a)return b;for(var c=0;c<a.length;c++)b.push(a[c]);return b}};",
+        f"{a}.prototype.{b}=function(){{this.{c}&&this.{c}.set(\"{b}\",{n})}};",
+        f"{c}=function(a){{a&&{b}.set(\"{a}\",a.{b});return a}};",
+        f"{a}=function(a){{var b=a.split(\"\");return b.join(\"{b}\")}};",
+        f"g.{c}=function(a){{a.{b}||(a.{b}={{}});a.{b}.{a}={n};return a.{b}}};",
+        f"var {b}{n}={{{a}:function(a){{return a}},{c}:{n}}};",
+        f"{a}.prototype.get=function(a){{return this.{b}[a]}};",
+    ))
+
+def _filler(rng: random.Random, size: int) -> str:
+    # Minified code reuses a limited set of short names, which is why it compresses well
+    identifiers = [_identifier(rng) for _ in range(FILLER_IDENTIFIERS)]
+    statements: List[str] = []
+    total = 0
+    while total < size:
+        statement = _filler_statement(rng, identifiers)
+        statements.append(statement)
+        total += len(statement) + 1
+    return "\n".join(statements)
+
+def make_player_js(signature: str, throttling: str, seed: int, size: int = DEFAULT_FIXTURE_SIZE) -> str:
+    """Returns the base.js of a synthetic player version of about size bytes."""
+    rng = random.Random(seed)
+    var = _identifier(rng, 2)
+    sig_name = _identifier(rng, 2)
+    n_name = "".join(rng.choice("abcdefghijklmnopqrstuvwxyz") for _ in range(3))  # Matched as [a-z]+
+    n_array_name = _identifier(rng, 3)
+
+    # Signature transform object and function
+    transform_names = {fn: _identifier(rng, 2) for fn in TRANSFORM_FUNCTIONS}
+    transform_object = ",\n".join(f"{transform_names[fn]}:{code}" for fn, code in TRANSFORM_FUNCTIONS.items())
+    arg = "b" if signature == "sig" else "a"  # Only the "a" argument is matched by the split() patterns
+    steps = []
+    for _ in range(rng.randint(6, 12)):
+        fn = rng.choice(list(TRANSFORM_FUNCTIONS))
+        # Like the real player, only a few characters are ever spliced off
+        steps.append(f"{var}.{transform_names[fn]}({arg},{rng.randint(1, 3) if fn == 'splice' else rng.randint(1, 70)})")
+    steps = ";".join(steps)
+    sig_function = f'{sig_name}=function({arg}){{{arg}={arg}.split("");{steps};return {arg}.join("")}};'
+    if signature == "split":
+        sig_call = ""
+    elif signature == "set":
+        sig_call = f'{_identifier(rng)}=function(a,c,d){{c&&d.set(a,encodeURIComponent({sig_name}(c)))}};'
+    else:
+        sig_call = f'{_identifier(rng)}=function(a){{return a.s?a.sig||{sig_name}(a.s):a.sig}};'
+
+    # Throttling function: an array of constants and functions, and a plan calling them
+    key = '"%s"' % _identifier(rng, 8)
+    integers = [str(rng.randint(-99999, 99999)) for _ in range(4)]
+    elements = integers + [key, "null", "b"] + list(THROTTLING_FUNCTIONS.values())
+    rng.shuffle(elements)
+    index = {el: i for i, el in enumerate(elements)}
+    plan = []
+    for _ in range(rng.randint(20, 40)):
+        fn = rng.choice(list(THROTTLING_FUNCTIONS))
+        call = f"c[{index[THROTTLING_FUNCTIONS[fn]]}]"
+        if fn in ("reverse", "reverse_loop"):
+            plan.append(f"{call}(c[{index['b']}])")
+        elif fn == "cipher":
+            plan.append(f"{call}(c[{index['b']}],c[{index[key]}])")
+        elif fn == "push":
+            # Pushes onto the array itself (its null element), like the real player
+            plan.append(f"{call}(c[{index['null']}],c[{index[rng.choice(integers)]}])")
+        else:
+            plan.append(f"{call}(c[{index['b']}],c[{index[rng.choice(integers)]}])")
+    n_function = (
+        f'{n_name}=function(a){{var b=a.split(""),c=[{",".join(elements)}];'
+        f'try{{{",".join(plan)}}}catch(d){{return"enhanced_except_"+a}}return b.join("")}};'
+    )
+    if throttling == "direct":
+        n_call = f'var {_identifier(rng)}=function(a){{a.C&&(b=a.get("n"))&&(b={n_array_name}[0](b),a.set("n",b),{n_array_name}.length||{n_name}(""))}};'
+    else:
+        n_call = f'var {_identifier(rng)}=function(a,c){{(c={n_array_name}[0](c),a.set("n",c))}};'
+    n_array = f"var {n_array_name}=[{n_name}];"
+
+    definitions = [f"var {var}={{{transform_object}}};", sig_function, sig_call, n_function, n_array, n_call]
+    filler_size = max(size - sum(map(len, definitions)), 0) // (len(definitions) + 1)
+    parts = ["var _yt_player={};(function(g){"]
+    for definition in definitions:
+        parts.append(_filler(rng, filler_size))
+        parts.append(definition)
+    parts.append(_filler(rng, filler_size))
+    parts.append("})(_yt_player);\n")
+    return "\n".join(parts)
+
+def write_fixtures(fixtures_dir: str = FIXTURES_DIR, size: int = DEFAULT_FIXTURE_SIZE) -> Dict[str, str]:
+    """Writes every player version as <name>.js.gz; returns their paths by name."""
+    os.makedirs(fixtures_dir, exist_ok=True)
+    paths = {}
+    for name, version in PLAYER_VERSIONS.items():
+        paths[name] = os.path.join(fixtures_dir, f"{name}.js.gz")
+        # mtime=0 keeps the archives identical across runs
+        with gzip.GzipFile(paths[name], "wb", mtime=0) as f:
+            f.write(make_player_js(size=size, **version).encode("utf-8"))
+    return paths
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--size", type=int, default=DEFAULT_FIXTURE_SIZE, help="Approximate size of each base.js in bytes")
+    parser.add_argument("--fixtures-dir", default=FIXTURES_DIR)
+    args = parser.parse_args()
+    for name, path in write_fixtures(args.fixtures_dir, args.size).items():
+        print(f"{name}: {path} ({os.path.getsize(path)} bytes)")
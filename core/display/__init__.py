@@ -1,16 +1,20 @@
-from typing import Union, Tuple, Dict
+from typing import Union, Tuple, Dict, Optional, Any
 import os
 import streamlit as st
 from streamlit.runtime.secrets import SECRETS_FILE_LOCS
 from io import BytesIO
 import yt_dlp
 from spotipy.exceptions import SpotifyException
-from copy import deepcopy
+from concurrent.futures import Future, wait
 
 from music_downloader.youtube import YouTubeVideo, YouTubePlaylist
 from music_downloader.spotify import SpotifySong, SpotifyPlaylist
 from music_downloader.soundcloud import SoundCloudSong, SoundCloudPlaylist
 from core.display.display import Display
+from core.scheduler import URLScheduler
+from utils.url_utils import parse_media_url
+from utils.identity_utils import get_shared_entity
+from utils.download_utils import DownloadProgress
 
 
 ENTITY_CLASSES = {
@@ -27,6 +31,16 @@ ENTITY_CLASSES = {
         "playlist": SoundCloudPlaylist,
     },
 }
+# Maximum number of URLs resolved/downloaded at once for each platform, per script run.
+# These only bound how many URLs are in flight; requests to each platform are bounded
+# process-wide by utils.download_utils.PLATFORM_DOWNLOAD_CONCURRENCY
+PLATFORM_CONCURRENCY = {
+    "YouTube": 4,
+    "Spotify": 4,
+    "SoundCloud": 2,
+}
+# Seconds between progress bar refreshes while waiting for a URL loaded in the background
+PROGRESS_POLL_INTERVAL = float(os.getenv("MUSIC_DOWNLOADER_PROGRESS_POLL_INTERVAL", 0.5))
 
 def get_entity_class_from_url(url: str) -> Tuple[Union[str, None], Union[str, None], Union[type, None]]:
     """
@@ -37,39 +51,92 @@ def get_entity_class_from_url(url: str) -> Tuple[Union[str, None], Union[str, No
         entity_type (str): The entity type ('song' or 'playlist') or None if not found.
         entity_class (type): The entity class (YouTubeVideo, SpotifySong, etc.) or None if not found.
     """
-    for platform, platform_dict in ENTITY_CLASSES.items():
-        for entity_type, entity_class in platform_dict.items():
-            if entity_class.URL_FUNC(url):  # Assumes URL_FUNC checks if the URL matches the entity's platform
-                return platform, entity_type, entity_class
-    return None, None, None
+    media_url = parse_media_url(url)
+    if media_url is None:
+        return None, None, None
+    return media_url.platform, media_url.entity_type, ENTITY_CLASSES[media_url.platform][media_url.entity_type]
 
 def get_platform_credentials(platform: str) -> Dict[str, str]:
     if any([os.path.exists(path) for path in SECRETS_FILE_LOCS]):
         platform = platform.lower()
         if platform == "spotify":
             keys = ["client_id", "client_secret", "redirect_uri"]
-            return {f"{platform}_{key}": st.secrets[platform][key] for key in keys}
+            # redirect_uri is optional; without it the client-credentials flow is used
+            return {f"{platform}_{key}": st.secrets[platform].get(key) for key in keys}
     return {}
 
-def apply_st_cache_selenium_driver(entity: Union[
-    YouTubeVideo, YouTubePlaylist,
-    SpotifySong, SpotifyPlaylist,
-    SoundCloudSong, SoundCloudPlaylist
-]) -> None:
-    # pass
-    if hasattr(entity, "get_driver"):
-        @st.cache_resource
-        def get_driver_cached(*args, **kwargs):
-            func = deepcopy(entity.get_driver)
-            return func(*args, **kwargs)
-        entity.get_driver = get_driver_cached
+def get_entity(entity_class: type, entity_type: str, url: str, credentials: Dict[str, str]) -> Any:
+    """
+    Get the entity for the URL. Songs are shared process-wide (see utils.identity_utils);
+    playlists hold per-session state (zipped batches, download errors), so each session
+    gets its own, whose songs are still the shared ones.
+    """
+    if entity_type == "song":
+        return get_shared_entity(entity_class, url, **credentials)
+    return entity_class(url=url, **credentials)
 
-def display_url(url: str) -> Union[BytesIO, Tuple[int, dict]]:
+def load_entity(
+    entity_class: type,
+    entity_type: str,
+    url: str,
+    credentials: Dict[str, str],
+    entity: Optional[Any] = None,
+    progress: Optional[DownloadProgress] = None,
+) -> Any:
+    """Get the entity for the URL (unless given) and download its audio, reporting playlist progress."""
+    if entity is None:
+        entity = get_entity(entity_class, entity_type, url, credentials)
+    if entity_type == "playlist":
+        entity.download_audio(on_progress=progress)
+    else:
+        entity.download_audio()
+    return entity
+
+def schedule_url(scheduler: URLScheduler, url: str) -> Tuple[Optional[Future], Optional[DownloadProgress]]:
+    """
+    Start resolving and downloading the URL in the background on its platform's pool.
+
+    Streamlit state (session state, secrets) is read here, on the script thread, since it
+    is not available from the scheduler's worker threads.
+
+    Returns:
+        Future: Resolves to the loaded entity, or None if the URL is invalid/unsupported.
+        DownloadProgress: Songs downloaded so far, updated by the worker, or None likewise.
+    """
+    platform, entity_type, entity_class = get_entity_class_from_url(url)
+    if not (platform and entity_type):
+        return None, None
+    entity = st.session_state.get("urls", {}).get(url, {}).get("entity")
+    credentials = get_platform_credentials(platform)
+    progress = DownloadProgress()
+    future = scheduler.submit(platform, load_entity, entity_class, entity_type, url, credentials, entity, progress)
+    return future, progress
+
+def wait_for_entity(url: str, prefetched: Future, progress: Optional[DownloadProgress] = None) -> Any:
+    """Wait for an entity loaded in the background, showing how many of its songs are downloaded."""
+    if prefetched.done():
+        return prefetched.result()
+    with st.spinner(f"Downloading audio for {url}..."):
+        progress_bar = st.progress(0.0)
+        while not wait([prefetched], timeout=PROGRESS_POLL_INTERVAL).done:
+            done, total = progress.get() if progress is not None else (0, None)
+            if total:
+                progress_bar.progress(min(done / total, 1.0), text=f"{done} / {total} Downloaded")
+        progress_bar.empty()
+    return prefetched.result()
+
+def display_url(
+    url: str,
+    prefetched: Optional[Future] = None,
+    progress: Optional[DownloadProgress] = None,
+) -> Union[BytesIO, Tuple[int, dict]]:
     """
     Main function to display the appropriate entity based on the platform and type.
     
     Parameters:
         url (str): The URL to be processed and displayed.
+        prefetched (Future): The entity loaded in the background by schedule_url, if any.
+        progress (DownloadProgress): The download progress of prefetched, shown while waiting.
     
     Returns:
         Tuple[int, dict]: The number of songs and download kwargs, or None if an error occurs.
@@ -87,13 +154,12 @@ def display_url(url: str) -> Union[BytesIO, Tuple[int, dict]]:
                 st.session_state["urls"][url] = st.session_state["urls"].get(url, {})
 
                 # Initialize the entity object in the session state if not already present
-                if "entity" not in st.session_state["urls"][url]:
-                    st.session_state["urls"][url]["entity"] = entity_class(url=url, **get_platform_credentials(platform))
+                if prefetched is not None:
+                    st.session_state["urls"][url]["entity"] = wait_for_entity(url, prefetched, progress)
+                elif "entity" not in st.session_state["urls"][url]:
+                    st.session_state["urls"][url]["entity"] = get_entity(entity_class, entity_type, url, get_platform_credentials(platform))
                 entity = st.session_state["urls"][url]["entity"]
                 
-                # Add st.cache to get_driver Selenium method of entity
-                apply_st_cache_selenium_driver(entity)
-                
                 # Create a Display object to display the song or playlist
                 display_func = Display(entity).display
 
@@ -1,4 +1,4 @@
-from typing import List, Optional
+from typing import Any, Dict, List, Optional
 import streamlit as st
 from streamlit.delta_generator import DeltaGenerator
 from core.display.utils import display_labels, display_embed_iframe
@@ -37,6 +37,21 @@ def display_title_and_url(
     st.write(f"#### {ENTITY_ICONS[entity_type]} {title}")
     st.write(url)
 
+def display_download_errors(errors: Dict[int, Exception], songs: List[Any]) -> None:
+    """Displays a warning listing the songs whose audio failed to download."""
+    if errors:
+        failed = "\n".join(f"- {getattr(songs[i], 'title', i)}: {e}" for i, e in sorted(errors.items()))
+        st.warning(f"Failed to download {len(errors)} song(s), which were left out of the zip files:\n{failed}")
+
 def display_embed(url: str) -> None:
     """Helper function to display embedded content."""
     display_embed_iframe(url)
+
+def display_postprocess_summary(summary: Dict[str, Dict[str, float]]) -> None:
+    """Displays how often each audio post-processing path (copy, remux, transcode) ran, and how long it took."""
+    if summary:
+        with st.expander("Audio post-processing stats"):
+            st.table([
+                {"Path": path, "Count": stats["count"], "Mean Seconds": round(stats["mean_seconds"], 3)}
+                for path, stats in sorted(summary.items())
+            ])
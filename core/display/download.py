@@ -6,6 +6,13 @@ from streamlit.delta_generator import DeltaGenerator
 from utils.zip_utils import zip_audio_files
 
 
+AUDIO_MIME_TYPES = {
+    "mp3": "audio/mpeg",
+    "m4a": "audio/mp4",
+    "webm": "audio/webm",
+    "opus": "audio/ogg",
+}
+
 def prepare_song_download_kwargs(
     *,
     buffer: bytes,
@@ -18,7 +25,7 @@ def prepare_song_download_kwargs(
         "key": f"download_song_{title}",
         "data": buffer,
         "file_name": filename,
-        "mime": "audio/mp3",
+        "mime": AUDIO_MIME_TYPES.get(Path(filename).suffix.lstrip('.').lower(), "audio/mpeg"),
     }
 
 def prepare_playlist_download_kwargs(
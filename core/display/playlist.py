@@ -2,7 +2,8 @@ from typing import Union, List, Any, Dict, Optional
 from core.display.details import (
     display_title_and_url,
     display_entity_platform_label,
-    display_embed, display_download_from_message
+    display_embed, display_download_from_message,
+    display_download_errors,
 )
 from core.display.download import prepare_playlist_download_kwargs, display_download_buttons
 import streamlit as st
@@ -54,6 +55,7 @@ class PlaylistDisplay:
         actions_str = "Zipping" if is_audio_zipped else "Downloading & Zipping"
         with st.spinner(f"{actions_str} Audio for {entity.length} items..."):
             audio_zipped = entity.zip_audio(batch_size=batch_size, stqdm=True)
+        display_download_errors(entity.download_errors, entity.songs)
         download_kwargs = prepare_playlist_download_kwargs(
             audio_zipped=audio_zipped,
             num_songs=entity.length,
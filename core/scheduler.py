@@ -0,0 +1,46 @@
+from typing import Any, Callable, Dict, Optional
+from concurrent.futures import Future, ThreadPoolExecutor
+
+
+class URLScheduler:
+    """
+    Runs work for several URLs at once, with a separate concurrency cap per platform.
+
+    Each platform gets its own bounded thread pool, so a slow or rate-limited platform
+    never holds up work for the others. Results are returned as futures, letting the
+    caller consume (and display) them in input order.
+
+    The caps bound how many URLs run at once, not how many requests reach a platform:
+    a playlist downloads its songs on a pool of its own, and Spotify songs download from
+    YouTube. Downloads are bounded per platform by utils.download_utils.get_download_slots.
+    """
+
+    def __init__(self, concurrency: Dict[str, int], default_concurrency: int = 2):
+        self.concurrency = concurrency
+        self.default_concurrency = default_concurrency
+        self._executors: Dict[str, ThreadPoolExecutor] = {}
+
+    def _get_executor(self, platform: str) -> ThreadPoolExecutor:
+        if platform not in self._executors:
+            self._executors[platform] = ThreadPoolExecutor(
+                max_workers=self.concurrency.get(platform, self.default_concurrency),
+                thread_name_prefix=f"{platform}Worker",
+            )
+        return self._executors[platform]
+
+    def submit(self, platform: str, func: Callable[..., Any], *args, **kwargs) -> Future:
+        """Schedule func(*args, **kwargs) on the given platform's pool."""
+        return self._get_executor(platform).submit(func, *args, **kwargs)
+
+    def shutdown(self, wait: bool = True, cancel_futures: bool = False):
+        for executor in self._executors.values():
+            executor.shutdown(wait=wait, cancel_futures=cancel_futures)
+        self._executors.clear()
+
+    def __enter__(self) -> "URLScheduler":
+        return self
+
+    def __exit__(self, *exc_info) -> Optional[bool]:
+        # Work that was never consumed (e.g. on a Streamlit rerun) is cancelled
+        self.shutdown(wait=False, cancel_futures=True)
+        return None
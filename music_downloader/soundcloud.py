@@ -1,37 +1,109 @@
-from typing import List, Union, Dict, Optional
+from typing import Any, List, Union, Dict, Optional, Iterator, Callable
 import os
+import threading
+import time
 from io import BytesIO
-from stqdm import stqdm as st_tqdm
 import yt_dlp
 from selenium import webdriver
 from selenium.webdriver.common.by import By
 from selenium.common.exceptions import StaleElementReferenceException
 import re
-import tempfile
+import json
+import shutil
+import hashlib
+from http.client import HTTPException
+from concurrent.futures import Future
 
-from utils.selenium_utils import get_driver, try_find_element, try_find_elements, click_element_close_modal
+from utils.selenium_utils import DRIVER_CHECKOUT_TIMEOUT, get_driver_pool, try_find_element, try_find_elements, click_element_close_modal
 from utils.zip_utils import zip_audio_files
+from utils.http_utils import fetch_text, download_resumable, PARTIAL_DIR
+from utils.download_utils import download_audio_concurrently, get_download_slots
+from utils.cache_utils import get_audio_cache
+from utils.memory_utils import get_memory_accountant, replace_spilled
+from utils.identity_utils import get_shared_entity
+from utils.url_utils import parse_media_url
+from utils.transcode_utils import get_transcoder, completed_future
 
 
-def is_soundcloud_playlist(url: str) -> bool:
-    # Regex to match 'sets' in the second part of the path after the artist name
-    pattern = r"soundcloud\.com\/[^\/]+\/sets\/[^\/]+"
-    return bool(re.search(pattern, url))
+PLAYLIST_SCROLL_PAUSE = 1.5
+PLAYLIST_MAX_IDLE_SCROLLS = 3
+SOUNDCLOUD_HYDRATION_REGEX = re.compile(r"window\.__sc_hydration\s*=\s*(\[.*?\]);\s*</script>", re.DOTALL)
+
+def get_soundcloud_media_id(url: str) -> Optional[str]:
+    """Canonical media ID of a SoundCloud track URL (see utils.url_utils.parse_media_url), if it is one."""
+    media_url = parse_media_url(url)
+    return media_url.media_id if media_url and media_url.platform == "SoundCloud" else None
+
+def parse_soundcloud_hydration(html: str) -> Dict[str, Any]:
+    """
+    Extract the hydration data SoundCloud embeds in its pages (window.__sc_hydration).
+
+    Returns:
+        Dict[str, Any]: The data of each hydratable (e.g. 'sound', 'playlist', 'user') by name.
+    """
+    match = SOUNDCLOUD_HYDRATION_REGEX.search(html)
+    if match is None:
+        return {}
+    try:
+        hydration = json.loads(match.group(1))
+    except json.JSONDecodeError:
+        return {}
+    return {
+        entry["hydratable"]: entry.get("data")
+        for entry in hydration
+        if isinstance(entry, dict) and "hydratable" in entry
+    }
+
+def get_soundcloud_embed_url(kind: str, soundcloud_id: int) -> str:
+    """Embeddable player URL of a track ('tracks') or playlist ('playlists')."""
+    return f"https://w.soundcloud.com/player/?url=https%3A//api.soundcloud.com/{kind}/{soundcloud_id}"
+
+def parse_soundcloud_song_info(html: str) -> Optional[Dict[str, str]]:
+    """Extract the song, artist and embed URL from a track page, or None if they are missing."""
+    sound = parse_soundcloud_hydration(html).get("sound")
+    if not sound or not sound.get("title"):
+        return None
+    return {
+        "song": sound["title"],
+        "artist": (sound.get("user") or {}).get("username"),
+        "embed_url": get_soundcloud_embed_url("tracks", sound["id"]),
+    }
+
+def parse_soundcloud_playlist_info(html: str) -> Optional[Dict[str, Any]]:
+    """
+    Extract the title, curator, embed URL, track count and track URLs from a playlist page.
+
+    Only the first few tracks of a long playlist are fully hydrated; the rest are stubs
+    without a URL, so 'song_urls' may hold fewer URLs than 'track_count'. Returns None if
+    the playlist data is missing altogether.
+    """
+    playlist = parse_soundcloud_hydration(html).get("playlist")
+    if not playlist or not playlist.get("title"):
+        return None
+    tracks = playlist.get("tracks") or []
+    return {
+        "title": playlist["title"],
+        "curator": (playlist.get("user") or {}).get("username"),
+        "embed_url": get_soundcloud_embed_url("playlists", playlist["id"]),
+        "track_count": playlist.get("track_count", len(tracks)),
+        "song_urls": [track["permalink_url"] for track in tracks if track.get("permalink_url")],
+    }
 
 class SoundCloudSong:
     
-    URL_FUNC = lambda url: ("soundcloud.com/" in url) and (not is_soundcloud_playlist(url))
     ENTITY_TYPE = "song"
+    AUDIO_FORMAT = "mp3"
     
     def __init__(self, url: str):
         self.url = url.strip()
         self._song_info = None
-        self.get_driver = get_driver
+        self.driver_pool = get_driver_pool()
         self._title = None
         self._artist = None
         self._embed_url = None
-        self.filename = f"{self.title} by {self.artist}.mp3"
         self._audio = None
+        self._audio_future = None  # Set while the audio is being transcoded
+        self._download_lock = threading.Lock()
         self.platform = "SoundCloud"
         self.entity_type = SoundCloudSong.ENTITY_TYPE
         self.download_from = self.platform
@@ -50,31 +122,33 @@ class SoundCloudSong:
                 if len(embed_urls) == 1:
                     return embed_urls[0]
       
-    def scrape_song_info(self) -> Dict[str, Union[str, None]]:
-        driver = self.get_driver(
-            headless=True,
-            disable_gpu=True,
-            no_sandbox=True,
-            disable_dev_shm_usage=True,
-        )
-        driver.get(self.url)
-        info = {}
-        for var_name, css_elem in [("song", "h1"), ("artist", "h2")]:
-            value = try_find_element(driver, By.CSS_SELECTOR, css_elem)
-            info[var_name] = value if value is None else value.text
-        if info["song"] is None:
-            raise Exception(f"Failed to extract song title and artist/username for {self.url}")
+    def extract_song_info(self) -> Optional[Dict[str, str]]:
+        """Extract the song info from the page's hydration data over plain HTTP (no browser)."""
         try:
-            info["embed_url"] = self._get_embed_url(driver)
-        except StaleElementReferenceException:  # retry
-            info["embed_url"] = self._get_embed_url(driver)
-        driver.quit()
+            return parse_soundcloud_song_info(fetch_text(self.url))
+        except (OSError, HTTPException, ValueError):  # URLError and timeouts are OSErrors
+            return None
+
+    def scrape_song_info(self) -> Dict[str, Union[str, None]]:
+        with self.driver_pool.driver(timeout=DRIVER_CHECKOUT_TIMEOUT) as driver:
+            driver.get(self.url)
+            info = {}
+            for var_name, css_elem in [("song", "h1"), ("artist", "h2")]:
+                value = try_find_element(driver, By.CSS_SELECTOR, css_elem)
+                info[var_name] = value if value is None else value.text
+            if info["song"] is None:
+                raise Exception(f"Failed to extract song title and artist/username for {self.url}")
+            try:
+                info["embed_url"] = self._get_embed_url(driver)
+            except StaleElementReferenceException:  # retry
+                info["embed_url"] = self._get_embed_url(driver)
         return info
 
     @property
     def song_info(self) -> Dict[str, str]:
         if self._song_info is None:
-            self._song_info = self.scrape_song_info()
+            # Selenium is only needed when the hydration data is unavailable
+            self._song_info = self.extract_song_info() or self.scrape_song_info()
         return self._song_info
 
     @property
@@ -89,6 +163,15 @@ class SoundCloudSong:
     def embed_url(self) -> str:
         return self.song_info["embed_url"]
 
+    @property
+    def filename(self) -> str:
+        return f"{self.title} by {self.artist}.mp3"
+
+    @property
+    def media_id(self) -> str:
+        """Canonical ID of the track (the same as its identity map key), used as its audio cache key."""
+        return get_soundcloud_media_id(self.url) or self.url.strip()
+
     @property
     def audio(self) -> BytesIO:
         """Returns the cached audio if already downloaded, otherwise downloads it."""
@@ -101,110 +184,239 @@ class SoundCloudSong:
             raise TypeError(f"Invalid type for 'audio' property; expected BytesIO, got {type(buffer).__name__}")
         self._audio = buffer
 
-    def _download_audio(self, verbose: int = 0) -> bytes:
-        """Downloads the audio and caches it in memory."""
-        buffer = BytesIO()
-
-        # Define a custom download function that writes to the buffer
-        def write_to_buffer(d):
-            if d['status'] == 'finished':
-                buffer.seek(0)  # Reset buffer position for reading
-                buffer.truncate()  # Clear buffer content to prevent overlap
-                with open(d['filename'], 'rb') as f:
-                    buffer.write(f.read())
+    def _download_audio(self, verbose: int = 0) -> "Future[BytesIO]":
+        """
+        Downloads the audio into memory, returning a future resolving to it as MP3.
 
-        # Set up options for yt-dlp to download the audio
+        MP3 streams (SoundCloud's default) are copied as-is: progressive ones straight into
+        memory, HLS ones through a file. Other codecs are downloaded raw and queued to the
+        shared transcoding stage, once the download slot is released. Partial downloads are kept on disk (checkpointed
+        progressive bodies, or yt-dlp's .part files and fragments) so that a retry after an
+        interruption resumes; they are removed once the track is complete.
+        """
         ydl_opts = {
-            'format': 'audio/mp3',  # Download the best audio quality
-            'extractaudio': True,         # Extract audio only
-            'audioformat': 'mp3',         # Convert to mp3
-            'postprocessors': [{
-                'key': 'FFmpegExtractAudio',
-                'preferredcodec': 'mp3',
-                'preferredquality': '192',
-            }],
-            'outtmpl': tempfile.gettempdir() + '/temp_audio_%(id)s.%(ext)s',  # Temporary file name with unique ID
-            'progress_hooks': [write_to_buffer],  # Use custom hook to write to buffer
-            'quiet': verbose == 0  # Set verbosity based on the verbose argument
+            'format': 'bestaudio[ext=mp3][protocol^=http]/bestaudio[ext=mp3]/bestaudio/best',
+            'quiet': verbose == 0,  # Set verbosity based on the verbose argument
         }
-
         with yt_dlp.YoutubeDL(ydl_opts) as ydl:
-            ydl.download([self.url])
+            info = ydl.extract_info(self.url, download=False)
+        is_mp3 = info.get('ext') == 'mp3'
+        if is_mp3 and info.get('protocol') in ('http', 'https'):
+            if verbose >= 1:
+                print(f"...Copying MP3 stream for '{self.url}' into memory")
+            # Shared with every other SoundCloud download in the process (see PLATFORM_DOWNLOAD_CONCURRENCY)
+            with get_download_slots("SoundCloud"):
+                return completed_future(download_resumable(
+                    info['url'],
+                    key=f"soundcloud:{self.media_id}",
+                    size=info.get('filesize'),
+                    headers=info.get('http_headers'),
+                ))
 
-        buffer.seek(0)  # Reset the buffer position before returning
-        return buffer#.getvalue()  # Return the bytes in the buffer
+        partial_dir = os.path.join(PARTIAL_DIR, "soundcloud_" + hashlib.sha256(self.media_id.encode()).hexdigest())
+        ydl_opts.update(outtmpl=os.path.join(partial_dir, '%(id)s.%(ext)s'), continuedl=True)
+        with get_download_slots("SoundCloud"), yt_dlp.YoutubeDL(ydl_opts) as ydl:
+            filepath = ydl.prepare_filename(ydl.process_ie_result(info, download=True))
+        with open(filepath, 'rb') as f:
+            buffer = BytesIO(f.read())
+        shutil.rmtree(partial_dir, ignore_errors=True)
+        if is_mp3:
+            return completed_future(buffer)
+        if verbose >= 1:
+            print(f"...Transcoding {info.get('ext')} audio for '{self.url}' to MP3")
+        return get_transcoder().submit(buffer, "mp3", input_format=info.get('ext'), bitrate="192k")
+
+    def fetch_audio(self, *, verbose: int = 0) -> "Future[BytesIO]":
+        """
+        Starts downloading the audio and returns a future resolving to it. It returns once the
+        raw audio is downloaded: transcoding runs on the shared transcoder, so the calling
+        thread (and the download slot) is free for another download meanwhile. Once done, the
+        audio is cached in the _audio attribute and in the audio cache.
+        """
+        # The entity may be shared (see utils.identity_utils): download it only once
+        with self._download_lock:
+            future, buffer = self._audio_future, self._audio
+            started = future is None and buffer is None
+            if started:  # Only download if neither cached nor being transcoded
+                buffer = get_audio_cache().get(self.media_id, self.AUDIO_FORMAT)
+                if buffer is None:
+                    future = self._download_audio(
+                        verbose=verbose
+                    )
+                    future.add_done_callback(self._cache_audio)
+                else:
+                    future = completed_future(buffer)
+                self._audio_future = future
+            elif future is None:
+                future = completed_future(buffer)
+        # Outside the lock, since spilling other buffers takes their holders' download locks
+        if started:
+            future.add_done_callback(self._finish_audio)
+        elif buffer is not None:
+            get_memory_accountant().touch(buffer)
+        return future
 
     def download_audio(
         self,
         *,
         verbose: int = 0
-    ) -> bytes:
-        """Downloads the audio and caches it in the _audio attribute, keeping it in memory."""
-        if self._audio is None:  # Only download if not already cached
-            self._audio = self._download_audio(
-                verbose=verbose
-            )
-        return self._audio
+    ) -> BytesIO:
+        """
+        Downloads the audio, waiting for it to be transcoded. Returns the buffer, which
+        callers should use rather than _audio, as the memory accountant may drop _audio.
+        """
+        return self.fetch_audio(verbose=verbose).result()
+
+    def _cache_audio(self, future: "Future[BytesIO]"):
+        if not future.cancelled() and future.exception() is None:
+            get_audio_cache().put(self.media_id, self.AUDIO_FORMAT, future.result())
+
+    def _finish_audio(self, future: "Future[BytesIO]"):
+        """Keeps the audio once its future is done, on the transcoder's thread (or the caller's)."""
+        with self._download_lock:
+            if self._audio_future is future:
+                self._audio_future = None
+            if future.cancelled() or future.exception() is not None:
+                return  # Downloaded again on the next call
+            buffer = self._audio = future.result()
+        get_memory_accountant().track(buffer, self._spill_audio)
+
+    def release_audio(self):
+        """Drops the downloaded audio buffer to free memory; it is downloaded again if needed."""
+        self._audio = None
+
+    def _spill_audio(self, buffer: BytesIO, load_spilled):
+        """Memory accountant callback: drops the audio, which is reloaded from the audio cache on access."""
+        with self._download_lock:
+            if self._audio is buffer:
+                self.release_audio()
 
 class SoundCloudPlaylist:
     
-    URL_FUNC = lambda url: ("soundcloud.com/" in url) and (is_soundcloud_playlist(url))
     ENTITY_TYPE = "playlist"
     
     def __init__(self, url: str):
         self.url = url.strip()
-        attrs = self.scrape_playlist_info()
+        self.driver_pool = get_driver_pool()
+        attrs = self.get_playlist_info()
         self.title = attrs["title"]
         self.curator = attrs["curator"]
-        self.song_urls = attrs["song_urls"]
+        self.track_count = attrs.get("track_count")
+        self._hydrated_song_urls = attrs.get("song_urls") or []
+        self._song_urls = None
         self._songs = None
         self.filename = os.path.join(self.title.replace(' ', '_'), '.zip')
-        self.audio = None
+        self.downloaded = False
         self.audio_zipped = None
+        self.download_errors = {}
         self.platform = "SoundCloud"
         self.entity_type = SoundCloudPlaylist.ENTITY_TYPE
         self.download_from = self.platform
-        self.embed_url = None
+        self.embed_url = attrs.get("embed_url")
         self.current_batch_size = None
-        self.get_driver = get_driver
-
-    def scrape_playlist_info(self):
-        driver = self.get_driver(
-            headless=True,
-            disable_gpu=True,
-            no_sandbox=True,
-            disable_dev_shm_usage=True,
-        )
-        driver.get(self.url)  # Replace with your target URL
-        titles_text = try_find_elements(driver, by=By.CLASS_NAME, value="soundTitle", wait=True, timeout=10)
-        if titles_text is None:
-            raise Exception(f"Failed to extract playlist title and curator for SoundCloud playlist: {self.url}")
-        titles_text = titles_text[0].text
+        self._download_lock = threading.RLock()
+
+    def extract_playlist_info(self) -> Optional[Dict[str, Any]]:
+        """Extract the playlist info from the page's hydration data over plain HTTP (no browser)."""
+        try:
+            return parse_soundcloud_playlist_info(fetch_text(self.url))
+        except (OSError, HTTPException, ValueError):  # URLError and timeouts are OSErrors
+            return None
+
+    def get_playlist_info(self) -> Dict[str, Any]:
+        """Playlist info from the hydration data, scraping it with Selenium only if that fails."""
+        return self.extract_playlist_info() or self.scrape_playlist_info()
+
+    def scrape_playlist_info(self) -> Dict[str, str]:
+        with self.driver_pool.driver(timeout=DRIVER_CHECKOUT_TIMEOUT) as driver:
+            driver.get(self.url)
+            titles_text = try_find_elements(driver, by=By.CLASS_NAME, value="soundTitle", wait=True, timeout=10)
+            if titles_text is None:
+                raise Exception(f"Failed to extract playlist title and curator for SoundCloud playlist: {self.url}")
+            titles_text = titles_text[0].text
         titles_text_split = titles_text.strip().split('\n')
         title, curator = titles_text_split[1], titles_text_split[2].rstrip("Verified").strip()
-        song_elems = try_find_elements(driver, by=By.CLASS_NAME, value="trackItem__trackTitle", wait=True, timeout=10)
-        song_urls = [song_elem.get_attribute("href") for song_elem in song_elems]
-        driver.quit()
         return {
             "title": title, 
             "curator": curator,
-            "song_urls": song_urls,
         }
 
+    def iter_song_urls(self) -> Iterator[str]:
+        """
+        Yield the URLs of the playlist's tracks as they are found.
+
+        The tracks in the page's hydration data come first; the rest are found by scrolling
+        the playlist page, which lazy-loads long sets, until the track count is reached or
+        scrolling stops revealing new tracks. The driver stays checked out while the caller
+        downloads the tracks found so far, so every checkout (e.g. the Selenium fallback of
+        those tracks) gives up after DRIVER_CHECKOUT_TIMEOUT instead of waiting forever.
+        """
+        if self._song_urls is not None:
+            yield from self._song_urls
+            return
+        song_urls = list(self._hydrated_song_urls)
+        yield from song_urls
+        if self.track_count is None or len(song_urls) < self.track_count:
+            # Links on a set page carry a '?in=<user>/sets/...' query, so they are compared by
+            # track ID: the hydrated tracks would be listed again otherwise
+            seen = {get_soundcloud_media_id(url) for url in song_urls}
+            with self.driver_pool.driver(timeout=DRIVER_CHECKOUT_TIMEOUT) as driver:
+                driver.get(self.url)
+                try_find_elements(driver, by=By.CLASS_NAME, value="trackItem__trackTitle", wait=True, timeout=10)
+                idle_scrolls = 0
+                while idle_scrolls < PLAYLIST_MAX_IDLE_SCROLLS:
+                    hrefs = driver.execute_script(
+                        "return Array.from(document.querySelectorAll('.trackItem__trackTitle'), e => e.href)"
+                    )
+                    new_urls = []
+                    for url in hrefs:
+                        track_id = url and get_soundcloud_media_id(url)
+                        if track_id and track_id not in seen:
+                            seen.add(track_id)
+                            new_urls.append(url)
+                    for url in new_urls:
+                        song_urls.append(url)
+                        yield url
+                    if self.track_count is not None and len(song_urls) >= self.track_count:
+                        break
+                    idle_scrolls = 0 if new_urls else idle_scrolls + 1
+                    driver.execute_script("window.scrollTo(0, document.body.scrollHeight);")
+                    time.sleep(PLAYLIST_SCROLL_PAUSE)
+        self._song_urls = song_urls
+        self.track_count = len(song_urls)  # Unavailable tracks are counted but never listed
+
+    @property
+    def song_urls(self) -> List[str]:
+        if self._song_urls is None:
+            for _ in self.iter_song_urls():
+                pass
+        return self._song_urls
+
     @property
     def length(self) -> int:
+        if self.track_count is not None:
+            return self.track_count
         return len(self.song_urls)
 
     @property
-    def songs(self):
+    def songs(self) -> List[SoundCloudSong]:
         """Cache songs to ensure they are not re-instantiated."""
         if self._songs is None:
-            self._songs = [SoundCloudSong(url) for url in self.song_urls]
+            for _ in self.songs_generator():
+                pass
         return self._songs
 
-    def songs_generator(self):
-        for song in self.songs:
+    def songs_generator(self) -> Iterator[SoundCloudSong]:
+        """Yield the playlist's songs, as their URLs are found if they have not been yet."""
+        if self._songs is not None:
+            yield from self._songs
+            return
+        songs = []
+        for url in self.iter_song_urls():
+            song = get_shared_entity(SoundCloudSong, url)
+            songs.append(song)
             yield song
+        self._songs = songs
 
     def get_playlist_titles(self) -> List[str]:
         """Return a list of titles for all songs in the playlist."""
@@ -222,41 +434,70 @@ class SoundCloudPlaylist:
         self,
         *,
         stqdm: bool = False,
-        verbose: int = 0
-    ) -> List[bytes]:
-        if self.audio is None:  # Ensure we only download once
-            self.audio = []
-            desc = f"Downloading audio for {self.length} songs in '{self.title}' playlist"
-            songs = st_tqdm(self.songs, desc=desc) if stqdm else self.songs
-            for i, song in enumerate(songs):
-                if stqdm:
-                    songs.set_description(f"{i + 1} / {self.length} Downloading: {song.title}")
-                self.audio.append(song.download_audio(
-                    verbose=verbose
-                ))
-        return self.audio
+        verbose: int = 0,
+        max_workers: Optional[int] = None,
+        on_progress: Optional[Callable[[int, Optional[int]], None]] = None,
+    ) -> List[SoundCloudSong]:
+        # Also called from the scheduler's background thread: download only once
+        with self._download_lock:
+            if not self.downloaded:  # Ensure we only download once
+                desc = f"Downloading audio for {self.length} songs in '{self.title}' playlist"
+                # Downloads start on the first tracks while the rest of the set is still listed
+                # Each song stays the only holder of its audio, so it can be spilled
+                _, self.download_errors = download_audio_concurrently(
+                    self.songs_generator(),
+                    max_workers=max_workers,
+                    stqdm=stqdm,
+                    desc=desc,
+                    total=self.length,
+                    verbose=verbose,
+                    return_audio=False,
+                    on_progress=on_progress,
+                    # Conversion runs on the shared transcoder while the next songs download
+                    download_func=lambda song: song.fetch_audio(verbose=verbose),
+                )
+                self.downloaded = True
+        return self.downloaded_songs
+
+    @property
+    def downloaded_songs(self) -> List[SoundCloudSong]:
+        """Songs of the playlist whose audio was downloaded without errors."""
+        return [song for i, song in enumerate(self.songs) if i not in self.download_errors]
 
     def zip_audio(
         self,
         *,
         batch_size: Optional[int] = None,
         stqdm: bool = False,
-        verbose: int = 0
+        verbose: int = 0,
+        max_workers: Optional[int] = None,
     ) -> BytesIO:
         """Zip audio files of the playlist songs."""
         self.download_audio(
             stqdm=stqdm,
-            verbose=verbose
+            verbose=verbose,
+            max_workers=max_workers,
         )
-        audio_not_yet_zipped = self.audio_zipped is None
-        batch_size_changed = batch_size != self.current_batch_size
-        if audio_not_yet_zipped or batch_size_changed:
-            self.current_batch_size = batch_size
-            desc = f"Zipping audio for {self.length} songs in '{self.title}' playlist"
-            if batch_size:
-                if batch_size < self.length:
-                    desc += f" (batches of {batch_size})"
-                else:
-                    batch_size = None
-            self.audio_zipped = zip_audio_files(self.songs, batch_size=batch_size, stqdm=stqdm, total=self.length)
-        return self.audio_zipped
+        with self._download_lock:
+            audio_not_yet_zipped = self.audio_zipped is None
+            batch_size_changed = batch_size != self.current_batch_size
+            if audio_not_yet_zipped or batch_size_changed:
+                self.current_batch_size = batch_size
+                desc = f"Zipping audio for {self.length} songs in '{self.title}' playlist"
+                if batch_size:
+                    if batch_size < self.length:
+                        desc += f" (batches of {batch_size})"
+                    else:
+                        batch_size = None
+                self.audio_zipped = zip_audio_files(
+                    self.downloaded_songs,
+                    batch_size=batch_size,
+                    stqdm=stqdm,
+                    total=len(self.downloaded_songs),
+                )
+                get_memory_accountant().track_all(self.audio_zipped, self._spill_audio_zipped)
+            return self.audio_zipped
+
+    def _spill_audio_zipped(self, buffer: BytesIO, load_spilled):
+        """Memory accountant callback: swaps the spilled archive for a file with its bytes."""
+        self.audio_zipped = replace_spilled(self.audio_zipped, buffer, load_spilled)
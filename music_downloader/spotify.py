@@ -1,37 +1,126 @@
-from typing import Optional, Union, Tuple, List
+from typing import Optional, Union, Tuple, List, Dict, Callable
 import os
+import threading
 import spotipy
-from spotipy.oauth2 import SpotifyOAuth
-from youtubesearchpython import VideosSearch
+from spotipy.oauth2 import SpotifyOAuth, SpotifyClientCredentials
+from spotipy.cache_handler import MemoryCacheHandler
 from dotenv import load_dotenv
 from io import BytesIO
-from stqdm import stqdm as st_tqdm
 import re
+from functools import partial
+from concurrent.futures import Future
 
-from music_downloader.youtube import YouTubeVideo
+from music_downloader.youtube import YouTubeVideo, YOUTUBE_AUDIO_FORMAT
+from music_downloader.youtube_search import get_youtube_search_resolver
 from utils.zip_utils import zip_audio_files
+from utils.cache_utils import ResponseCache
+from utils.download_utils import download_audio_concurrently
+from utils.memory_utils import get_memory_accountant, replace_spilled
+from utils.identity_utils import get_shared_entity
 
 
 load_dotenv()
 
+SPOTIFY_AUTH_MODES = ("oauth", "client_credentials")
+SPOTIFY_CACHE_TTL = int(os.getenv("SPOTIFY_CACHE_TTL", 10 * 60))
+# Responses are shared by every client in the process (keyed by client ID)
+SPOTIFY_RESPONSE_CACHE = ResponseCache(ttl=SPOTIFY_CACHE_TTL)
+
+class CachedSpotify:
+    """
+    Wrapper around a spotipy client that memoizes track, playlist and search responses.
+
+    Responses are cached for SPOTIFY_CACHE_TTL seconds and identical concurrent calls are
+    merged into a single request; every other attribute is delegated to the wrapped client.
+    """
+
+    CACHED_METHODS = ("track", "playlist", "search")
+
+    def __init__(
+        self,
+        client: spotipy.Spotify,
+        client_id: Optional[str] = None,
+        cache: ResponseCache = SPOTIFY_RESPONSE_CACHE,
+    ):
+        self.client = client
+        self.client_id = client_id
+        self.cache = cache
+
+    def __getattr__(self, name: str):
+        if name in CachedSpotify.CACHED_METHODS:
+            return partial(self._cached_call, name)
+        return getattr(self.client, name)
+
+    def _cached_call(self, method: str, *args, **kwargs):
+        key = (self.client_id, method, args, tuple(sorted(kwargs.items())))
+        return self.cache.get_or_call(key, getattr(self.client, method), *args, **kwargs)
+
+    @property
+    def stats(self) -> Dict[str, int]:
+        """Hit/miss/merged counters of the response cache."""
+        return self.cache.stats
+
+class _LockedAuthManager:
+    """Serializes token fetches/refreshes of a spotipy auth manager shared across threads."""
+
+    def __init__(self, auth_manager: Union[SpotifyOAuth, SpotifyClientCredentials]):
+        self.auth_manager = auth_manager
+        self._lock = threading.Lock()
+
+    def get_access_token(self, *args, **kwargs):
+        with self._lock:
+            return self.auth_manager.get_access_token(*args, **kwargs)
+
+    def __getattr__(self, name: str):
+        return getattr(self.auth_manager, name)
+
+# One client per credential set, shared by every entity and session of the process
+_SPOTIFY_CLIENTS: Dict[tuple, CachedSpotify] = {}
+_SPOTIFY_CLIENTS_LOCK = threading.Lock()
+
+def get_spotify_auth_mode(redirect_uri: Optional[str], auth_mode: Optional[str] = None) -> str:
+    """
+    Resolve the auth mode: 'oauth' (user authorization, needed for private playlists) or
+    'client_credentials' (app-only, for server deployments without a redirect flow).
+    """
+    auth_mode = auth_mode or os.getenv("SPOTIFY_AUTH_MODE") or ("oauth" if redirect_uri else "client_credentials")
+    if auth_mode not in SPOTIFY_AUTH_MODES:
+        raise ValueError(f"Invalid Spotify auth mode '{auth_mode}'; expected one of {SPOTIFY_AUTH_MODES}")
+    return auth_mode
+
 def authenticate_spotify(
     spotify_client_id: Optional[str] = None,
     spotify_client_secret: Optional[str] = None,
     spotify_redirect_uri: Optional[str] = None,
-) -> spotipy.Spotify:
-    """Authenticate Spotify API connection"""
-    return spotipy.Spotify(
-        auth_manager=SpotifyOAuth(
-            client_id=spotify_client_id or os.getenv("SPOTIFY_CLIENT_ID"),
-            client_secret=spotify_client_secret or os.getenv("SPOTIFY_CLIENT_SECRET"),
-            redirect_uri=spotify_redirect_uri or os.getenv("SPOTIFY_REDIRECT_URI"),
-            scope="playlist-read-private"
-        )
-    )
+    auth_mode: Optional[str] = None,
+) -> CachedSpotify:
+    """Authenticate Spotify API connection, reusing the process-wide client for these credentials"""
+    client_id = spotify_client_id or os.getenv("SPOTIFY_CLIENT_ID")
+    client_secret = spotify_client_secret or os.getenv("SPOTIFY_CLIENT_SECRET")
+    redirect_uri = spotify_redirect_uri or os.getenv("SPOTIFY_REDIRECT_URI")
+    auth_mode = get_spotify_auth_mode(redirect_uri, auth_mode)
+    key = (auth_mode, client_id, client_secret, redirect_uri)
+    with _SPOTIFY_CLIENTS_LOCK:
+        if key not in _SPOTIFY_CLIENTS:
+            if auth_mode == "oauth":
+                auth_manager = SpotifyOAuth(
+                    client_id=client_id,
+                    client_secret=client_secret,
+                    redirect_uri=redirect_uri,
+                    scope="playlist-read-private"
+                )
+            else:
+                auth_manager = SpotifyClientCredentials(
+                    client_id=client_id,
+                    client_secret=client_secret,
+                    cache_handler=MemoryCacheHandler(),
+                )
+            client = spotipy.Spotify(auth_manager=_LockedAuthManager(auth_manager))
+            _SPOTIFY_CLIENTS[key] = CachedSpotify(client, client_id=client_id)
+        return _SPOTIFY_CLIENTS[key]
 
 class SpotifySong:
     
-    URL_FUNC = lambda url: "spotify.com/track" in url
     ENTITY_TYPE = "song"
     
     def __init__(
@@ -42,21 +131,28 @@ class SpotifySong:
         spotify_client_id: Optional[str] = None,
         spotify_client_secret: Optional[str] = None,
         spotify_redirect_uri: Optional[str] = None,
+        sp: Optional[CachedSpotify] = None,
+        track: Optional[dict] = None,
     ):
-        if not (url or (song and artist)):
+        if not (url or (song and artist) or track):
             raise Exception(f"{url=}, {song=}, {artist=}: Must provide either URL or Song & Artist to instantiate SpotifySong")
-        self.sp = self.authenticate(
+        self.sp = sp or self.authenticate(
             spotify_client_id=spotify_client_id,
             spotify_client_secret=spotify_client_secret,
             spotify_redirect_uri=spotify_redirect_uri,
         )
         self._youtube_url = None  # Internal variable to store the YouTube URL
-        if url:
-            self.spotify_url = url
+        if track is not None:
+            # Details already known (e.g. from a playlist payload); no API calls needed
+            self.spotify_url = track["external_urls"]["spotify"]
+            self.song, self.artist = self.get_song_details_from_track(track)
         else:
-            self.spotify_url = self.get_spotify_url_from_song(song, artist)
-        self.song, self.artist = self.get_song_details_from_spotify(self.spotify_url)
-        self._validate_details(song, artist)
+            if url:
+                self.spotify_url = url
+            else:
+                self.spotify_url = self.get_spotify_url_from_song(song, artist)
+            self.song, self.artist = self.get_song_details_from_spotify(self.spotify_url)
+            self._validate_details(song, artist)
         self.title = f"{self.song} by {self.artist}"
         self.spotify_embed_url = self.get_spotify_embed_url(self.spotify_url)
         self._youtube_url = None
@@ -80,18 +176,27 @@ class SpotifySong:
         spotify_client_id: Optional[str] = None,
         spotify_client_secret: Optional[str] = None,
         spotify_redirect_uri: Optional[str] = None,
-    ) -> spotipy.Spotify:
+    ) -> CachedSpotify:
         return authenticate_spotify(
             spotify_client_id=spotify_client_id,
             spotify_client_secret=spotify_client_secret,
             spotify_redirect_uri=spotify_redirect_uri,
         )
 
+    @classmethod
+    def from_track(cls, track: dict, sp: CachedSpotify) -> "SpotifySong":
+        """Build a song from a Spotify track object, sharing an existing client."""
+        return cls(track=track, sp=sp)
+
+    @staticmethod
+    def get_song_details_from_track(track: dict) -> Tuple[str, str]:
+        """Get song name and artist from a Spotify track object."""
+        return track['name'], track['artists'][0]['name']
+
     def get_song_details_from_spotify(self, spotify_url: str) -> tuple:
         """Get song name and artist from Spotify URL."""
         track = self.sp.track(spotify_url)
-        song_name = track['name']
-        artist_name = track['artists'][0]['name']
+        song_name, artist_name = self.get_song_details_from_track(track)
         print(f"Retrieved from Spotify: {song_name} by {artist_name}")
         return song_name, artist_name
 
@@ -117,14 +222,7 @@ class SpotifySong:
 
     def get_youtube_url_from_song(self, song: str, artist: Optional[str] = None) -> str:
         """Search YouTube for the song and artist and return the video URL."""
-        search_query = f"{song} by {artist} lyrics" if artist else song
-        videos = VideosSearch(search_query, limit=5).result()['result']
-        if not videos:
-            raise ValueError(f"No YouTube results found for: {search_query}")
-        video = videos[0]
-        title, url = video['title'], video['link']
-        print(f"YouTube Search: {search_query}\nYouTube Result: {title} ({url})\n")
-        return url
+        return get_youtube_search_resolver().resolve(song, artist)
 
     def get_spotify_embed_url(self, spotify_url: str) -> str:
         """Extract the track ID from the Spotify URL and generate the embed URL."""
@@ -140,28 +238,28 @@ class SpotifySong:
         return self._youtube_url
 
     @property
-    def youtube_video(self) -> str:
-        """Lazy property for YouTube Video"""
+    def youtube_video(self) -> YouTubeVideo:
+        """Lazy property for YouTube Video, shared with any other song/playlist matching the same video."""
         if self._youtube_video is None:
-            self._youtube_video = YouTubeVideo(self.youtube_url)
+            self._youtube_video = get_shared_entity(YouTubeVideo, self.youtube_url)
         return self._youtube_video
 
     @property
     def youtube_embed_url(self) -> str:
         """Lazy property for YouTube embed URL; initializes YouTube video object if not set."""
-        if not self.youtube_video:
-            self.youtube_video = YouTubeVideo(self.youtube_url)
         return self.youtube_video.embed_url
 
     @property
     def filename(self) -> str:
-        """Return the filename for the audio."""
-        return f"{self.song} by {self.artist}.mp3"
+        """Return the filename for the audio, with the extension of the YouTube output format."""
+        return f"{self.song} by {self.artist}.{YOUTUBE_AUDIO_FORMAT}"
+
+    def fetch_audio(self, verbose: int = 0) -> "Future[BytesIO]":
+        """Start downloading the audio by using the YouTubeVideo class (see YouTubeVideo.fetch_audio)."""
+        return self.youtube_video.fetch_audio(verbose=verbose)
 
     def download_audio(self, verbose: int = 0):
         """Download the audio by using the YouTubeVideo class."""
-        if not self.youtube_video:
-            self.youtube_video = YouTubeVideo(self.youtube_url)
         return self.youtube_video.download_audio(verbose=verbose)
 
     @property
@@ -177,7 +275,6 @@ class SpotifySong:
 
 class SpotifyPlaylist:
     
-    URL_FUNC = lambda url: "spotify.com/playlist" in url
     ENTITY_TYPE = "playlist"
     
     def __init__(
@@ -197,11 +294,12 @@ class SpotifyPlaylist:
         self.title = self.get_title()
         self._songs = None
         self.filename = self.get_filename()
-        self.audio = None
+        self.downloaded = False
         self.audio_zipped = None
-        self.length = self.get_num_tracks_spotify_playlist()
+        self.download_errors = {}
         self.thumbnail = self.get_thumbnail()
         self.current_batch_size = None
+        self._download_lock = threading.RLock()
         self.platform = "Spotify"
         self.entity_type = SpotifyPlaylist.ENTITY_TYPE
         self.download_from = "YouTube"
@@ -211,7 +309,7 @@ class SpotifyPlaylist:
         spotify_client_id: Optional[str] = None,
         spotify_client_secret: Optional[str] = None,
         spotify_redirect_uri: Optional[str] = None,
-    ) -> spotipy.Spotify:
+    ) -> CachedSpotify:
         return authenticate_spotify(
             spotify_client_id=spotify_client_id,
             spotify_client_secret=spotify_client_secret,
@@ -230,16 +328,37 @@ class SpotifyPlaylist:
     def songs(self) -> List[SpotifySong]:
         if self._songs is None:
             self._songs = [
-                SpotifySong(
-                    song=track['track']['name'],
-                    artist=track['track']['artists'][0]['name'],
-                    url=track["track"]["external_urls"]["spotify"],
-                ) for track in self.spotipy_playlist['tracks']['items']
+                SpotifySong.from_track(item['track'], sp=self.sp)
+                for item in self.get_playlist_items()
+                # Removed tracks have no track object and local files have no Spotify URL
+                if item['track'] and not item['track'].get('is_local')
             ]
         return self._songs
 
+    def get_playlist_items(self) -> List[dict]:
+        """Return all track items of the playlist, following pagination past the first page."""
+        page = self.spotipy_playlist['tracks']
+        items = list(page['items'])
+        while page.get('next'):
+            page = self.sp.next(page)
+            items += page['items']
+        return items
+
+    def resolve_youtube_urls(self):
+        """Find the YouTube videos of all songs in one concurrent batch, ahead of downloading."""
+        unresolved = [song for song in self.songs if song._youtube_url is None]
+        urls, _ = get_youtube_search_resolver().resolve_many([(song.song, song.artist) for song in unresolved])
+        # Songs that failed are left unresolved; their error is reported when they are downloaded
+        for song, url in zip(unresolved, urls):
+            song._youtube_url = url
+
     def get_num_tracks_spotify_playlist(self) -> int:
-        return self.spotipy_playlist["tracks"]["total"]
+        """Number of downloadable songs: tracks.total also counts removed tracks and local files."""
+        return len(self.songs)
+
+    @property
+    def length(self) -> int:
+        return self.get_num_tracks_spotify_playlist()
 
     def get_thumbnail(self) -> str:
         return self.spotipy_playlist["images"][0]["url"]
@@ -249,49 +368,77 @@ class SpotifyPlaylist:
 
     def get_filename(self) -> str:
         """Generate a filename for the playlist zip file."""
-        playlist_title = self.sp.playlist(self.url.split('/playlist/')[1].split('?')[0])['name']
-        return f"{playlist_title.replace(' ', '_')}.zip"
+        return f"{self.title.replace(' ', '_')}.zip"
 
     def download_audio(
         self,
         *,
         stqdm: bool = False,
-        verbose: int = 0
-    ) -> bytes:
-        if not self.audio:
-            self.audio = []
-            desc = f"Downloading audio for {self.length} songs in '{self.title}' playlist"
-            songs = st_tqdm(self.songs, desc=desc) if stqdm else self.songs
-            for i, song in enumerate(songs):
-                if stqdm:
-                    songs.set_description(f"{i + 1} / {self.length} Downloading: {song.title}")
-                self.audio.append(song.download_audio(
-                    verbose=verbose
-                ))
-        return self.audio
+        verbose: int = 0,
+        max_workers: Optional[int] = None,
+        on_progress: Optional[Callable[[int, Optional[int]], None]] = None,
+    ) -> List[SpotifySong]:
+        # Also called from the scheduler's background thread: download only once
+        with self._download_lock:
+            if not self.downloaded:  # Ensure we only download once
+                self.resolve_youtube_urls()
+                desc = f"Downloading audio for {self.length} songs in '{self.title}' playlist"
+                # Each song stays the only holder of its audio, so it can be spilled
+                _, self.download_errors = download_audio_concurrently(
+                    self.songs,
+                    max_workers=max_workers,
+                    stqdm=stqdm,
+                    desc=desc,
+                    total=self.length,
+                    verbose=verbose,
+                    return_audio=False,
+                    on_progress=on_progress,
+                    # Conversion runs on the shared transcoder while the next songs download
+                    download_func=lambda song: song.fetch_audio(verbose=verbose),
+                )
+                self.downloaded = True
+        return self.downloaded_songs
+
+    @property
+    def downloaded_songs(self) -> List[SpotifySong]:
+        """Songs of the playlist whose audio was downloaded without errors."""
+        return [song for i, song in enumerate(self.songs) if i not in self.download_errors]
 
     def zip_audio(
         self,
         *,
         batch_size: Optional[int] = None,
         stqdm: bool = False,
-        verbose: int = 0
+        verbose: int = 0,
+        max_workers: Optional[int] = None,
     ) -> BytesIO:
         """Zip audio files of the playlist songs."""
         self.download_audio(
             stqdm=stqdm,
-            verbose=verbose
+            verbose=verbose,
+            max_workers=max_workers,
         )
-        audio_not_yet_zipped = self.audio_zipped is None
-        batch_size_changed = batch_size != self.current_batch_size
-        if audio_not_yet_zipped or batch_size_changed:
-            self.current_batch_size = batch_size
-            desc = f"Zipping audio for {self.length} songs in '{self.title}' playlist"
-            if batch_size:
-                if batch_size < self.length:
-                    desc += f" (batches of {batch_size})"
-                else:
-                    batch_size = None
-            self.audio_zipped = zip_audio_files(self.songs, batch_size=batch_size, stqdm=stqdm, total=self.length)
-        return self.audio_zipped
+        with self._download_lock:
+            audio_not_yet_zipped = self.audio_zipped is None
+            batch_size_changed = batch_size != self.current_batch_size
+            if audio_not_yet_zipped or batch_size_changed:
+                self.current_batch_size = batch_size
+                desc = f"Zipping audio for {self.length} songs in '{self.title}' playlist"
+                if batch_size:
+                    if batch_size < self.length:
+                        desc += f" (batches of {batch_size})"
+                    else:
+                        batch_size = None
+                self.audio_zipped = zip_audio_files(
+                    self.downloaded_songs,
+                    batch_size=batch_size,
+                    stqdm=stqdm,
+                    total=len(self.downloaded_songs),
+                )
+                get_memory_accountant().track_all(self.audio_zipped, self._spill_audio_zipped)
+            return self.audio_zipped
+
+    def _spill_audio_zipped(self, buffer: BytesIO, load_spilled):
+        """Memory accountant callback: swaps the spilled archive for a file with its bytes."""
+        self.audio_zipped = replace_spilled(self.audio_zipped, buffer, load_spilled)
     
@@ -1,14 +1,26 @@
-from typing import List, Dict, Optional, Literal
+from typing import Any, List, Dict, Optional, Literal, Tuple, Callable
 import time
 import os
+import copy
+import threading
 from io import BytesIO
 import re
-from stqdm import stqdm as st_tqdm
+from collections import deque
+from concurrent.futures import Future
+import json
+from urllib.parse import parse_qs, urlparse
 
 from patch.pytube_patch_oo import pytube
-from pytube import YouTube, Playlist, Stream
+from pytube import YouTube, Playlist, Stream, exceptions, extract, request
+from pytube.helpers import safe_filename
 # from patch.pytube_patch import PATCH_SCRIPT_FILEPATH, is_pytube_patched
 from utils.zip_utils import zip_audio_files
+from utils.download_utils import download_audio_concurrently, get_download_slots
+from utils.cache_utils import ResponseCache, get_audio_cache, get_url_text_cache
+from utils.memory_utils import get_memory_accountant, replace_spilled
+from utils.identity_utils import get_shared_entity
+from utils.transcode_utils import get_transcoder, completed_future
+from utils.http_utils import download_resumable, SEGMENT_MAX_CONNECTIONS
 
 
 # if not is_pytube_patched():
@@ -19,23 +31,244 @@ from utils.zip_utils import zip_audio_files
 #             f"Must run {PATCH_SCRIPT_FILEPATH} patch script before using pytube-based "
 #             f"custom YouTube classes: `python {PATCH_SCRIPT_FILEPATH}`"
 #         )
-    
+
+# Output format of YouTube (and so Spotify) audio. The default, m4a, is remuxed from YouTube's
+# AAC stream without re-encoding; mp3 must be transcoded by ffmpeg, so it is opt-in
+YOUTUBE_AUDIO_FORMAT = os.getenv("YOUTUBE_AUDIO_FORMAT", "m4a")
+# Whether to fetch audio streams as concurrent byte ranges instead of one sequential stream
+YOUTUBE_SEGMENTED_DOWNLOAD = os.getenv("YOUTUBE_SEGMENTED_DOWNLOAD", "1") == "1"
+# Output formats and the stream subtypes (containers) they can be produced from without
+# re-encoding: 'copy' when the raw stream already is the output container, 'remux' otherwise
+POSTPROCESS_SOURCES = {
+    "mp3": {},
+    "m4a": {"mp4": "remux"},
+    "webm": {"webm": "copy"},
+    "opus": {"webm": "remux"},
+}
+# Post-processing path and timing of every downloaded video, to monitor the slow path
+POSTPROCESS_LOG = deque(maxlen=1000)
+# Video details (title, author, duration) and watch page data are shared by every
+# YouTubeVideo in the process for YOUTUBE_METADATA_TTL seconds; resolved stream
+# manifests until YOUTUBE_STREAM_EXPIRY_MARGIN seconds before their URLs expire
+YOUTUBE_METADATA_TTL = int(os.getenv("YOUTUBE_METADATA_TTL", 6 * 60 * 60))
+YOUTUBE_STREAM_EXPIRY_MARGIN = int(os.getenv("YOUTUBE_STREAM_EXPIRY_MARGIN", 15 * 60))
+YOUTUBE_METADATA_CACHE = ResponseCache(ttl=YOUTUBE_METADATA_TTL, max_entries=20_000)
+YOUTUBE_STREAMS_CACHE = ResponseCache(
+    ttl=YOUTUBE_METADATA_TTL,
+    max_entries=int(os.getenv("YOUTUBE_STREAMS_CACHE_MAX_ENTRIES", 2000)),
+)
+
+def get_postprocess_path(output_format: str, source: str) -> str:
+    """Returns the cheapest correct post-processing path: 'copy', 'remux' or 'transcode'."""
+    return POSTPROCESS_SOURCES[output_format].get(source, "transcode")
+
+def get_streams_expiry(stream_manifest: List[Dict[str, Any]], streaming_data: Dict[str, Any]) -> float:
+    """Time (in seconds since the epoch) at which the first of the stream URLs expires."""
+    expiries = [
+        int(expire[0])
+        for stream in stream_manifest
+        for expire in [parse_qs(urlparse(stream.get("url", "")).query).get("expire")]
+        if expire
+    ]
+    if expiries:
+        return min(expiries)
+    return time.time() + int(streaming_data.get("expiresInSeconds") or YOUTUBE_METADATA_TTL)
+
+def _get_streams_ttl(entry: Tuple[List[Dict[str, Any]], float]) -> float:
+    return max(entry[1] - YOUTUBE_STREAM_EXPIRY_MARGIN - time.time(), 0)
+
+def _get_text(text: Dict[str, Any]) -> Optional[str]:
+    if "simpleText" in text:
+        return text["simpleText"]
+    return "".join(run["text"] for run in text.get("runs", [])) or None
+
+def get_playlist_video_details(renderer: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """Title, author and duration of a playlist entry (a playlistVideoRenderer), like YouTubeVideo.details."""
+    if not renderer.get("isPlayable", True) or "lengthSeconds" not in renderer:
+        return None  # Deleted or private video: left to YouTubeVideo to report
+    title = _get_text(renderer.get("title", {}))
+    if title is None:
+        return None
+    return {
+        "title": title,
+        "author": _get_text(renderer.get("shortBylineText", {})) or "unknown",
+        "length": int(renderer["lengthSeconds"]),
+    }
+
+def _iter_playlist_video_renderers(data: Any):
+    if isinstance(data, dict):
+        if "playlistVideoRenderer" in data:
+            yield data["playlistVideoRenderer"]
+            return
+        data = list(data.values())
+    if isinstance(data, list):
+        for value in data:
+            yield from _iter_playlist_video_renderers(value)
+
+def get_postprocess_summary() -> Dict[str, Dict[str, float]]:
+    """Count and mean duration of each post-processing path taken so far."""
+    summary = {}
+    for entry in list(POSTPROCESS_LOG):
+        path_summary = summary.setdefault(entry["path"], {"count": 0, "total_seconds": 0.0})
+        path_summary["count"] += 1
+        path_summary["total_seconds"] += entry["seconds"]
+    for path_summary in summary.values():
+        path_summary["mean_seconds"] = path_summary["total_seconds"] / path_summary["count"]
+    return summary
+
 class YouTubeVideo(YouTube):
     
-    URL_FUNC = lambda url: "youtube.com/watch?" in url
     ENTITY_TYPE = "song"
     
-    def __init__(self, url: str):
+    def __init__(self, url: str, audio_format: str = YOUTUBE_AUDIO_FORMAT):
         super().__init__(url)
-        self.artist = self.author
+        if audio_format not in POSTPROCESS_SOURCES:
+            raise ValueError(f"Unsupported audio format '{audio_format}'; expected one of {list(POSTPROCESS_SOURCES)}")
+        self.audio_format = audio_format
+        self._streams_expire_at = 0.0
+        details = self.details
+        self.artist = self.author = details["author"]
         self.url = self.watch_url
-        self.title = self._format_song_title(self.title)
+        self.title = self._format_song_title(details["title"])
         self._audio_stream = None
         self._audio = None
+        self._audio_future = None  # Set while the audio is being converted
+        self._download_lock = threading.Lock()
         self.entity_type = YouTubeVideo.ENTITY_TYPE
         self.platform = "YouTube"
         self.download_from = "YouTube"
 
+    @property
+    def media_id(self) -> str:
+        """Canonical ID of the video, used as its audio cache key."""
+        return self.video_id
+
+    @property
+    def details(self) -> Dict[str, Any]:
+        """Title, author and duration of the video, shared by every instance for the same video."""
+        return YOUTUBE_METADATA_CACHE.get_or_call(("details", self.video_id), self._fetch_details)
+
+    def _fetch_details(self) -> Dict[str, Any]:
+        video_details = self.vid_info.get("videoDetails", {})
+        if "title" not in video_details:
+            YouTube.title.fget(self)  # Raises the reason why the video is unavailable
+        return {
+            "title": video_details["title"],
+            "author": video_details.get("author", "unknown"),
+            "length": int(video_details.get("lengthSeconds") or 0),
+        }
+
+    @property
+    def length(self) -> int:
+        """Duration of the video in seconds."""
+        return self.details["length"]
+
+    @property
+    def watch_info(self) -> Dict[str, Any]:
+        """What pytube reads from the watch page (availability, age restriction and player URL), shared like details."""
+        return YOUTUBE_METADATA_CACHE.get_or_call(("watch", self.video_id), self._fetch_watch_info)
+
+    def _fetch_watch_info(self) -> Dict[str, Any]:
+        # The page itself is not kept, as it is large and only these are needed
+        watch_html = request.get(url=self.watch_url)
+        age_restricted = extract.is_age_restricted(watch_html)
+        try:
+            js_url = extract.js_url(request.get(url=self.embed_url) if age_restricted else watch_html)
+        except exceptions.RegexMatchError:
+            js_url = None
+        return {
+            "playability_status": extract.playability_status(watch_html),
+            "age_restricted": age_restricted,
+            "js_url": js_url,
+        }
+
+    @property
+    def age_restricted(self) -> bool:
+        return self.watch_info["age_restricted"]
+
+    @property
+    def js_url(self) -> str:
+        if self._js_url is None:
+            self._js_url = self.watch_info["js_url"] or super().js_url
+        return self._js_url
+
+    @property
+    def js(self) -> str:
+        """Player script, cached by URL on disk and revalidated once stale."""
+        if self._js is None:
+            self._js = get_url_text_cache().get(self.js_url)
+        return self._js
+
+    def check_availability(self):
+        """Raises pytube's exception for the reason why the video is unavailable, from the cached watch page data."""
+        status, messages = self.watch_info["playability_status"]
+        for reason in messages:
+            if status == 'UNPLAYABLE':
+                if reason == (
+                    'Join this channel to get access to members-only content '
+                    'like this video, and other exclusive perks.'
+                ):
+                    raise exceptions.MembersOnly(video_id=self.video_id)
+                elif reason == 'This live stream recording is not available.':
+                    raise exceptions.RecordingUnavailable(video_id=self.video_id)
+                else:
+                    raise exceptions.VideoUnavailable(video_id=self.video_id)
+            elif status == 'LOGIN_REQUIRED':
+                if reason == (
+                    'This is a private video. '
+                    'Please sign in to verify that you may see it.'
+                ):
+                    raise exceptions.VideoPrivate(video_id=self.video_id)
+            elif status == 'ERROR':
+                if reason == 'Video unavailable':
+                    raise exceptions.VideoUnavailable(video_id=self.video_id)
+            elif status == 'LIVE_STREAM':
+                raise exceptions.LiveStreamError(video_id=self.video_id)
+
+    @property
+    def streams_expired(self) -> bool:
+        """Whether the stream URLs expire too soon to download from them."""
+        return time.time() >= self._streams_expire_at - YOUTUBE_STREAM_EXPIRY_MARGIN
+
+    @property
+    def fmt_streams(self) -> List[Stream]:
+        """
+        Streams of the video, from its deciphered stream manifest. The manifest is shared
+        by every instance for the same video until shortly before its URLs expire.
+        """
+        if self._fmt_streams and not self.streams_expired:
+            return self._fmt_streams
+        self.check_availability()
+        if self._fmt_streams:
+            # The loaded streams expired, so the player response holding their manifest has too
+            self._vid_info = None
+        stream_manifest, self._streams_expire_at = YOUTUBE_STREAMS_CACHE.get_or_call(
+            self.video_id, self._resolve_stream_manifest, ttl=_get_streams_ttl
+        )
+        # Streams only read their manifest entries, so the shared ones are not copied deeply
+        self._fmt_streams = [Stream(stream=dict(stream), monostate=self.stream_monostate) for stream in stream_manifest]
+        self.stream_monostate.title = self.title
+        self.stream_monostate.duration = self.length
+        return self._fmt_streams
+
+    def _resolve_stream_manifest(self) -> Tuple[List[Dict[str, Any]], float]:
+        """Deciphers the stream manifest; returns it with the time its URLs expire at."""
+        streaming_data = self.streaming_data
+
+        def decipher() -> List[Dict[str, Any]]:
+            stream_manifest = extract.apply_descrambler(copy.deepcopy(streaming_data))
+            extract.apply_signature(stream_manifest, self.vid_info, self.js)
+            return stream_manifest
+
+        try:
+            stream_manifest = decipher()
+        except exceptions.ExtractError:
+            # The cached watch page may point to an outdated player: fetch both again
+            YOUTUBE_METADATA_CACHE.invalidate(("watch", self.video_id))
+            self._js = self._js_url = None
+            stream_manifest = decipher()
+        return stream_manifest, get_streams_expiry(stream_manifest, streaming_data)
+
     def _format_song_title(self, title: str) -> str:
         if ' - ' not in title:
             title += f" by {self.artist}"
@@ -43,14 +276,20 @@ class YouTubeVideo(YouTube):
 
     @property
     def filename(self) -> str:
-        """Returns the file name for the audio, formatted as .mp3."""
-        return os.path.splitext(self.audio_stream.default_filename)[0] + '.mp3'
+        """Returns the file name for the audio, with the extension of its output format."""
+        return f"{safe_filename(self.title)}.{self.audio_format}"  # Same as the stream's, without resolving it
 
     @property
     def audio_stream(self) -> Stream:
-        """Caches the audio stream to avoid redundant calls."""
-        if self._audio_stream is None:
-            self._audio_stream = self.streams.get_audio_only()
+        """Caches the audio stream to avoid redundant calls, until its URL is about to expire."""
+        if self._audio_stream is None or self.streams_expired:
+            audio_streams = self.streams.filter(only_audio=True)
+            # Prefer a stream that the output format can be copied or remuxed from
+            source = next(iter(POSTPROCESS_SOURCES[self.audio_format]), None)
+            self._audio_stream = (
+                (source and audio_streams.filter(subtype=source).order_by("abr").last())
+                or audio_streams.order_by("abr").last()
+            )
         return self._audio_stream
 
     @audio_stream.setter
@@ -63,9 +302,8 @@ class YouTubeVideo(YouTube):
     @property
     def audio(self) -> BytesIO:
         """Returns the cached audio if already downloaded, otherwise downloads it."""
-        if self._audio is None:
-            self.download_audio()
-        return self._audio
+        audio = self._audio
+        return audio if audio is not None else self.download_audio()
 
     @audio.setter
     def audio(self, buffer: BytesIO):
@@ -74,24 +312,138 @@ class YouTubeVideo(YouTube):
             raise TypeError(f"Invalid type for 'audio' property; expected BytesIO, got {type(buffer).__name__}")
         self._audio = buffer
 
-    def download_audio(self, verbose: int = 0):
-        """Downloads the audio and caches it in the _audio attribute."""
-        if self._audio is None:  # Only download if not already cached
-            if verbose >= 1:
-                print(f"...Downloading audio for '{self.title}': {self.url}")
-            buffer = BytesIO()
-            self.audio_stream.stream_to_buffer(buffer)
-            self.audio = buffer
-            if verbose >= 1:
-                print(f"......Successfully downloaded audio for '{self.title}'")
+    def fetch_audio(self, verbose: int = 0) -> "Future[BytesIO]":
+        """
+        Starts downloading the audio and returns a future resolving to it. It returns once the
+        raw stream is downloaded: post-processing runs on the shared transcoder, so the calling
+        thread (and the download slot) is free for another download meanwhile. Once done, the
+        audio is cached in the _audio attribute and in the audio cache.
+        """
+        # The entity may be shared (see utils.identity_utils): download it only once
+        with self._download_lock:
+            future, buffer = self._audio_future, self._audio
+            started = future is None and buffer is None
+            if started:  # Only download if neither cached nor being converted
+                if verbose >= 1:
+                    print(f"...Downloading audio for '{self.title}': {self.url}")
+                buffer = get_audio_cache().get(self.media_id, self.audio_format)
+                if buffer is None:
+                    raw_buffer = self.download_stream(verbose=verbose)
+                    future = self.postprocess_audio(raw_buffer, verbose=verbose)
+                    future.add_done_callback(self._cache_audio)
+                else:
+                    if verbose >= 1:
+                        print(f"......Loaded audio for '{self.title}' from the cache")
+                    future = completed_future(buffer)
+                self._audio_future = future
+            elif future is None:
+                if verbose >= 1:
+                    print(f"Audio for '{self.title}' is already downloaded.")
+                future = completed_future(buffer)
+        # Outside the lock, since spilling other buffers takes their holders' download locks
+        if started:
+            future.add_done_callback(self._finish_audio)
+        elif buffer is not None:
+            get_memory_accountant().touch(buffer)
+        return future
+
+    def download_audio(self, verbose: int = 0) -> BytesIO:
+        """
+        Downloads the audio, waiting for it to be post-processed. Returns the buffer, which
+        callers should use rather than _audio, as the memory accountant may drop _audio.
+        """
+        return self.fetch_audio(verbose=verbose).result()
+
+    def _cache_audio(self, future: "Future[BytesIO]"):
+        if not future.cancelled() and future.exception() is None:
+            get_audio_cache().put(self.media_id, self.audio_format, future.result())
+
+    def _finish_audio(self, future: "Future[BytesIO]"):
+        """Keeps the audio once its future is done, on the transcoder's thread (or the caller's)."""
+        with self._download_lock:
+            if self._audio_future is future:
+                self._audio_future = None
+            if future.cancelled() or future.exception() is not None:
+                return  # Downloaded again on the next call
+            buffer = self._audio = future.result()
+        get_memory_accountant().track(buffer, self._spill_audio)
+
+    def download_stream(self, segmented: bool = YOUTUBE_SEGMENTED_DOWNLOAD, verbose: int = 0) -> BytesIO:
+        """
+        Downloads the raw audio stream. When segmented, the stream is split by its known
+        filesize into byte ranges fetched over several connections, since YouTube throttles
+        each connection. Progress is checkpointed to disk per video and stream, so a retry
+        after an interrupted download resumes instead of starting over; falls back to
+        pytube's sequential stream if that fails.
+        """
+        stream = self.audio_stream
+        if verbose >= 1:
+            print(f"......Streaming {stream.filesize} bytes of audio for '{self.title}'")
+        # Shared with every other YouTube download in the process (see PLATFORM_DOWNLOAD_CONCURRENCY)
+        with get_download_slots("YouTube"):
+            try:
+                return download_resumable(
+                    stream.url,
+                    key=f"youtube:{self.video_id}:{stream.itag}",
+                    size=stream.filesize,
+                    max_connections=SEGMENT_MAX_CONNECTIONS if segmented else 1,
+                )
+            except Exception as e:
+                if verbose >= 1:
+                    print(f"......Resumable download failed for '{self.title}', streaming sequentially: {e}")
+            raw_buffer = BytesIO()
+            stream.stream_to_buffer(raw_buffer)
+        raw_buffer.seek(0)
+        return raw_buffer
+
+    def postprocess_audio(self, raw_buffer: BytesIO, verbose: int = 0) -> "Future[BytesIO]":
+        """
+        Converts the raw stream to the output format along the cheapest correct path:
+        copying it as-is, remuxing it without re-encoding, or transcoding it. Remuxing
+        and transcoding are queued to the shared transcoder; returns a future either way.
+        """
+        source = self.audio_stream.subtype
+        path = get_postprocess_path(self.audio_format, source)
+        start = time.perf_counter()
+        if path == "copy":
+            raw_buffer.seek(0)
+            future = completed_future(raw_buffer)
         else:
+            future = get_transcoder().submit(
+                raw_buffer,
+                self.audio_format,
+                input_format=source,
+                codec="copy" if path == "remux" else None,
+            )
+
+        def _log(future: "Future[BytesIO]"):
+            if future.cancelled() or future.exception() is not None:
+                return
+            POSTPROCESS_LOG.append({
+                "video_id": self.video_id,
+                "source": source,
+                "output_format": self.audio_format,
+                "path": path,
+                "seconds": time.perf_counter() - start,
+            })
             if verbose >= 1:
-                print(f"Audio for '{self.title}' is already downloaded.")
-        return self._audio
+                print(f"......Post-processed '{self.title}' ({source} -> {self.audio_format}): {path}")
+
+        future.add_done_callback(_log)
+        return future
+
+    def release_audio(self):
+        """Drops the downloaded audio buffer to free memory; it is downloaded again if needed."""
+        self._audio = None
+
+    def _spill_audio(self, buffer: BytesIO, load_spilled):
+        """Memory accountant callback: drops the audio, which is reloaded from the audio cache on access."""
+        with self._download_lock:
+            if self._audio is buffer:
+                self.release_audio()
 
 class YouTubePlaylist(Playlist):
     
-    URL_FUNC = lambda url: "youtube.com/playlist?" in url
     ENTITY_TYPE = "playlist"
     
     def __init__(self, url: str):
@@ -100,19 +452,42 @@ class YouTubePlaylist(Playlist):
         self._videos = None
         self.filename = os.path.join(self.title.replace(' ', '_'), '.zip')
         self.audio_zipped = None
-        self.audio = None
+        self.downloaded = False
+        self.download_errors = {}
         self.entity_type = YouTubePlaylist.ENTITY_TYPE
         self.platform = "YouTube"
         self.download_from = "YouTube"
         self.current_batch_size = None
+        self._download_lock = threading.RLock()
+
+    def _extract_videos(self, raw_json: str) -> Tuple[List[str], Optional[str]]:
+        """
+        pytube's extraction of a page of videos, which also shares their title, channel and
+        duration with YouTubeVideo, so that building the videos makes no request per video.
+        """
+        videos_urls, continuation = super()._extract_videos(raw_json)
+        for renderer in _iter_playlist_video_renderers(json.loads(raw_json)):
+            details = get_playlist_video_details(renderer)
+            if details is not None and "videoId" in renderer:
+                # Details already cached (e.g. from the watch page) are kept
+                YOUTUBE_METADATA_CACHE.get_or_call(("details", renderer["videoId"]), lambda: details)
+        return videos_urls, continuation
 
     @property
     def videos(self):
-        """Cache videos to ensure they are not re-instantiated."""
+        """
+        Cache videos to ensure they are not re-instantiated (and share them process-wide).
+        Their details come from the playlist pages, and their streams are only resolved on download.
+        """
         if self._videos is None:
-            self._videos = [YouTubeVideo(url) for url in self.video_urls]
+            self._videos = [get_shared_entity(YouTubeVideo, url) for url in self.video_urls]
         return self._videos
 
+    @property
+    def songs(self) -> List[YouTubeVideo]:
+        """Alias of videos, matching the other playlist classes."""
+        return self.videos
+
     def videos_generator(self):
         for video in self._videos:
             yield video
@@ -132,43 +507,69 @@ class YouTubePlaylist(Playlist):
         self,
         *,
         stqdm: bool = False,
-        verbose: int = 0
-    ) -> bytes:
-        if self.audio is None:  # Ensure we only download once
-            self.audio = []
-            desc = f"Downloading audio for {self.length} videos in '{self.title}' playlist"
-            videos = st_tqdm(self.videos, desc=desc) if stqdm else self.videos
-            for i, video in enumerate(videos):
-                if stqdm:
-                    videos.set_description(f"{i + 1} / {self.length} Downloading: {video.title}")
-                self.audio.append(
-                    video.download_audio(
-                        verbose=verbose
-                    )
+        verbose: int = 0,
+        max_workers: Optional[int] = None,
+        on_progress: Optional[Callable[[int, Optional[int]], None]] = None,
+    ) -> List[YouTubeVideo]:
+        # Also called from the scheduler's background thread: download only once
+        with self._download_lock:
+            if not self.downloaded:  # Ensure we only download once
+                desc = f"Downloading audio for {self.length} videos in '{self.title}' playlist"
+                # Each song stays the only holder of its audio, so it can be spilled
+                _, self.download_errors = download_audio_concurrently(
+                    self.videos,
+                    max_workers=max_workers,
+                    stqdm=stqdm,
+                    desc=desc,
+                    total=self.length,
+                    verbose=verbose,
+                    return_audio=False,
+                    on_progress=on_progress,
+                    # Conversion runs on the shared transcoder while the next songs download
+                    download_func=lambda song: song.fetch_audio(verbose=verbose),
                 )
-        return self.audio
+                self.downloaded = True
+        return self.downloaded_videos
+
+    @property
+    def downloaded_videos(self) -> List[YouTubeVideo]:
+        """Videos of the playlist whose audio was downloaded without errors."""
+        return [video for i, video in enumerate(self.videos) if i not in self.download_errors]
 
     def zip_audio(
         self,
         *,
         batch_size: Optional[int] = None,
         stqdm: bool = False,
-        verbose: int = 0
+        verbose: int = 0,
+        max_workers: Optional[int] = None,
     ) -> BytesIO:
         """Zip audio files of the playlist songs."""
         self.download_audio(
             stqdm=stqdm,
-            verbose=verbose
+            verbose=verbose,
+            max_workers=max_workers,
         )
-        audio_not_yet_zipped = self.audio_zipped is None
-        batch_size_changed = batch_size != self.current_batch_size
-        if audio_not_yet_zipped or batch_size_changed:
-            self.current_batch_size = batch_size
-            desc = f"Zipping audio for {self.length} songs in '{self.title}' playlist"
-            if batch_size:
-                if batch_size < self.length:
-                    desc += f" (batches of {batch_size})"
-                else:
-                    batch_size = None
-            self.audio_zipped = zip_audio_files(self.songs, batch_size=batch_size, stqdm=stqdm, total=self.length)
-        return self.audio_zipped
+        with self._download_lock:
+            audio_not_yet_zipped = self.audio_zipped is None
+            batch_size_changed = batch_size != self.current_batch_size
+            if audio_not_yet_zipped or batch_size_changed:
+                self.current_batch_size = batch_size
+                desc = f"Zipping audio for {self.length} songs in '{self.title}' playlist"
+                if batch_size:
+                    if batch_size < self.length:
+                        desc += f" (batches of {batch_size})"
+                    else:
+                        batch_size = None
+                self.audio_zipped = zip_audio_files(
+                    self.downloaded_videos,
+                    batch_size=batch_size,
+                    stqdm=stqdm,
+                    total=len(self.downloaded_videos),
+                )
+                get_memory_accountant().track_all(self.audio_zipped, self._spill_audio_zipped)
+            return self.audio_zipped
+
+    def _spill_audio_zipped(self, buffer: BytesIO, load_spilled):
+        """Memory accountant callback: swaps the spilled archive for a file with its bytes."""
+        self.audio_zipped = replace_spilled(self.audio_zipped, buffer, load_spilled)
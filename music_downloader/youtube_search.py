@@ -0,0 +1,108 @@
+from typing import Dict, List, Optional, Tuple
+import os
+import logging
+from abc import ABC, abstractmethod
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+import yt_dlp
+from youtubesearchpython import VideosSearch
+
+from utils.cache_utils import ResponseCache
+
+
+YOUTUBE_SEARCH_BACKEND = os.getenv("YOUTUBE_SEARCH_BACKEND", "youtube-search-python")
+YOUTUBE_SEARCH_MAX_WORKERS = int(os.getenv("YOUTUBE_SEARCH_MAX_WORKERS", 8))
+YOUTUBE_SEARCH_CACHE_TTL = 24 * 60 * 60
+
+logger = logging.getLogger(__name__)
+
+class YouTubeSearchBackend(ABC):
+    """Base class for YouTube search backends."""
+
+    @abstractmethod
+    def search(self, query: str, limit: int = 5) -> List[Tuple[str, str]]:
+        """Search YouTube and return (title, url) pairs of the top results, best first."""
+
+class YouTubeSearchPythonBackend(YouTubeSearchBackend):
+    """Searches with youtube-search-python."""
+
+    def search(self, query: str, limit: int = 5) -> List[Tuple[str, str]]:
+        videos = VideosSearch(query, limit=limit).result()['result']
+        return [(video['title'], video['link']) for video in videos]
+
+class YtDlpSearchBackend(YouTubeSearchBackend):
+    """Searches with yt-dlp's ytsearch extractor, without resolving each video's formats."""
+
+    def search(self, query: str, limit: int = 5) -> List[Tuple[str, str]]:
+        ydl_opts = {'quiet': True, 'extract_flat': True, 'skip_download': True}
+        with yt_dlp.YoutubeDL(ydl_opts) as ydl:
+            info = ydl.extract_info(f"ytsearch{limit}:{query}", download=False)
+        return [
+            (entry.get('title'), f"https://www.youtube.com/watch?v={entry['id']}")
+            for entry in info.get('entries') or []
+        ]
+
+SEARCH_BACKENDS = {
+    "youtube-search-python": YouTubeSearchPythonBackend,
+    "yt-dlp": YtDlpSearchBackend,
+}
+
+class YouTubeSearchResolver:
+    """
+    Resolves (song, artist) pairs to YouTube video URLs.
+
+    Searches are memoized (identical in-flight searches are merged), and whole lists
+    of songs are resolved concurrently on a bounded thread pool.
+    """
+
+    def __init__(
+        self,
+        backend: Optional[YouTubeSearchBackend] = None,
+        max_workers: int = YOUTUBE_SEARCH_MAX_WORKERS,
+        cache: Optional[ResponseCache] = None,
+    ):
+        self.backend = backend or SEARCH_BACKENDS[YOUTUBE_SEARCH_BACKEND]()
+        self.max_workers = max_workers
+        self.cache = cache or ResponseCache(ttl=YOUTUBE_SEARCH_CACHE_TTL, max_entries=10_000)
+
+    @staticmethod
+    def get_search_query(song: str, artist: Optional[str] = None) -> str:
+        return f"{song} by {artist} lyrics" if artist else song
+
+    def resolve(self, song: str, artist: Optional[str] = None) -> str:
+        """Search YouTube for the song and artist and return the top video URL."""
+        search_query = self.get_search_query(song, artist)
+        videos = self.cache.get_or_call(search_query, self.backend.search, search_query)
+        if not videos:
+            raise ValueError(f"No YouTube results found for: {search_query}")
+        title, url = videos[0]
+        logger.info("YouTube search %r resolved to %r (%s)", search_query, title, url)
+        return url
+
+    def resolve_many(
+        self,
+        songs: List[Tuple[str, Optional[str]]],
+    ) -> Tuple[List[Optional[str]], Dict[int, Exception]]:
+        """
+        Resolve a list of (song, artist) pairs concurrently.
+
+        Returns:
+        - The video URLs in the same order as songs (None for songs that failed).
+        - A dict mapping the index of every failed song to the exception it raised.
+        """
+        urls, errors = [None] * len(songs), {}
+        if not songs:
+            return urls, errors
+        with ThreadPoolExecutor(max_workers=min(self.max_workers, len(songs))) as executor:
+            futures = [executor.submit(self.resolve, song, artist) for song, artist in songs]
+            for i, future in enumerate(futures):
+                try:
+                    urls[i] = future.result()
+                except Exception as e:
+                    errors[i] = e
+        return urls, errors
+
+@lru_cache(maxsize=None)
+def get_youtube_search_resolver() -> YouTubeSearchResolver:
+    """Returns the process-wide resolver using the YOUTUBE_SEARCH_BACKEND backend."""
+    return YouTubeSearchResolver()
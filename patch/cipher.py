@@ -12,8 +12,15 @@ functions" (2) maps them to Python equivalents and (3) taking the ciphered
 signature and decoding it.
 
 """
+import hashlib
+import json
 import logging
+import os
 import re
+import tempfile
+import threading
+from collections import OrderedDict
+from functools import cached_property
 from itertools import chain
 from typing import Any, Callable, Dict, List, Optional, Tuple
 
@@ -23,55 +30,75 @@ from pytube.parser import find_object_from_startpoint, throttling_array_split
 
 logger = logging.getLogger(__name__)
 
+# Parsed cipher state is cached per player version (identified by the hash of its
+# base.js), in memory and in a small on-disk store shared across restarts
+CIPHER_CACHE_DIR = os.getenv(
+    "PYTUBE_CIPHER_CACHE_DIR",
+    os.path.join(tempfile.gettempdir(), "pytube_cipher_cache"),
+)
+CIPHER_CACHE_MAX_ENTRIES = int(os.getenv("PYTUBE_CIPHER_CACHE_MAX_ENTRIES", 8))
+# Bump when the format of the cached state changes, to ignore older entries
+CIPHER_CACHE_VERSION = 1
+# Number of calculated n values memoized per player version
+N_MEMO_MAX_ENTRIES = int(os.getenv("PYTUBE_N_MEMO_MAX_ENTRIES", 1024))
+
+
+# Patterns of the calls in the transform plan, e.g. ``DE.AJ(a,15)``
+JS_FUNC_PATTERNS = (
+    re.compile(r"\w+\.(\w+)\(\w,(\d+)\)"),
+    re.compile(r"\w+\[(\"\w+\")\]\(\w,(\d+)\)"),
+)
+
+
+@cache
+def parse_function(js_func: str) -> Tuple[str, int]:
+    """Parse the Javascript transform function.
+
+    Break a JavaScript transform function down into a two element ``tuple``
+    containing the function name and some integer-based argument.
+
+    :param str js_func:
+        The JavaScript version of the transform function.
+    :rtype: tuple
+    :returns:
+        two element tuple containing the function name and an argument.
+
+    **Example**:
+
+    parse_function('DE.AJ(a,15)')
+    ('AJ', 15)
+
+    """
+    logger.debug("parsing transform function")
+    for regex in JS_FUNC_PATTERNS:
+        parse_match = regex.search(js_func)
+        if parse_match:
+            fn_name, fn_arg = parse_match.groups()
+            return fn_name, int(fn_arg)
+
+    raise RegexMatchError(
+        caller="parse_function", pattern="js_func_patterns"
+    )
+
 
 class Cipher:
     def __init__(self, js: str):
-        self.transform_plan: List[str] = get_transform_plan(js)
-        var_regex = re.compile(r"^\w+\W")
-        var_match = var_regex.search(self.transform_plan[0])
-        if not var_match:
-            raise RegexMatchError(
-                caller="__init__", pattern=var_regex.pattern
-            )
-        var = var_match.group(0)[:-1]
-        self.transform_map = get_transform_map(js, var)
-        self.js_func_patterns = [
-            r"\w+\.(\w+)\(\w,(\d+)\)",
-            r"\w+\[(\"\w+\")\]\(\w,(\d+)\)"
-        ]
-
-        self.throttling_plan = get_throttling_plan(js)
-        self.throttling_array = get_throttling_function_array(js)
-
-        self.calculated_n = None
-
-    def calculate_n(self, initial_n: list):
-        """Converts n to the correct value to prevent throttling."""
-        if self.calculated_n:
-            return self.calculated_n
-
-        # First, update all instances of 'b' with the list(initial_n)
-        for i in range(len(self.throttling_array)):
-            if self.throttling_array[i] == 'b':
-                self.throttling_array[i] = initial_n
-
-        for step in self.throttling_plan:
-            curr_func = self.throttling_array[int(step[0])]
-            if not callable(curr_func):
-                logger.debug(f'{curr_func} is not callable.')
-                logger.debug(f'Throttling array:\n{self.throttling_array}\n')
-                raise ExtractError(f'{curr_func} is not callable.')
+        state = get_cipher_state(js)
+        self.transform_plan: List[str] = list(state["transform_plan"])
+        self.transform_map = dict(state["transform_map"])
+        self.js_func_patterns = [regex.pattern for regex in JS_FUNC_PATTERNS]
 
-            first_arg = self.throttling_array[int(step[1])]
+        self.throttling_plan = state["throttling_plan"]
+        # Shared between every Cipher of the same player; never modified
+        self.throttling_array = state["throttling_array"]
+        self.throttling_program: ThrottlingProgram = state["throttling_program"]
 
-            if len(step) == 2:
-                curr_func(first_arg)
-            elif len(step) == 3:
-                second_arg = self.throttling_array[int(step[2])]
-                curr_func(first_arg, second_arg)
+    def calculate_n(self, initial_n: list) -> str:
+        """Converts n to the correct value to prevent throttling.
 
-        self.calculated_n = ''.join(initial_n)
-        return self.calculated_n
+        Safe to call concurrently; results are memoized per n.
+        """
+        return self.throttling_program.calculate("".join(initial_n))
 
     def get_signature(self, ciphered_signature: str) -> str:
         """Decipher the signature.
@@ -87,7 +114,7 @@ class Cipher:
         signature = list(ciphered_signature)
 
         for js_func in self.transform_plan:
-            name, argument = self.parse_function(js_func)  # type: ignore
+            name, argument = parse_function(js_func)
             signature = self.transform_map[name](signature, argument)
             logger.debug(
                 "applied transform function\n"
@@ -103,37 +130,517 @@ class Cipher:
 
         return "".join(signature)
 
-    @cache
-    def parse_function(self, js_func: str) -> Tuple[str, int]:
-        """Parse the Javascript transform function.
+    # Kept for compatibility; parsed functions are cached module-wide
+    parse_function = staticmethod(parse_function)
 
-        Break a JavaScript transform function down into a two element ``tuple``
-        containing the function name and some integer-based argument.
 
-        :param str js_func:
-            The JavaScript version of the transform function.
-        :rtype: tuple
-        :returns:
-            two element tuple containing the function name and an argument.
+def parse_cipher_state(js: str) -> Dict[str, Any]:
+    """Run the full extraction pipeline over base.js.
+
+    :param str js:
+        The contents of the base.js asset file.
+    :rtype: dict
+    :returns:
+        The transform plan and map, and the throttling plan, array and
+        compiled program.
+    """
+    parser = BaseJsParser(js)
+    throttling_plan = parser.throttling_plan
+    throttling_array = parser.throttling_array
+    return {
+        "transform_plan": parser.transform_plan,
+        "transform_map": parser.transform_map,
+        "throttling_plan": throttling_plan,
+        "throttling_array": throttling_array,
+        "throttling_program": ThrottlingProgram(throttling_plan, throttling_array),
+    }
+
 
-        **Example**:
+class BaseJsParser:
+    """Extracts the cipher objects from base.js, scanning it as little as possible.
 
-        parse_function('DE.AJ(a,15)')
-        ('AJ', 15)
+    Each intermediate result (function names, the throttling function code,
+    the transform object) is computed once and shared by everything that needs
+    it. Most signature function patterns have no literal prefix, so searching
+    base.js for them is slow; instead the sites of the literal "anchor" each
+    one contains (e.g. ``.set(`` calls) are indexed with fast searches, and the
+    pattern is only tried at the few positions where a match could start.
+    Results are identical to searching the whole file with each pattern.
+    """
 
+    def __init__(self, js: str):
+        self.js = js
+        self._anchor_sites: Dict[str, List[int]] = {}
+
+    def get_anchor_sites(self, anchor: str) -> List[int]:
+        """Start positions of the given signature function anchor in base.js."""
+        sites = self._anchor_sites.get(anchor)
+        if sites is None:
+            regex = SIGNATURE_FUNCTION_ANCHORS[anchor]
+            sites = self._anchor_sites[anchor] = [
+                match.start() for match in regex.finditer(self.js)
+            ]
+        return sites
+
+    def get_match_window_start(self, anchor_start: int) -> int:
+        """First position a signature function match around an anchor can start at.
+
+        Matches start at most one character before the identifier, ``=`` and
+        whitespace that precede their anchor.
         """
-        logger.debug("parsing transform function")
-        for pattern in self.js_func_patterns:
-            regex = re.compile(pattern)
-            parse_match = regex.search(js_func)
-            if parse_match:
-                fn_name, fn_arg = parse_match.groups()
-                return fn_name, int(fn_arg)
+        js = self.js
+        i = anchor_start
+        while i > 0 and js[i - 1].isspace():
+            i -= 1
+        if i > 0 and js[i - 1] == "=":
+            i -= 1
+            while i > 0 and js[i - 1].isspace():
+                i -= 1
+        while i > 0 and (js[i - 1].isalnum() or js[i - 1] == "$"):
+            i -= 1
+        return max(i - 1, 0)
+
+    @cached_property
+    def initial_function_name(self) -> str:
+        """Name of the function responsible for computing the signature."""
+        logger.debug("finding initial function name")
+        for regex, anchor in SIGNATURE_FUNCTION_PATTERNS:
+            for anchor_start in self.get_anchor_sites(anchor):
+                for pos in range(self.get_match_window_start(anchor_start), anchor_start + 1):
+                    function_match = regex.match(self.js, pos)
+                    if function_match:
+                        logger.debug("finished regex search, matched: %s", regex.pattern)
+                        return function_match.group(1)
 
         raise RegexMatchError(
-            caller="parse_function", pattern="js_func_patterns"
+            caller="get_initial_function_name", pattern="multiple"
         )
 
+    @cached_property
+    def transform_plan(self) -> List[str]:
+        name = re.escape(self.initial_function_name)
+        pattern = r"%s=function\(\w\){[a-z=\.\(\"\)]*;(.*);(?:.+)}" % name
+        logger.debug("getting transform plan")
+        return regex_search(pattern, self.js, group=1).split(";")
+
+    @cached_property
+    def transform_var(self) -> str:
+        """Name of the object holding the transform functions, e.g. ``DE``."""
+        var_match = TRANSFORM_VAR_REGEX.search(self.transform_plan[0])
+        if not var_match:
+            raise RegexMatchError(
+                caller="parse_cipher_state", pattern=TRANSFORM_VAR_REGEX.pattern
+            )
+        return var_match.group(0)[:-1]
+
+    def get_transform_object(self, var: str) -> List[str]:
+        pattern = r"var %s={(.*?)};" % re.escape(var)
+        logger.debug("getting transform object")
+        regex = re.compile(pattern, flags=re.DOTALL)
+        transform_match = regex.search(self.js)
+        if not transform_match:
+            raise RegexMatchError(caller="get_transform_object", pattern=pattern)
+
+        return transform_match.group(1).replace("\n", " ").split(", ")
+
+    def get_transform_map(self, var: str) -> Dict:
+        mapper = {}
+        for obj in self.get_transform_object(var):
+            # AJ:function(a){a.reverse()} => AJ, function(a){a.reverse()}
+            name, function = obj.split(":", 1)
+            mapper[name] = map_functions(function)
+        return mapper
+
+    @cached_property
+    def transform_map(self) -> Dict:
+        return self.get_transform_map(self.transform_var)
+
+    @cached_property
+    def throttling_function_code(self) -> str:
+        """Raw code of the throttling function, shared by its plan and array."""
+        # Looked up at call time, as it may be patched (see patch.pytube_patch_oo)
+        name = re.escape(get_throttling_function_name(self.js))
+
+        # Identify where the function is defined
+        pattern_start = r"%s=function\(\w\)" % name
+        regex = re.compile(pattern_start)
+        match = regex.search(self.js)
+
+        # Extract the code within curly braces for the function itself, and merge any split lines
+        code_lines_list = find_object_from_startpoint(self.js, match.span()[1]).split('\n')
+        joined_lines = "".join(code_lines_list)
+
+        # Prepend function definition (e.g. `Dea=function(a)`)
+        return match.group(0) + joined_lines
+
+    @cached_property
+    def throttling_array(self) -> List[Any]:
+        raw_code = self.throttling_function_code
+        match = THROTTLING_ARRAY_START_REGEX.search(raw_code)
+
+        array_raw = find_object_from_startpoint(raw_code, match.span()[1] - 1)
+        str_array = throttling_array_split(array_raw)
+
+        converted_array = []
+        for el in str_array:
+            try:
+                converted_array.append(int(el))
+                continue
+            except ValueError:
+                # Not an integer value.
+                pass
+
+            if el == 'null':
+                converted_array.append(None)
+                continue
+
+            if el.startswith('"') and el.endswith('"'):
+                # Convert e.g. '"abcdef"' to string without quotation marks, 'abcdef'
+                converted_array.append(el[1:-1])
+                continue
+
+            if el.startswith('function'):
+                found = False
+                for regex, fn in THROTTLING_FUNCTION_MAPPER:
+                    if regex.search(el):
+                        converted_array.append(fn)
+                        found = True
+                if found:
+                    continue
+
+            converted_array.append(el)
+
+        # Replace null elements with array itself
+        for i in range(len(converted_array)):
+            if converted_array[i] is None:
+                converted_array[i] = converted_array
+
+        return converted_array
+
+    @cached_property
+    def throttling_plan(self) -> List[Tuple[str, ...]]:
+        raw_code = self.throttling_function_code
+        match = THROTTLING_PLAN_START_REGEX.search(raw_code)
+
+        transform_plan_raw = find_object_from_startpoint(raw_code, match.span()[1] - 1)
+
+        # Steps are either c[x](c[y]) or c[x](c[y],c[z])
+        transform_steps = []
+        for match in THROTTLING_STEP_REGEX.findall(transform_plan_raw):
+            if match[4] != '':
+                transform_steps.append((match[0],match[1],match[4]))
+            else:
+                transform_steps.append((match[0],match[1]))
+
+        return transform_steps
+
+
+class ThrottlingProgram:
+    """The throttling plan compiled against its throttling array.
+
+    Steps are tuples of integer indices into the array, and the array is kept
+    as an immutable template. Each run works on a fresh copy of the template,
+    with its self-references and its ``'b'`` entries (the n being computed)
+    filled in, so runs never interfere with each other and the program can be
+    shared between threads. Results are memoized in a bounded LRU keyed by n.
+    """
+
+    def __init__(
+        self,
+        throttling_plan: List[Tuple[str, ...]],
+        throttling_array: List[Any],
+        memo_max_entries: int = N_MEMO_MAX_ENTRIES,
+    ):
+        self.steps: Tuple[Tuple[int, ...], ...] = tuple(
+            tuple(int(index) for index in step) for step in throttling_plan
+        )
+        self.self_indices = tuple(
+            i for i, el in enumerate(throttling_array) if el is throttling_array
+        )
+        self.b_indices = tuple(
+            i for i, el in enumerate(throttling_array)
+            if isinstance(el, str) and el == "b"
+        )
+        self.template: Tuple[Any, ...] = tuple(
+            None if el is throttling_array else el for el in throttling_array
+        )
+        self.memo_max_entries = memo_max_entries
+        self._memo: "OrderedDict[str, str]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def new_working_array(self, n: List[str]) -> List[Any]:
+        """Return a fresh copy of the array for computing n (modified in place)."""
+        array = list(self.template)
+        for i in self.self_indices:
+            array[i] = array
+        for i in self.b_indices:
+            array[i] = n
+        return array
+
+    def run(self, initial_n: str) -> str:
+        """Compute the throttling parameter for initial_n, without memoization."""
+        n = list(initial_n)
+        array = self.new_working_array(n)
+        for step in self.steps:
+            curr_func = array[step[0]]
+            if not callable(curr_func):
+                logger.debug(f'{curr_func} is not callable.')
+                logger.debug(f'Throttling array:\n{array}\n')
+                raise ExtractError(f'{curr_func} is not callable.')
+            if len(step) == 2:
+                curr_func(array[step[1]])
+            else:
+                curr_func(array[step[1]], array[step[2]])
+        return "".join(n)
+
+    def calculate(self, initial_n: str) -> str:
+        """Compute the throttling parameter for initial_n, memoized."""
+        with self._lock:
+            if initial_n in self._memo:
+                self._memo.move_to_end(initial_n)
+                return self._memo[initial_n]
+        result = self.run(initial_n)
+        with self._lock:
+            self._memo[initial_n] = result
+            while len(self._memo) > self.memo_max_entries:
+                self._memo.popitem(last=False)
+        return result
+
+
+class CipherStateCache:
+    """Cache of parsed cipher state by player version.
+
+    Entries are keyed by the SHA-1 of base.js, so a new player version is a
+    new key and stale entries simply age out. The most recent entries are kept
+    in memory, and written to ``cache_dir`` as JSON, with transform functions
+    stored by name, so that they survive restarts.
+    """
+
+    def __init__(
+        self,
+        cache_dir: Optional[str] = CIPHER_CACHE_DIR,
+        max_entries: int = CIPHER_CACHE_MAX_ENTRIES,
+    ):
+        self.cache_dir = cache_dir
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        # base.js is usually the same string object for every video (see
+        # pytube.__js__), so its hash is remembered to avoid rehashing it
+        self._last_js: Optional[str] = None
+        self._last_key: Optional[str] = None
+        self.hits = 0
+        self.misses = 0
+
+    def get_key(self, js: str) -> str:
+        with self._lock:
+            if js is self._last_js:
+                return self._last_key
+        key = hashlib.sha1(js.encode("utf-8")).hexdigest()
+        with self._lock:
+            self._last_js, self._last_key = js, key
+        return key
+
+    def get(self, js: str) -> Dict[str, Any]:
+        """Return the parsed state for base.js, parsing it only on a miss."""
+        key = self.get_key(js)
+        with self._lock:
+            state = self._entries.get(key)
+            if state is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return state
+        state = self._load(key)
+        if state is None:
+            logger.debug("cipher cache miss, parsing base.js")
+            state = parse_cipher_state(js)
+            self._save(key, state)
+            with self._lock:
+                self.misses += 1
+        else:
+            with self._lock:
+                self.hits += 1
+        with self._lock:
+            self._entries[key] = state
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return state
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._last_js = self._last_key = None
+        if self.cache_dir and os.path.isdir(self.cache_dir):
+            for name in os.listdir(self.cache_dir):
+                if name.endswith(".json"):
+                    _remove_quietly(os.path.join(self.cache_dir, name))
+
+    def _get_path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, f"{key}.json")
+
+    def _load(self, key: str) -> Optional[Dict[str, Any]]:
+        if not self.cache_dir:
+            return None
+        try:
+            with open(self._get_path(key), "r", encoding="utf-8") as f:
+                data = json.load(f)
+            if data.get("version") != CIPHER_CACHE_VERSION:
+                return None
+            return deserialize_cipher_state(data["state"])
+        except (OSError, ValueError, KeyError, TypeError):
+            return None
+
+    def _save(self, key: str, state: Dict[str, Any]):
+        if not self.cache_dir:
+            return
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            path = self._get_path(key)
+            tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump({"version": CIPHER_CACHE_VERSION, "state": serialize_cipher_state(state)}, f)
+            os.replace(tmp_path, path)
+            # Keep only the most recent player versions on disk
+            entries = sorted(
+                (entry for entry in os.scandir(self.cache_dir) if entry.name.endswith(".json")),
+                key=lambda entry: entry.stat().st_mtime,
+                reverse=True,
+            )
+            for entry in entries[self.max_entries:]:
+                _remove_quietly(entry.path)
+        except (OSError, TypeError, ValueError) as e:
+            logger.debug("could not persist cipher state: %s", e)
+
+
+def _remove_quietly(path: str):
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+
+
+def serialize_cipher_state(state: Dict[str, Any]) -> Dict[str, Any]:
+    """Convert parsed cipher state to JSON-compatible data.
+
+    Functions are stored by name, and self-references of the throttling array
+    as ``{"self": true}``.
+    """
+    def serialize_element(el: Any) -> Any:
+        if el is state["throttling_array"]:
+            return {"self": True}
+        if callable(el):
+            return {"function": el.__name__}
+        if isinstance(el, (int, str)):
+            return el
+        raise TypeError(f"cannot serialize throttling array element {el!r}")
+
+    return {
+        "transform_plan": state["transform_plan"],
+        "transform_map": {name: fn.__name__ for name, fn in state["transform_map"].items()},
+        "throttling_plan": [list(step) for step in state["throttling_plan"]],
+        "throttling_array": [serialize_element(el) for el in state["throttling_array"]],
+    }
+
+
+def deserialize_cipher_state(data: Dict[str, Any]) -> Dict[str, Any]:
+    """Rebuild parsed cipher state from ``serialize_cipher_state`` output."""
+    functions = get_serializable_functions()
+    throttling_array: List[Any] = []
+    for el in data["throttling_array"]:
+        if isinstance(el, dict) and el.get("self"):
+            throttling_array.append(throttling_array)
+        elif isinstance(el, dict):
+            throttling_array.append(functions[el["function"]])
+        else:
+            throttling_array.append(el)
+    throttling_plan = [tuple(step) for step in data["throttling_plan"]]
+    return {
+        "transform_plan": list(data["transform_plan"]),
+        "transform_map": {name: functions[fn] for name, fn in data["transform_map"].items()},
+        "throttling_plan": throttling_plan,
+        "throttling_array": throttling_array,
+        "throttling_program": ThrottlingProgram(throttling_plan, throttling_array),
+    }
+
+
+def get_serializable_functions() -> Dict[str, Callable]:
+    """Functions that may appear in parsed cipher state, by name."""
+    return {
+        fn.__name__: fn
+        for fn in (
+            reverse, splice, swap,
+            throttling_reverse, throttling_push, throttling_unshift,
+            throttling_cipher_function, throttling_nested_splice,
+            throttling_prepend, throttling_swap, js_splice,
+        )
+    }
+
+
+_cipher_state_cache: Optional[CipherStateCache] = None
+_cipher_state_cache_lock = threading.Lock()
+
+
+def get_cipher_state_cache() -> CipherStateCache:
+    """Return the process-wide cipher state cache."""
+    global _cipher_state_cache
+    with _cipher_state_cache_lock:
+        if _cipher_state_cache is None:
+            _cipher_state_cache = CipherStateCache()
+        return _cipher_state_cache
+
+
+def get_cipher_state(js: str) -> Dict[str, Any]:
+    """Return the parsed cipher state of base.js, from the cache if possible.
+
+    The returned state is shared and must not be modified.
+    """
+    return get_cipher_state_cache().get(js)
+
+
+# Patterns for the name of the signature function, in order of preference,
+# each with the anchor it contains (see BaseJsParser)
+SIGNATURE_FUNCTION_PATTERNS = tuple(
+    (re.compile(pattern), anchor)
+    for pattern, anchor in (
+        (r"\b[cs]\s*&&\s*[adf]\.set\([^,]+\s*,\s*encodeURIComponent\s*\(\s*(?P<sig>[a-zA-Z0-9$]+)\(", "set"),  # noqa: E501
+        (r"\b[a-zA-Z0-9]+\s*&&\s*[a-zA-Z0-9]+\.set\([^,]+\s*,\s*encodeURIComponent\s*\(\s*(?P<sig>[a-zA-Z0-9$]+)\(", "set"),  # noqa: E501
+        (r'(?:\b|[^a-zA-Z0-9$])(?P<sig>[a-zA-Z0-9$]{2})\s*=\s*function\(\s*a\s*\)\s*{\s*a\s*=\s*a\.split\(\s*""\s*\)', "split"),  # noqa: E501
+        (r'(?P<sig>[a-zA-Z0-9$]+)\s*=\s*function\(\s*a\s*\)\s*{\s*a\s*=\s*a\.split\(\s*""\s*\)', "split"),  # noqa: E501
+        (r'(["\'])signature\1\s*,\s*(?P<sig>[a-zA-Z0-9$]+)\(', "signature"),
+        (r"\.sig\|\|(?P<sig>[a-zA-Z0-9$]+)\(", "sig"),
+        (r"yt\.akamaized\.net/\)\s*\|\|\s*.*?\s*[cs]\s*&&\s*[adf]\.set\([^,]+\s*,\s*(?:encodeURIComponent\s*\()?\s*(?P<sig>[a-zA-Z0-9$]+)\(", "akamaized"),  # noqa: E501
+        (r"\b[cs]\s*&&\s*[adf]\.set\([^,]+\s*,\s*(?P<sig>[a-zA-Z0-9$]+)\(", "set"),  # noqa: E501
+        (r"\b[a-zA-Z0-9]+\s*&&\s*[a-zA-Z0-9]+\.set\([^,]+\s*,\s*(?P<sig>[a-zA-Z0-9$]+)\(", "set"),  # noqa: E501
+        (r"\bc\s*&&\s*a\.set\([^,]+\s*,\s*\([^)]*\)\s*\(\s*(?P<sig>[a-zA-Z0-9$]+)\(", "set"),  # noqa: E501
+        (r"\bc\s*&&\s*[a-zA-Z0-9]+\.set\([^,]+\s*,\s*\([^)]*\)\s*\(\s*(?P<sig>[a-zA-Z0-9$]+)\(", "set"),  # noqa: E501
+    )
+)
+# Literal-prefixed patterns that are fast to search for. Matching them in one
+# alternation is much slower, as it defeats the literal prefix search.
+SIGNATURE_FUNCTION_ANCHORS = {
+    "set": re.compile(r"&&\s*[a-zA-Z0-9]+\.set\("),
+    "split": re.compile(r'function\(\s*a\s*\)\s*{\s*a\s*=\s*a\.split\(\s*""\s*\)'),
+    "signature": re.compile(r"signature"),
+    "sig": re.compile(r"\.sig\|\|"),
+    "akamaized": re.compile(r"yt\.akamaized\.net/\)"),
+}
+TRANSFORM_VAR_REGEX = re.compile(r"^\w+\W")
+THROTTLING_FUNCTION_NAME_PATTERNS = (
+    # https://github.com/ytdl-org/youtube-dl/issues/29326#issuecomment-865985377
+    # https://github.com/yt-dlp/yt-dlp/commit/48416bc4a8f1d5ff07d5977659cb8ece7640dcd8
+    # var Bpa = [iha];
+    # ...
+    # a.C && (b = a.get("n")) && (b = Bpa[0](b), a.set("n", b),
+    # Bpa.length || iha("")) }};
+    # In the above case, `iha` is the relevant function name
+    re.compile(r'a\.[a-zA-Z]\s*&&\s*\([a-z]\s*=\s*a\.get\("n"\)\)\s*&&.*?\|\|\s*([a-z]+)'),
+    re.compile(r'\([a-z]\s*=\s*([a-zA-Z0-9$]+)(\[\d+\])\([a-z]\)'),
+)
+THROTTLING_ARRAY_START_REGEX = re.compile(r",c=\[")
+THROTTLING_PLAN_START_REGEX = re.compile(r"try{")
+THROTTLING_STEP_REGEX = re.compile(r"c\[(\d+)\]\(c\[(\d+)\](,c(\[(\d+)\]))?\)")
+
 
 def get_initial_function_name(js: str) -> str:
     """Extract the name of the function responsible for computing the signature.
@@ -143,32 +650,7 @@ def get_initial_function_name(js: str) -> str:
     :returns:
         Function name from regex match
     """
-
-    function_patterns = [
-        r"\b[cs]\s*&&\s*[adf]\.set\([^,]+\s*,\s*encodeURIComponent\s*\(\s*(?P<sig>[a-zA-Z0-9$]+)\(",  # noqa: E501
-        r"\b[a-zA-Z0-9]+\s*&&\s*[a-zA-Z0-9]+\.set\([^,]+\s*,\s*encodeURIComponent\s*\(\s*(?P<sig>[a-zA-Z0-9$]+)\(",  # noqa: E501
-        r'(?:\b|[^a-zA-Z0-9$])(?P<sig>[a-zA-Z0-9$]{2})\s*=\s*function\(\s*a\s*\)\s*{\s*a\s*=\s*a\.split\(\s*""\s*\)',  # noqa: E501
-        r'(?P<sig>[a-zA-Z0-9$]+)\s*=\s*function\(\s*a\s*\)\s*{\s*a\s*=\s*a\.split\(\s*""\s*\)',  # noqa: E501
-        r'(["\'])signature\1\s*,\s*(?P<sig>[a-zA-Z0-9$]+)\(',
-        r"\.sig\|\|(?P<sig>[a-zA-Z0-9$]+)\(",
-        r"yt\.akamaized\.net/\)\s*\|\|\s*.*?\s*[cs]\s*&&\s*[adf]\.set\([^,]+\s*,\s*(?:encodeURIComponent\s*\()?\s*(?P<sig>[a-zA-Z0-9$]+)\(",  # noqa: E501
-        r"\b[cs]\s*&&\s*[adf]\.set\([^,]+\s*,\s*(?P<sig>[a-zA-Z0-9$]+)\(",  # noqa: E501
-        r"\b[a-zA-Z0-9]+\s*&&\s*[a-zA-Z0-9]+\.set\([^,]+\s*,\s*(?P<sig>[a-zA-Z0-9$]+)\(",  # noqa: E501
-        r"\bc\s*&&\s*a\.set\([^,]+\s*,\s*\([^)]*\)\s*\(\s*(?P<sig>[a-zA-Z0-9$]+)\(",  # noqa: E501
-        r"\bc\s*&&\s*[a-zA-Z0-9]+\.set\([^,]+\s*,\s*\([^)]*\)\s*\(\s*(?P<sig>[a-zA-Z0-9$]+)\(",  # noqa: E501
-        r"\bc\s*&&\s*[a-zA-Z0-9]+\.set\([^,]+\s*,\s*\([^)]*\)\s*\(\s*(?P<sig>[a-zA-Z0-9$]+)\(",  # noqa: E501
-    ]
-    logger.debug("finding initial function name")
-    for pattern in function_patterns:
-        regex = re.compile(pattern)
-        function_match = regex.search(js)
-        if function_match:
-            logger.debug("finished regex search, matched: %s", pattern)
-            return function_match.group(1)
-
-    raise RegexMatchError(
-        caller="get_initial_function_name", pattern="multiple"
-    )
+    return BaseJsParser(js).initial_function_name
 
 
 def get_transform_plan(js: str) -> List[str]:
@@ -191,10 +673,7 @@ def get_transform_plan(js: str) -> List[str]:
     'DE.VR(a,3)',
     'DE.kT(a,21)']
     """
-    name = re.escape(get_initial_function_name(js))
-    pattern = r"%s=function\(\w\){[a-z=\.\(\"\)]*;(.*);(?:.+)}" % name
-    logger.debug("getting transform plan")
-    return regex_search(pattern, js, group=1).split(";")
+    return BaseJsParser(js).transform_plan
 
 
 def get_transform_object(js: str, var: str) -> List[str]:
@@ -219,14 +698,7 @@ def get_transform_object(js: str, var: str) -> List[str]:
     'kT:function(a,b){var c=a[0];a[0]=a[b%a.length];a[b]=c}']
 
     """
-    pattern = r"var %s={(.*?)};" % re.escape(var)
-    logger.debug("getting transform object")
-    regex = re.compile(pattern, flags=re.DOTALL)
-    transform_match = regex.search(js)
-    if not transform_match:
-        raise RegexMatchError(caller="get_transform_object", pattern=pattern)
-
-    return transform_match.group(1).replace("\n", " ").split(", ")
+    return BaseJsParser(js).get_transform_object(var)
 
 
 def get_transform_map(js: str, var: str) -> Dict:
@@ -242,14 +714,7 @@ def get_transform_map(js: str, var: str) -> Dict:
         that descrambles the signature.
 
     """
-    transform_object = get_transform_object(js, var)
-    mapper = {}
-    for obj in transform_object:
-        # AJ:function(a){a.reverse()} => AJ, function(a){a.reverse()}
-        name, function = obj.split(":", 1)
-        fn = map_functions(function)
-        mapper[name] = fn
-    return mapper
+    return BaseJsParser(js).get_transform_map(var)
 
 
 def get_throttling_function_name(js: str) -> str:
@@ -261,23 +726,11 @@ def get_throttling_function_name(js: str) -> str:
     :returns:
         The name of the function used to compute the throttling parameter.
     """
-    function_patterns = [
-        # https://github.com/ytdl-org/youtube-dl/issues/29326#issuecomment-865985377
-        # https://github.com/yt-dlp/yt-dlp/commit/48416bc4a8f1d5ff07d5977659cb8ece7640dcd8
-        # var Bpa = [iha];
-        # ...
-        # a.C && (b = a.get("n")) && (b = Bpa[0](b), a.set("n", b),
-        # Bpa.length || iha("")) }};
-        # In the above case, `iha` is the relevant function name
-        r'a\.[a-zA-Z]\s*&&\s*\([a-z]\s*=\s*a\.get\("n"\)\)\s*&&.*?\|\|\s*([a-z]+)',
-        r'\([a-z]\s*=\s*([a-zA-Z0-9$]+)(\[\d+\])\([a-z]\)'
-    ]
     logger.debug('Finding throttling function name')
-    for pattern in function_patterns:
-        regex = re.compile(pattern)
+    for regex in THROTTLING_FUNCTION_NAME_PATTERNS:
         function_match = regex.search(js)
         if function_match:
-            logger.debug("finished regex search, matched: %s", pattern)
+            logger.debug("finished regex search, matched: %s", regex.pattern)
             if len(function_match.groups()) == 1:
                 return function_match.group(1)
             idx = function_match.group(2)
@@ -307,20 +760,7 @@ def get_throttling_function_code(js: str) -> str:
     :returns:
         The name of the function used to compute the throttling parameter.
     """
-    # Begin by extracting the correct function name
-    name = re.escape(get_throttling_function_name(js))
-
-    # Identify where the function is defined
-    pattern_start = r"%s=function\(\w\)" % name
-    regex = re.compile(pattern_start)
-    match = regex.search(js)
-
-    # Extract the code within curly braces for the function itself, and merge any split lines
-    code_lines_list = find_object_from_startpoint(js, match.span()[1]).split('\n')
-    joined_lines = "".join(code_lines_list)
-
-    # Prepend function definition (e.g. `Dea=function(a)`)
-    return match.group(0) + joined_lines
+    return BaseJsParser(js).throttling_function_code
 
 
 def get_throttling_function_array(js: str) -> List[Any]:
@@ -331,62 +771,7 @@ def get_throttling_function_array(js: str) -> List[Any]:
     :returns:
         The array of various integers, arrays, and functions.
     """
-    raw_code = get_throttling_function_code(js)
-
-    array_start = r",c=\["
-    array_regex = re.compile(array_start)
-    match = array_regex.search(raw_code)
-
-    array_raw = find_object_from_startpoint(raw_code, match.span()[1] - 1)
-    str_array = throttling_array_split(array_raw)
-
-    converted_array = []
-    for el in str_array:
-        try:
-            converted_array.append(int(el))
-            continue
-        except ValueError:
-            # Not an integer value.
-            pass
-
-        if el == 'null':
-            converted_array.append(None)
-            continue
-
-        if el.startswith('"') and el.endswith('"'):
-            # Convert e.g. '"abcdef"' to string without quotation marks, 'abcdef'
-            converted_array.append(el[1:-1])
-            continue
-
-        if el.startswith('function'):
-            mapper = (
-                (r"{for\(\w=\(\w%\w\.length\+\w\.length\)%\w\.length;\w--;\)\w\.unshift\(\w.pop\(\)\)}", throttling_unshift),  # noqa:E501
-                (r"{\w\.reverse\(\)}", throttling_reverse),
-                (r"{\w\.push\(\w\)}", throttling_push),
-                (r";var\s\w=\w\[0\];\w\[0\]=\w\[\w\];\w\[\w\]=\w}", throttling_swap),
-                (r"case\s\d+", throttling_cipher_function),
-                (r"\w\.splice\(0,1,\w\.splice\(\w,1,\w\[0\]\)\[0\]\)", throttling_nested_splice),  # noqa:E501
-                (r";\w\.splice\(\w,1\)}", js_splice),
-                (r"\w\.splice\(-\w\)\.reverse\(\)\.forEach\(function\(\w\){\w\.unshift\(\w\)}\)", throttling_prepend),  # noqa:E501
-                (r"for\(var \w=\w\.length;\w;\)\w\.push\(\w\.splice\(--\w,1\)\[0\]\)}", throttling_reverse),  # noqa:E501
-            )
-
-            found = False
-            for pattern, fn in mapper:
-                if re.search(pattern, el):
-                    converted_array.append(fn)
-                    found = True
-            if found:
-                continue
-
-        converted_array.append(el)
-
-    # Replace null elements with array itself
-    for i in range(len(converted_array)):
-        if converted_array[i] is None:
-            converted_array[i] = converted_array
-
-    return converted_array
+    return BaseJsParser(js).throttling_array
 
 
 def get_throttling_plan(js: str):
@@ -402,26 +787,7 @@ def get_throttling_plan(js: str):
     :returns:
         The full function code for computing the throttlign parameter.
     """
-    raw_code = get_throttling_function_code(js)
-
-    transform_start = r"try{"
-    plan_regex = re.compile(transform_start)
-    match = plan_regex.search(raw_code)
-
-    transform_plan_raw = find_object_from_startpoint(raw_code, match.span()[1] - 1)
-
-    # Steps are either c[x](c[y]) or c[x](c[y],c[z])
-    step_start = r"c\[(\d+)\]\(c\[(\d+)\](,c(\[(\d+)\]))?\)"
-    step_regex = re.compile(step_start)
-    matches = step_regex.findall(transform_plan_raw)
-    transform_steps = []
-    for match in matches:
-        if match[4] != '':
-            transform_steps.append((match[0],match[1],match[4]))
-        else:
-            transform_steps.append((match[0],match[1]))
-
-    return transform_steps
+    return BaseJsParser(js).throttling_plan
 
 
 def reverse(arr: List, _: Optional[Any]):
@@ -660,24 +1026,29 @@ def js_splice(arr: list, start: int, delete_count=None, *items):
 
     deleted_elements = arr[start:start + delete_count]
 
-    # Splice appropriately.
-    new_arr = arr[:start] + list(items) + arr[start + delete_count:]
-
-    # Replace contents of input array
-    arr.clear()
-    for el in new_arr:
-        arr.append(el)
+    # Splice in place
+    arr[start:start + delete_count] = items
 
     return deleted_elements
 
 
-def map_functions(js_func: str) -> Callable:
-    """For a given JavaScript transform function, return the Python equivalent.
-
-    :param str js_func:
-        The JavaScript version of the transform function.
-    """
-    mapper = (
+THROTTLING_FUNCTION_MAPPER = tuple(
+    (re.compile(pattern), fn)
+    for pattern, fn in (
+        (r"{for\(\w=\(\w%\w\.length\+\w\.length\)%\w\.length;\w--;\)\w\.unshift\(\w.pop\(\)\)}", throttling_unshift),  # noqa:E501
+        (r"{\w\.reverse\(\)}", throttling_reverse),
+        (r"{\w\.push\(\w\)}", throttling_push),
+        (r";var\s\w=\w\[0\];\w\[0\]=\w\[\w\];\w\[\w\]=\w}", throttling_swap),
+        (r"case\s\d+", throttling_cipher_function),
+        (r"\w\.splice\(0,1,\w\.splice\(\w,1,\w\[0\]\)\[0\]\)", throttling_nested_splice),  # noqa:E501
+        (r";\w\.splice\(\w,1\)}", js_splice),
+        (r"\w\.splice\(-\w\)\.reverse\(\)\.forEach\(function\(\w\){\w\.unshift\(\w\)}\)", throttling_prepend),  # noqa:E501
+        (r"for\(var \w=\w\.length;\w;\)\w\.push\(\w\.splice\(--\w,1\)\[0\]\)}", throttling_reverse),  # noqa:E501
+    )
+)
+TRANSFORM_FUNCTION_MAPPER = tuple(
+    (re.compile(pattern), fn)
+    for pattern, fn in (
         # function(a){a.reverse()}
         (r"{\w\.reverse\(\)}", reverse),
         # function(a,b){a.splice(0,b)}
@@ -690,9 +1061,17 @@ def map_functions(js_func: str) -> Callable:
             swap,
         ),
     )
+)
+
+
+def map_functions(js_func: str) -> Callable:
+    """For a given JavaScript transform function, return the Python equivalent.
 
-    for pattern, fn in mapper:
-        if re.search(pattern, js_func):
+    :param str js_func:
+        The JavaScript version of the transform function.
+    """
+    for regex, fn in TRANSFORM_FUNCTION_MAPPER:
+        if regex.search(js_func):
             return fn
     raise RegexMatchError(caller="map_functions", pattern="multiple")
 
@@ -0,0 +1,354 @@
+from typing import Any, Callable, Dict, Hashable, Optional, Union
+import os
+import hashlib
+import json
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+from functools import lru_cache
+from io import BytesIO
+
+from utils.http_utils import fetch_text_if_modified
+
+
+DEFAULT_CACHE_DIR = os.getenv(
+    "MUSIC_DOWNLOADER_CACHE_DIR",
+    os.path.join(tempfile.gettempdir(), "music_downloader_cache"),
+)
+DEFAULT_CACHE_MAX_SIZE = int(os.getenv("MUSIC_DOWNLOADER_CACHE_MAX_SIZE", 5 * 1024**3))
+STALE_TMP_SECONDS = 60 * 60
+DEFAULT_URL_CACHE_DIR = os.getenv(
+    "MUSIC_DOWNLOADER_URL_CACHE_DIR",
+    os.path.join(tempfile.gettempdir(), "music_downloader_url_cache"),
+)
+# How long a fetched text is used before being revalidated, and how many are kept on disk
+DEFAULT_URL_CACHE_MAX_AGE = int(os.getenv("MUSIC_DOWNLOADER_URL_CACHE_MAX_AGE", 24 * 60 * 60))
+DEFAULT_URL_CACHE_MAX_ENTRIES = int(os.getenv("MUSIC_DOWNLOADER_URL_CACHE_MAX_ENTRIES", 16))
+
+class AudioCache:
+    """
+    On-disk, content-addressed cache of downloaded audio with a size cap and LRU eviction.
+
+    Entries are keyed by a canonical media ID (e.g. a YouTube video ID or a SoundCloud
+    track URL) and the audio format, and are written atomically so that concurrent
+    readers (threads, sessions or processes) never see a partially written file.
+    """
+
+    def __init__(self, cache_dir: str = DEFAULT_CACHE_DIR, max_size: int = DEFAULT_CACHE_MAX_SIZE):
+        self.cache_dir = cache_dir
+        self.max_size = max_size
+        self._lock = threading.Lock()
+        self._index = OrderedDict()  # path -> size in bytes, least recently used first
+        self._total_size = 0
+        os.makedirs(self.cache_dir, exist_ok=True)
+        self._load_index()
+
+    def _load_index(self):
+        """Index the entries already on disk, oldest access first."""
+        entries = []
+        for entry in os.scandir(self.cache_dir):
+            if not entry.is_file():
+                continue
+            stat = entry.stat()
+            if entry.name.endswith(".tmp"):
+                if time.time() - stat.st_mtime > STALE_TMP_SECONDS:  # Left over from an interrupted write
+                    os.remove(entry.path)
+                continue
+            entries.append((stat.st_mtime, entry.path, stat.st_size))
+        for _, path, size in sorted(entries):
+            self._index[path] = size
+            self._total_size += size
+
+    def _get_path(self, media_id: str, audio_format: str) -> str:
+        digest = hashlib.sha256(f"{media_id}:{audio_format}".encode()).hexdigest()
+        return os.path.join(self.cache_dir, f"{digest}.{audio_format}")
+
+    def __contains__(self, key) -> bool:
+        media_id, audio_format = key
+        with self._lock:
+            return self._get_path(media_id, audio_format) in self._index
+
+    @property
+    def size(self) -> int:
+        return self._total_size
+
+    def get(self, media_id: str, audio_format: str) -> Optional[BytesIO]:
+        """Returns the cached audio, or None if it is not in the cache."""
+        path = self._get_path(media_id, audio_format)
+        with self._lock:
+            if path not in self._index:
+                if not os.path.exists(path):
+                    return None
+                # Written by another process sharing the cache directory
+                size = os.path.getsize(path)
+                self._index[path] = size
+                self._total_size += size
+            self._index.move_to_end(path)
+        try:
+            with open(path, "rb") as f:
+                buffer = BytesIO(f.read())
+            os.utime(path)  # Persist the access time so LRU order survives restarts
+        except FileNotFoundError:  # Evicted by another process
+            self._discard(path)
+            return None
+        return buffer
+
+    def put(self, media_id: str, audio_format: str, data: Union[bytes, BytesIO]):
+        """Atomically stores the audio, then evicts the least recently used entries over the cap."""
+        path = self._get_path(media_id, audio_format)
+        with (data.getbuffer() if isinstance(data, BytesIO) else memoryview(data)) as view:
+            size = view.nbytes
+            if size > self.max_size:
+                return
+            with tempfile.NamedTemporaryFile(dir=self.cache_dir, suffix=".tmp", delete=False) as f:
+                f.write(view)
+                f.flush()
+                os.fsync(f.fileno())
+        os.replace(f.name, path)
+        with self._lock:
+            self._total_size += size - self._index.pop(path, 0)
+            self._index[path] = size
+            self._evict()
+
+    def _discard(self, path: str):
+        with self._lock:
+            self._total_size -= self._index.pop(path, 0)
+
+    def _evict(self):
+        while self._total_size > self.max_size and self._index:
+            path, size = self._index.popitem(last=False)
+            self._total_size -= size
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+
+    def clear(self):
+        with self._lock:
+            for path in self._index:
+                try:
+                    os.remove(path)
+                except FileNotFoundError:
+                    pass
+            self._index.clear()
+            self._total_size = 0
+
+class ResponseCache:
+    """
+    Thread-safe in-memory cache of API responses with a TTL.
+
+    Identical calls made while the first one is still in flight are merged: they wait
+    for and share its result instead of hitting the API again. Cached responses are
+    shared between callers, so they must be treated as read-only.
+    """
+
+    def __init__(self, ttl: float = 300, max_entries: int = 1024):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()  # key -> (expires_at, response), least recently used first
+        self._in_flight: Dict[Hashable, Future] = {}
+        self.hits = 0
+        self.misses = 0
+        self.merged = 0
+
+    def get_or_call(
+        self,
+        key: Hashable,
+        func: Callable[..., Any],
+        *args,
+        ttl: Union[float, Callable[[Any], float], None] = None,
+        **kwargs,
+    ) -> Any:
+        """
+        Returns the cached response for key, calling func(*args, **kwargs) on a miss. The
+        response is kept for ttl seconds (or ttl(response), e.g. until what it holds expires).
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] > time.monotonic():
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[1]
+            future = self._in_flight.get(key)
+            is_owner = future is None
+            if is_owner:
+                future = self._in_flight[key] = Future()
+                self.misses += 1
+            else:
+                self.merged += 1
+        if not is_owner:
+            return future.result()
+        try:
+            response = func(*args, **kwargs)
+        except BaseException as e:
+            with self._lock:
+                del self._in_flight[key]
+            future.set_exception(e)
+            raise
+        if ttl is None:
+            ttl = self.ttl
+        elif callable(ttl):
+            ttl = ttl(response)
+        with self._lock:
+            self._entries[key] = (time.monotonic() + ttl, response)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+            del self._in_flight[key]
+        future.set_result(response)
+        return response
+
+    def invalidate(self, key: Optional[Hashable] = None):
+        """Drops the cached response for key, or every cached response if key is None."""
+        with self._lock:
+            if key is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(key, None)
+
+    @property
+    def stats(self) -> Dict[str, int]:
+        return {"hits": self.hits, "misses": self.misses, "merged": self.merged, "size": len(self._entries)}
+
+class URLTextCache:
+    """
+    Cache of texts fetched by URL (e.g. YouTube player scripts), in memory and on disk.
+
+    A text is used as-is for max_age seconds after it was fetched or last revalidated;
+    after that, a conditional request (ETag / Last-Modified) only downloads it again if
+    it changed. Concurrent requests for the same URL are merged, and the stale copy is
+    served if revalidation fails. An unchanged text is returned as the same str object,
+    so caches keyed on its identity downstream (e.g. the parsed cipher state) stay warm.
+    """
+
+    def __init__(
+        self,
+        cache_dir: str = DEFAULT_URL_CACHE_DIR,
+        max_age: float = DEFAULT_URL_CACHE_MAX_AGE,
+        max_entries: int = DEFAULT_URL_CACHE_MAX_ENTRIES,
+        max_memory_entries: int = 4,
+    ):
+        self.cache_dir = cache_dir
+        self.max_age = max_age
+        self.max_entries = max_entries
+        self.max_memory_entries = max_memory_entries
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()  # url -> (text, metadata), least recently used first
+        self._in_flight: Dict[str, Future] = {}
+        self.hits = 0
+        self.revalidated = 0
+        self.misses = 0
+        os.makedirs(self.cache_dir, exist_ok=True)
+
+    def _get_path(self, url: str, extension: str) -> str:
+        return os.path.join(self.cache_dir, f"{hashlib.sha256(url.encode()).hexdigest()}.{extension}")
+
+    def _load(self, url: str):
+        """Returns the (text, metadata) of url from memory or disk, or (None, None)."""
+        with self._lock:
+            entry = self._entries.get(url)
+            if entry is not None:
+                self._entries.move_to_end(url)
+                return entry
+        try:
+            with open(self._get_path(url, "json"), "r", encoding="utf-8") as f:
+                metadata = json.load(f)
+            with open(self._get_path(url, "txt"), "r", encoding="utf-8") as f:
+                text = f.read()
+        except (OSError, ValueError):
+            return None, None
+        if metadata.get("url") != url:
+            return None, None
+        self._remember(url, text, metadata)
+        return text, metadata
+
+    def _remember(self, url: str, text: str, metadata: Dict[str, Any]):
+        with self._lock:
+            self._entries[url] = (text, metadata)
+            self._entries.move_to_end(url)
+            while len(self._entries) > self.max_memory_entries:
+                self._entries.popitem(last=False)
+
+    def _write(self, path: str, data: str):
+        with tempfile.NamedTemporaryFile("w", encoding="utf-8", dir=self.cache_dir, suffix=".tmp", delete=False) as f:
+            f.write(data)
+        os.replace(f.name, path)
+
+    def _evict(self):
+        """Keeps the max_entries most recently revalidated texts on disk."""
+        entries = sorted(
+            (entry for entry in os.scandir(self.cache_dir) if entry.name.endswith(".json")),
+            key=lambda entry: entry.stat().st_mtime,
+            reverse=True,
+        )
+        for entry in entries[self.max_entries:]:
+            for path in (entry.path, entry.path[:-len("json")] + "txt"):
+                try:
+                    os.remove(path)
+                except FileNotFoundError:
+                    pass
+
+    def get(self, url: str) -> str:
+        """Returns the text at url, fetching or revalidating it only if needed."""
+        text, metadata = self._load(url)
+        if text is not None and time.time() - metadata["checked_at"] < self.max_age:
+            with self._lock:
+                self.hits += 1
+            return text
+        with self._lock:
+            future = self._in_flight.get(url)
+            is_owner = future is None
+            if is_owner:
+                future = self._in_flight[url] = Future()
+        if not is_owner:
+            return future.result()
+        try:
+            text = self._fetch(url, text, metadata)
+        except BaseException as e:
+            with self._lock:
+                del self._in_flight[url]
+            future.set_exception(e)
+            raise
+        with self._lock:
+            del self._in_flight[url]
+        future.set_result(text)
+        return text
+
+    def _fetch(self, url: str, stored_text: Optional[str], metadata: Optional[Dict[str, Any]]) -> str:
+        metadata = metadata or {}
+        try:
+            text, validators = fetch_text_if_modified(url, etag=metadata.get("etag"), last_modified=metadata.get("last_modified"))
+        except OSError:
+            if stored_text is None:
+                raise
+            return stored_text  # Serve the stale copy rather than fail
+        if text is None:  # Unchanged since it was stored
+            text = stored_text
+            with self._lock:
+                self.revalidated += 1
+        else:
+            self._write(self._get_path(url, "txt"), text)
+            with self._lock:
+                self.misses += 1
+        metadata = {"url": url, **validators, "checked_at": time.time()}
+        self._write(self._get_path(url, "json"), json.dumps(metadata))
+        self._remember(url, text, metadata)
+        self._evict()
+        return text
+
+    @property
+    def stats(self) -> Dict[str, int]:
+        return {"hits": self.hits, "revalidated": self.revalidated, "misses": self.misses, "size": len(self._entries)}
+
+@lru_cache(maxsize=None)
+def get_audio_cache() -> AudioCache:
+    """Returns the process-wide audio cache."""
+    return AudioCache()
+
+@lru_cache(maxsize=None)
+def get_url_text_cache() -> URLTextCache:
+    """Returns the process-wide cache of texts fetched by URL."""
+    return URLTextCache()
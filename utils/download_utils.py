@@ -0,0 +1,118 @@
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+import os
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from functools import lru_cache
+from queue import SimpleQueue
+from stqdm import stqdm as st_tqdm
+
+
+DEFAULT_MAX_WORKERS = int(os.getenv("MUSIC_DOWNLOADER_MAX_WORKERS", 8))
+# Process-wide cap on concurrent audio downloads from each platform, whichever URL, playlist
+# pool or session they come from (Spotify songs download from YouTube and count against it)
+PLATFORM_DOWNLOAD_CONCURRENCY = {
+    "YouTube": int(os.getenv("YOUTUBE_MAX_DOWNLOADS", 8)),
+    "SoundCloud": int(os.getenv("SOUNDCLOUD_MAX_DOWNLOADS", 4)),
+}
+
+@lru_cache(maxsize=None)
+def get_download_slots(platform: str) -> threading.BoundedSemaphore:
+    """Returns the process-wide semaphore bounding concurrent downloads from platform."""
+    return threading.BoundedSemaphore(PLATFORM_DOWNLOAD_CONCURRENCY.get(platform, DEFAULT_MAX_WORKERS))
+
+class DownloadProgress:
+    """
+    Count of finished downloads, updated from a worker thread (pass it as on_progress) and
+    polled from another, e.g. the Streamlit script thread, which renders it.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._done, self._total = 0, None
+
+    def __call__(self, done: int, total: Optional[int]):
+        with self._lock:
+            self._done, self._total = done, total
+
+    def get(self) -> Tuple[int, Optional[int]]:
+        """Returns the number of finished downloads and the total (None until known)."""
+        with self._lock:
+            return self._done, self._total
+
+def download_audio_concurrently(
+    items: Iterable[Any],
+    *,
+    max_workers: Optional[int] = None,
+    stqdm: bool = False,
+    desc: Optional[str] = None,
+    total: Optional[int] = None,
+    verbose: int = 0,
+    download_func: Optional[Callable[[Any], Any]] = None,
+    return_audio: bool = True,
+    on_progress: Optional[Callable[[int, Optional[int]], None]] = None,
+) -> Tuple[List[Any], Dict[int, Exception]]:
+    """
+    Download the audio of several songs/videos on a bounded thread pool.
+
+    Parameters:
+    - items: The songs or videos to download (anything with a download_audio method),
+      possibly a generator yielding them as they are found.
+    - max_workers: Maximum number of concurrent downloads (defaults to DEFAULT_MAX_WORKERS).
+    - stqdm: Whether to use the streamlit tqdm progress bar.
+    - desc: Description for the progress bar.
+    - total: Number of items, used by the progress bar when items has no len().
+    - download_func: Called with each item instead of item.download_audio(verbose=verbose).
+      It may return a future (e.g. item.fetch_audio, whose audio is still being converted),
+      freeing its worker for the next item; the item is collected once the future is done.
+    - return_audio: Whether to collect the downloaded audio. With False, the items stay the
+      only holders of their audio, so the memory accountant can spill it.
+    - on_progress: Called with the number of finished items and total after each one finishes.
+
+    Returns:
+    - The downloaded audio in the same order as items (None for items that failed, or for
+      every item if return_audio is False).
+    - A dict mapping the index of every failed item to the exception it raised.
+    """
+    if download_func is None:
+        download_func = lambda item: item.download_audio(verbose=verbose)
+    max_workers = max_workers or DEFAULT_MAX_WORKERS
+    results, errors = {}, {}
+    progress = st_tqdm(total=total, desc=desc) if stqdm else None
+
+    def _collect(future):
+        # Runs on this (the script) thread only, as workers finish in any order
+        i, item = futures.pop(future)
+        try:
+            result = future.result()
+            if isinstance(result, Future):
+                futures[result] = (i, item)
+                result.add_done_callback(done_queue.put)
+                return
+            results[i] = result if return_audio else None
+        except Exception as e:
+            results[i] = None
+            errors[i] = e
+            if verbose >= 1:
+                print(f"Failed to download audio for '{getattr(item, 'title', item)}': {e}")
+        if progress is not None:
+            progress.set_description(f"{len(results)} / {total or '?'} Downloaded: {getattr(item, 'title', '')}")
+            progress.update(1)
+        if on_progress is not None:
+            on_progress(len(results), total)
+
+    done_queue = SimpleQueue()
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = {}
+        # items may be a generator that yields songs while it is still enumerating them,
+        # so downloads start right away and finished ones are collected in between
+        for i, item in enumerate(items):
+            future = executor.submit(download_func, item)
+            futures[future] = (i, item)
+            future.add_done_callback(done_queue.put)
+            while not done_queue.empty():
+                _collect(done_queue.get())
+        while futures:
+            _collect(done_queue.get())
+    if progress is not None:
+        progress.close()
+    return [results[i] for i in range(len(results))], errors
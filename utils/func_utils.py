@@ -2,8 +2,5 @@ from typing import Iterable, List
 
 
 def get_unique_elems_ordered(iterable: Iterable[str]) -> List[str]:
-    unique_items = []
-    for item in iterable:
-        if item not in unique_items:
-            unique_items += [item]
-    return unique_items
\ No newline at end of file
+    """Unique items in order of first appearance, in linear time."""
+    return list(dict.fromkeys(iterable))
\ No newline at end of file
@@ -0,0 +1,345 @@
+from typing import Any, Dict, Optional, Tuple
+import os
+import json
+import hashlib
+import threading
+import tempfile
+from io import BytesIO
+from concurrent.futures import ThreadPoolExecutor
+from urllib.error import HTTPError
+from urllib.request import Request, urlopen
+
+
+DEFAULT_TIMEOUT = 15
+CHUNK_SIZE = 1024 * 1024
+# Segmented downloads: size of each byte range and number of concurrent connections
+SEGMENT_SIZE = int(os.getenv("HTTP_SEGMENT_SIZE", 4 * 1024 * 1024))
+SEGMENT_MAX_CONNECTIONS = int(os.getenv("HTTP_SEGMENT_MAX_CONNECTIONS", 4))
+# Resumable downloads: where partial bodies are checkpointed, and how often (in bytes)
+PARTIAL_DIR = os.getenv(
+    "HTTP_PARTIAL_DIR",
+    os.path.join(tempfile.gettempdir(), "music_downloader_partial"),
+)
+CHECKPOINT_INTERVAL = 4 * CHUNK_SIZE
+DEFAULT_HEADERS = {
+    "User-Agent": (
+        "Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 "
+        "(KHTML, like Gecko) Chrome/124.0.0.0 Safari/537.36"
+    ),
+    "Accept-Language": "en-US,en;q=0.9",
+}
+
+def fetch_text(
+    url: str,
+    headers: Optional[Dict[str, str]] = None,
+    timeout: float = DEFAULT_TIMEOUT,
+) -> str:
+    """Fetch a URL with a browser-like user agent and return the decoded body."""
+    request = Request(url, headers={**DEFAULT_HEADERS, **(headers or {})})
+    with urlopen(request, timeout=timeout) as response:
+        charset = response.headers.get_content_charset() or "utf-8"
+        return response.read().decode(charset, errors="replace")
+
+def fetch_text_if_modified(
+    url: str,
+    etag: Optional[str] = None,
+    last_modified: Optional[str] = None,
+    headers: Optional[Dict[str, str]] = None,
+    timeout: float = DEFAULT_TIMEOUT,
+) -> Tuple[Optional[str], Dict[str, Optional[str]]]:
+    """
+    Fetch a URL unless it is unchanged since the given ETag / Last-Modified validators.
+    Returns the decoded body (None if unchanged) and the current validators.
+    """
+    conditional_headers = {}
+    if etag:
+        conditional_headers["If-None-Match"] = etag
+    if last_modified:
+        conditional_headers["If-Modified-Since"] = last_modified
+    request = Request(url, headers={**DEFAULT_HEADERS, **(headers or {}), **conditional_headers})
+    try:
+        with urlopen(request, timeout=timeout) as response:
+            charset = response.headers.get_content_charset() or "utf-8"
+            text = response.read().decode(charset, errors="replace")
+            return text, {"etag": response.headers.get("ETag"), "last_modified": response.headers.get("Last-Modified")}
+    except HTTPError as e:
+        if e.code != 304:
+            raise
+        return None, {
+            "etag": e.headers.get("ETag") or etag,
+            "last_modified": e.headers.get("Last-Modified") or last_modified,
+        }
+
+def _fetch_range_into(
+    url: str,
+    view: memoryview,
+    start: int,
+    headers: Optional[Dict[str, str]],
+    timeout: float,
+    validator: Optional[str] = None,
+) -> bool:
+    """
+    Fetch bytes start..start+len(view)-1 of a URL directly into view. With a validator,
+    the range is requested with If-Range; returns False if the remote content changed.
+    """
+    end = start + len(view) - 1
+    request_headers = {**DEFAULT_HEADERS, **(headers or {}), "Range": f"bytes={start}-{end}"}
+    if validator is not None:
+        request_headers["If-Range"] = validator
+    with urlopen(Request(url, headers=request_headers), timeout=timeout) as response:
+        if validator is not None and (response.status != 206 or _get_validator(response) != validator):
+            return False
+        if response.status != 206:
+            raise RuntimeError(f"Server ignored the range request for bytes {start}-{end} (HTTP {response.status})")
+        received = 0
+        while received < len(view):
+            n = response.readinto(view[received:])
+            if not n:
+                raise RuntimeError(f"Connection closed after {received} of {len(view)} bytes of range {start}-{end}")
+            received += n
+    return True
+
+class PartialDownload:
+    """
+    On-disk checkpoint of a partially downloaded body.
+
+    Downloads are kept in memory; the bytes received so far are also copied to
+    <partial_dir>/<sha256(key)>.part, and a JSON checkpoint next to it records the key
+    (the identity of the source), the validator of the remote content (strong ETag or
+    Last-Modified), its total size, and either the validated offset (sequential
+    downloads) or the completed segments (segmented downloads). The checkpoint is
+    written atomically, after the data it vouches for.
+    """
+
+    def __init__(self, key: str, partial_dir: str = PARTIAL_DIR):
+        self.key = key
+        os.makedirs(partial_dir, exist_ok=True)
+        digest = hashlib.sha256(key.encode("utf-8")).hexdigest()
+        self.part_path = os.path.join(partial_dir, f"{digest}.part")
+        self.checkpoint_path = os.path.join(partial_dir, f"{digest}.json")
+        self.state = self._load()
+
+    def _load(self) -> Dict[str, Any]:
+        try:
+            with open(self.checkpoint_path, "r", encoding="utf-8") as f:
+                state = json.load(f)
+        except (OSError, ValueError):
+            state = None
+        if not state or state.get("key") != self.key or not state.get("validator") or not os.path.exists(self.part_path):
+            self.discard()
+            return {}
+        return state
+
+    def save(self, **state):
+        """Update and atomically persist the checkpoint."""
+        self.state.update(state, key=self.key)
+        tmp_path = f"{self.checkpoint_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self.state, f)
+        os.replace(tmp_path, self.checkpoint_path)
+
+    def matches(self, validator: Optional[str], size: Optional[int]) -> bool:
+        """Whether the checkpoint was made against the same remote content."""
+        return bool(self.state) and validator is not None and self.state.get("validator") == validator and self.state.get("size") == size
+
+    def discard(self):
+        """Delete the partial body and its checkpoint."""
+        for path in (self.part_path, self.checkpoint_path):
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+        self.state = {}
+
+    def write(self, view: memoryview, start: int, truncate: bool = False):
+        """Copy view to the partial body at offset start (truncating what follows if truncate)."""
+        with open(self.part_path, "r+b" if os.path.exists(self.part_path) else "wb") as f:
+            f.seek(start)
+            f.write(view)
+            if truncate:
+                f.truncate()
+            f.flush()
+
+    def read_into(self, view: memoryview, start: int):
+        """Load bytes start..start+len(view)-1 of the partial body into view (only when resuming)."""
+        with open(self.part_path, "rb") as f:
+            f.seek(start)
+            if f.readinto(view) != len(view):
+                raise RuntimeError(f"Partial body of {self.key} is shorter than its checkpoint")
+
+def _get_validator(response) -> Optional[str]:
+    """Strong ETag of a response, or its Last-Modified date; None if it has neither."""
+    etag = response.headers.get("ETag")
+    if etag and not etag.startswith("W/"):
+        return etag
+    return response.headers.get("Last-Modified")
+
+def _get_total_size(response) -> Optional[int]:
+    """Total size of the remote body, from Content-Range (206) or Content-Length (200)."""
+    content_range = response.headers.get("Content-Range")
+    if content_range and "/" in content_range and not content_range.endswith("/*"):
+        return int(content_range.rsplit("/", 1)[1])
+    if response.status == 200 and response.headers.get("Content-Length"):
+        return int(response.headers["Content-Length"])
+    return None
+
+def _download_resumable_sequential(
+    url: str,
+    partial: PartialDownload,
+    headers: Optional[Dict[str, str]],
+    timeout: float,
+) -> BytesIO:
+    offset = partial.state.get("offset", 0)
+    request_headers = {**DEFAULT_HEADERS, **(headers or {})}
+    if offset:
+        # If-Range: the server only honours the range if the content is unchanged,
+        # and sends the whole new body otherwise
+        request_headers.update(Range=f"bytes={offset}-", **{"If-Range": partial.state["validator"]})
+    with urlopen(Request(url, headers=request_headers), timeout=timeout) as response:
+        validator, size = _get_validator(response), _get_total_size(response)
+        resumed = bool(offset) and response.status == 206
+        if resumed and not (
+            partial.matches(validator, size)
+            and response.headers.get("Content-Range", "").startswith(f"bytes {offset}-")
+        ):
+            # The server ignored If-Range: drop the stale partial and start over
+            partial.discard()
+            return _download_resumable_sequential(url, partial, headers, timeout)
+        buffer = BytesIO()
+        if resumed:
+            buffer.seek(offset - 1)
+            buffer.write(b"\0")
+            with buffer.getbuffer() as view:
+                partial.read_into(view, 0)
+        else:
+            partial.discard()
+            offset = 0
+        saved = offset
+
+        def checkpoint():
+            # Only the bytes received since the last checkpoint are copied to disk
+            nonlocal saved
+            with buffer.getbuffer() as view:
+                partial.write(view[saved:offset], saved, truncate=True)
+            saved = offset
+            partial.save(validator=validator, size=size, offset=offset)
+
+        try:
+            while True:
+                chunk = response.read(CHUNK_SIZE)
+                if not chunk:
+                    break
+                buffer.write(chunk)
+                offset += len(chunk)
+                if validator is not None and offset - saved >= CHECKPOINT_INTERVAL:
+                    checkpoint()
+        except BaseException:
+            if validator is not None:
+                checkpoint()
+            raise
+    if size is not None and offset != size:
+        if validator is not None:
+            checkpoint()
+        raise RuntimeError(f"Download of {url} ended at byte {offset} of {size}")
+    return buffer
+
+def _download_resumable_segmented(
+    url: str,
+    partial: PartialDownload,
+    size: int,
+    headers: Optional[Dict[str, str]],
+    timeout: float,
+    segment_size: int,
+    max_connections: int,
+    validator: str,
+) -> BytesIO:
+    # Segments are read straight into their slot of a buffer preallocated to size, so
+    # they can complete in any order without being copied or reassembled
+    buffer = BytesIO()
+    buffer.seek(size - 1)
+    buffer.write(b"\0")
+    segments = {start: (start, min(start + segment_size, size)) for start in range(0, size, segment_size)}
+    with buffer.getbuffer() as view:
+        if partial.matches(validator, size) and partial.state.get("segment_size") == segment_size:
+            completed = set(partial.state.get("segments", []))
+            for start in completed:
+                partial.read_into(view[slice(*segments[start])], start)
+        else:
+            partial.discard()
+            completed = set()
+            partial.save(validator=validator, size=size, segment_size=segment_size, segments=[])
+        lock = threading.Lock()
+        changed = threading.Event()
+
+        def _fetch(start: int):
+            if changed.is_set():
+                return
+            segment = view[slice(*segments[start])]
+            if not _fetch_range_into(url, segment, start, headers, timeout, validator):
+                changed.set()
+                raise RuntimeError(f"Remote content of {url} changed during the download")
+            with lock:
+                partial.write(segment, start)
+                completed.add(start)
+                partial.save(segments=sorted(completed))
+
+        pending = [start for start in segments if start not in completed]
+        with ThreadPoolExecutor(max_workers=max_connections, thread_name_prefix="segment") as executor:
+            futures = [executor.submit(_fetch, start) for start in pending]
+            try:
+                for future in futures:
+                    future.result()
+            except BaseException:
+                for future in futures:
+                    future.cancel()
+                raise
+            finally:
+                if changed.is_set():
+                    executor.shutdown(wait=True)
+                    partial.discard()
+    return buffer
+
+def _probe_validator(url: str, headers: Optional[Dict[str, str]], timeout: float) -> Optional[str]:
+    """Validator of the remote content, if the server supports range requests."""
+    request = Request(url, headers={**DEFAULT_HEADERS, **(headers or {}), "Range": "bytes=0-0"})
+    with urlopen(request, timeout=timeout) as response:
+        return _get_validator(response) if response.status == 206 else None
+
+def download_resumable(
+    url: str,
+    key: str,
+    size: Optional[int] = None,
+    headers: Optional[Dict[str, str]] = None,
+    timeout: float = DEFAULT_TIMEOUT,
+    segment_size: int = SEGMENT_SIZE,
+    max_connections: int = SEGMENT_MAX_CONNECTIONS,
+    partial_dir: str = PARTIAL_DIR,
+) -> BytesIO:
+    """
+    Download a URL into memory, checkpointing the partial body to disk so that a later
+    call with the same key resumes where an interrupted one stopped.
+
+    Parameters:
+    - url: The URL to download (it may change between attempts, e.g. expiring signed URLs).
+    - key: Stable identity of the content (e.g. platform, media ID and format).
+    - size: The known size of the body. Bodies of at least two segments are fetched as
+      concurrent byte ranges into a preallocated buffer, checkpointing completed
+      segments, if the server supports validated range requests; others are streamed
+      sequentially, checkpointing the received offset every CHECKPOINT_INTERVAL bytes.
+
+    The body is returned from memory: the disk copy is only read back to resume, and is
+    deleted once the download completes. A checkpoint is only resumed if the remote
+    validator (strong ETag or Last-Modified) and size are unchanged, and range requests
+    carry If-Range; otherwise the partial body is discarded and the download starts over.
+    """
+    partial = PartialDownload(key, partial_dir)
+    validator = None
+    if size and size >= 2 * segment_size and max_connections > 1:
+        validator = _probe_validator(url, headers, timeout)
+    if validator is not None:
+        buffer = _download_resumable_segmented(url, partial, size, headers, timeout, segment_size, max_connections, validator)
+    else:
+        buffer = _download_resumable_sequential(url, partial, headers, timeout)
+    partial.discard()
+    buffer.seek(0)
+    return buffer
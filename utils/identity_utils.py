@@ -0,0 +1,84 @@
+from typing import Any, Callable, Dict, Hashable, Tuple
+import threading
+import weakref
+from concurrent.futures import Future
+from functools import lru_cache
+
+from utils.url_utils import parse_media_url
+
+
+class IdentityMap:
+    """
+    Per-process map of canonical media IDs to the live entity (song, video or playlist)
+    for that media, so that every place referring to the same media shares one object
+    and its metadata and audio are fetched once.
+
+    Entities are held weakly: once the last song, playlist or session referring to one
+    lets it go, it is dropped from the map along with its audio buffer. Concurrent
+    requests for an entity that is still being created wait for it instead of creating
+    a second one.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._entities = weakref.WeakValueDictionary()
+        self._pending: Dict[Hashable, Future] = {}
+        self.hits = 0
+        self.misses = 0
+
+    def get_or_create(self, key: Hashable, factory: Callable[..., Any], *args, **kwargs) -> Any:
+        """Returns the live entity for key, creating it with factory(*args, **kwargs) if there is none."""
+        with self._lock:
+            entity = self._entities.get(key)
+            if entity is not None:
+                self.hits += 1
+                return entity
+            future = self._pending.get(key)
+            is_owner = future is None
+            if is_owner:
+                future = self._pending[key] = Future()
+                self.misses += 1
+            else:
+                self.hits += 1
+        if not is_owner:
+            return future.result()
+        try:
+            entity = factory(*args, **kwargs)
+        except BaseException as e:
+            with self._lock:
+                del self._pending[key]
+            future.set_exception(e)
+            raise
+        with self._lock:
+            self._entities[key] = entity
+            del self._pending[key]
+        future.set_result(entity)
+        return entity
+
+    def __len__(self) -> int:
+        return len(self._entities)
+
+    @property
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {"entities": len(self._entities), "hits": self.hits, "misses": self.misses}
+
+@lru_cache(maxsize=None)
+def get_identity_map() -> IdentityMap:
+    """Returns the process-wide identity map."""
+    return IdentityMap()
+
+def get_media_key(entity_class: type, url: str) -> Tuple[str, str]:
+    """Identity map key of the media at url: the entity class and the canonical media ID."""
+    media_url = parse_media_url(url)
+    return entity_class.__name__, media_url.media_id if media_url else url.strip()
+
+def get_shared_entity(entity_class: type, url: str, **kwargs) -> Any:
+    """
+    Returns the entity for the media at url, shared with every other place referring to
+    the same media; it is created with entity_class(url=<canonical url>, **kwargs) if needed.
+    """
+    media_url = parse_media_url(url)
+    if media_url is not None:
+        url = media_url.url
+    return get_identity_map().get_or_create(get_media_key(entity_class, url), entity_class, url=url, **kwargs)
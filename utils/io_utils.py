@@ -16,8 +16,9 @@ def get_size(
     if buffer is None:
         return 0
     elif isinstance(buffer, bytes):
-        buffer = BytesIO(buffer)
-    size_in_bytes = buffer.getbuffer().nbytes
+        size_in_bytes = len(buffer)
+    else:
+        size_in_bytes = buffer.getbuffer().nbytes
 
     if units.lower() not in UNITS_MAP:
         raise ValueError("Invalid unit. Use 'b', 'kb', 'mb', or 'gb'.")
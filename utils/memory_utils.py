@@ -0,0 +1,182 @@
+from typing import BinaryIO, Callable, Dict, List, Optional, Union
+import os
+import tempfile
+import threading
+import weakref
+from collections import OrderedDict
+from functools import lru_cache
+from io import BytesIO
+
+
+MEMORY_LIMIT = int(os.getenv("MUSIC_DOWNLOADER_MEMORY_LIMIT", 2 * 1024**3))
+SPILL_DIR = os.getenv(
+    "MUSIC_DOWNLOADER_SPILL_DIR",
+    os.path.join(tempfile.gettempdir(), "music_downloader_spill"),
+)
+
+# Called with the buffer being spilled and a function returning a read-only file with
+# its contents (written to disk on first call); should drop the holder's reference to it
+SpillCallback = Callable[[BytesIO, Callable[[], BinaryIO]], None]
+
+def _remove_quietly(path: str):
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+
+def write_temporary_file(
+    write: Callable[[BinaryIO], None],
+    spill_dir: str = SPILL_DIR,
+    suffix: str = ".spill",
+) -> BinaryIO:
+    """
+    Create a file in spill_dir with write(file) and return it opened for reading. The file
+    is deleted once the returned file object is closed or garbage collected.
+    """
+    os.makedirs(spill_dir, exist_ok=True)
+    with tempfile.NamedTemporaryFile(dir=spill_dir, suffix=suffix, delete=False) as f:
+        try:
+            write(f)
+        except BaseException:
+            f.close()
+            _remove_quietly(f.name)
+            raise
+    spilled = open(f.name, "rb")
+    weakref.finalize(spilled, _remove_quietly, f.name)
+    return spilled
+
+def spill_to_file(buffer: BytesIO, spill_dir: str = SPILL_DIR) -> BinaryIO:
+    """
+    Write buffer to a file in spill_dir and return it opened for reading. The file is
+    deleted once the returned file object is closed or garbage collected.
+    """
+    def write(f: BinaryIO):
+        with buffer.getbuffer() as view:
+            f.write(view)
+
+    return write_temporary_file(write, spill_dir)
+
+def replace_spilled(
+    value: Union[BinaryIO, List[BinaryIO]],
+    buffer: BytesIO,
+    load_spilled: Callable[[], BinaryIO],
+) -> Union[BinaryIO, List[BinaryIO]]:
+    """Returns value (a buffer or list of buffers) with buffer swapped for its spilled file."""
+    if value is buffer:
+        return load_spilled()
+    if isinstance(value, list):
+        return [load_spilled() if item is buffer else item for item in value]
+    return value
+
+class _Entry:
+    __slots__ = ("buffer_ref", "size", "holders")
+
+    def __init__(self, buffer: BytesIO, size: int):
+        self.buffer_ref = weakref.ref(buffer)
+        self.size = size
+        self.holders: List[weakref.ref] = []
+
+class MemoryAccountant:
+    """
+    Process-wide accounting of the audio and archive buffers held in memory.
+
+    Every buffer is counted once (by identity), however many objects hold it, in O(1)
+    per update, and is forgotten automatically when it is garbage collected. When the
+    total exceeds limit, the least recently used buffers are spilled: each holder's
+    spill callback drops its reference, either reloading the audio on demand (e.g.
+    songs, from the on-disk audio cache) or swapping in a file with the spilled bytes.
+    """
+
+    def __init__(self, limit: int = MEMORY_LIMIT, spill_dir: str = SPILL_DIR):
+        self.limit = limit
+        self.spill_dir = spill_dir
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[int, _Entry]" = OrderedDict()  # least recently used first
+        self.total = 0
+        self.spilled = 0
+        self.spilled_bytes = 0
+
+    def track(self, buffer: BytesIO, spill: SpillCallback):
+        """
+        Count buffer (if not already counted) and register spill as one of its holders; the
+        callback is held weakly, so it must be a bound method or a function kept alive by
+        its caller. Marks buffer as most recently used and spills others if over the limit.
+        """
+        key = id(buffer)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry.buffer_ref() is not buffer:
+                entry = _Entry(buffer, buffer.getbuffer().nbytes)
+                self._entries[key] = entry
+                self.total += entry.size
+                weakref.finalize(buffer, self._forget, key, entry)
+            # Holders are referenced weakly, so a holder that is gone (e.g. a finished script
+            # run) is dropped instead of being kept alive by the buffer it held
+            entry.holders = [holder for holder in entry.holders if holder() is not None]
+            entry.holders.append(weakref.WeakMethod(spill) if hasattr(spill, "__self__") else weakref.ref(spill))
+            self._entries.move_to_end(key)
+        self._enforce_limit()
+
+    def track_all(self, buffers: Union[BytesIO, List[BytesIO], None], spill: SpillCallback):
+        """Track a buffer or each buffer of a list (e.g. zipped batches) with the same holder."""
+        for buffer in buffers if isinstance(buffers, list) else [buffers]:
+            if isinstance(buffer, BytesIO):
+                self.track(buffer, spill)
+
+    def touch(self, buffer: Optional[BytesIO]):
+        """Mark buffer as most recently used."""
+        with self._lock:
+            entry = self._entries.get(id(buffer))
+            if entry is not None and entry.buffer_ref() is buffer:
+                self._entries.move_to_end(id(buffer))
+
+    def _forget(self, key: int, entry: _Entry):
+        with self._lock:
+            if self._entries.get(key) is entry:
+                del self._entries[key]
+                self.total -= entry.size
+
+    def _enforce_limit(self):
+        # The most recently used buffer is never spilled, so the caller can still use it
+        while True:
+            with self._lock:
+                if self.total <= self.limit or len(self._entries) <= 1:
+                    return
+                key, entry = self._entries.popitem(last=False)
+                self.total -= entry.size
+            buffer = entry.buffer_ref()
+            if buffer is not None:
+                self._spill(buffer, entry)
+
+    def _spill(self, buffer: BytesIO, entry: _Entry):
+        spilled_file = None
+
+        def load_spilled() -> BinaryIO:
+            nonlocal spilled_file
+            if spilled_file is None:
+                spilled_file = spill_to_file(buffer, self.spill_dir)
+            return spilled_file
+
+        for holder in entry.holders:
+            spill = holder()
+            if spill is not None:
+                spill(buffer, load_spilled)
+        with self._lock:
+            self.spilled += 1
+            self.spilled_bytes += entry.size
+
+    @property
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "limit": self.limit,
+                "total": self.total,
+                "buffers": len(self._entries),
+                "spilled": self.spilled,
+                "spilled_bytes": self.spilled_bytes,
+            }
+
+@lru_cache(maxsize=None)
+def get_memory_accountant() -> MemoryAccountant:
+    """Returns the process-wide memory accountant."""
+    return MemoryAccountant()
@@ -1,7 +1,11 @@
-from typing import Optional, Callable, List, Union
+from typing import Optional, Callable, List, Union, Dict, Iterator
 import time
 import os
 import stat
+import atexit
+import threading
+from contextlib import contextmanager
+from functools import lru_cache
 from pathlib import Path
 from selenium import webdriver
 from selenium.webdriver.common.by import By
@@ -9,7 +13,8 @@ from selenium.webdriver.common.keys import Keys
 from selenium.common.exceptions import (
     NoSuchElementException,
     ElementClickInterceptedException,
-    TimeoutException
+    TimeoutException,
+    WebDriverException,
 )
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
@@ -20,6 +25,28 @@ from webdriver_manager.chrome import ChromeDriverManager
 from webdriver_manager.core.os_manager import ChromeType
 
 
+DRIVER_POOL_SIZE = int(os.getenv("SELENIUM_DRIVER_POOL_SIZE", 2))
+DRIVER_MAX_USES = int(os.getenv("SELENIUM_DRIVER_MAX_USES", 25))
+DRIVER_MAX_JS_HEAP_MB = int(os.getenv("SELENIUM_DRIVER_MAX_JS_HEAP_MB", 256))
+# How long to wait for a driver when all are checked out (e.g. by playlists still scrolling
+# through their tracks) before giving up, instead of waiting forever
+DRIVER_CHECKOUT_TIMEOUT = float(os.getenv("SELENIUM_DRIVER_CHECKOUT_TIMEOUT", 120))
+
+@lru_cache(maxsize=None)
+def get_chromedriver_path() -> str:
+    """Installs chromedriver (once per process) and returns its executable path."""
+    chromedriver_install_path = ChromeDriverManager(
+        chrome_type=ChromeType.CHROMIUM
+    ).install()
+
+    chromedriver_path = str(Path(chromedriver_install_path).parent / "chromedriver")
+    
+    # Set executable permissions
+    os.chmod(chromedriver_path, stat.S_IRUSR | stat.S_IWUSR | stat.S_IXUSR |  # User
+              stat.S_IRGRP | stat.S_IXGRP |                         # Group
+              stat.S_IROTH | stat.S_IXOTH)                         # Others
+    return chromedriver_path
+
 def get_driver(
     headless: bool = True,
     disable_gpu: bool = True,
@@ -35,18 +62,138 @@ def get_driver(
         options.add_argument('--no-sandbox')
     if disable_dev_shm_usage:
         options.add_argument('--disable-dev-shm-usage')
-    chromedriver_install_path = ChromeDriverManager(
-        chrome_type=ChromeType.CHROMIUM
-    ).install()
+    return webdriver.Chrome(service=Service(get_chromedriver_path()), options=options)
 
-    chromedriver_path = str(Path(chromedriver_install_path).parent / "chromedriver")
-    
-    # Set executable permissions
-    os.chmod(chromedriver_path, stat.S_IRUSR | stat.S_IWUSR | stat.S_IXUSR |  # User
-              stat.S_IRGRP | stat.S_IXGRP |                         # Group
-              stat.S_IROTH | stat.S_IXOTH)                         # Others
-    
-    return webdriver.Chrome(service=Service(chromedriver_path), options=options)
+class DriverPool:
+    """
+    Bounded pool of warm Chrome drivers, checked out and returned around each use.
+
+    Returned drivers are reset (cookies, extra windows, current page) so no state leaks
+    between uses. Drivers that fail a health check are replaced, and drivers are recycled
+    after max_uses uses or once the page's JS heap grows past max_js_heap_mb.
+    """
+
+    def __init__(
+        self,
+        max_size: int = DRIVER_POOL_SIZE,
+        max_uses: int = DRIVER_MAX_USES,
+        max_js_heap_mb: int = DRIVER_MAX_JS_HEAP_MB,
+        **driver_kwargs,
+    ):
+        self.max_size = max_size
+        self.max_uses = max_uses
+        self.max_js_heap_mb = max_js_heap_mb
+        self.driver_kwargs = driver_kwargs
+        self._slots = threading.BoundedSemaphore(max_size)
+        self._lock = threading.Lock()
+        self._idle: List[webdriver.Chrome] = []
+        self._uses: Dict[webdriver.Chrome, int] = {}
+
+    @contextmanager
+    def driver(self, timeout: Optional[float] = DRIVER_CHECKOUT_TIMEOUT) -> Iterator[webdriver.Chrome]:
+        """Checks out a driver for the duration of the with block."""
+        driver = self.checkout(timeout=timeout)
+        try:
+            yield driver
+        except BaseException:
+            self.checkin(driver, discard=True)  # Its state is unknown after a failure
+            raise
+        self.checkin(driver)
+
+    def checkout(self, timeout: Optional[float] = DRIVER_CHECKOUT_TIMEOUT) -> webdriver.Chrome:
+        """
+        Takes a healthy idle driver, or launches a new one if none is idle. Raises TimeoutError
+        if none is returned within timeout seconds (None waits forever).
+        """
+        if not self._slots.acquire(timeout=timeout):
+            raise TimeoutError(
+                f"No Selenium driver became available within {timeout} seconds: all {self.max_size} "
+                "are checked out (e.g. by playlists still listing their tracks); "
+                "raise SELENIUM_DRIVER_POOL_SIZE or SELENIUM_DRIVER_CHECKOUT_TIMEOUT"
+            )
+        try:
+            while True:
+                with self._lock:
+                    driver = self._idle.pop() if self._idle else None
+                if driver is None:
+                    driver = get_driver(**self.driver_kwargs)
+                    break
+                if self._is_healthy(driver):
+                    break
+                self._quit(driver)
+        except BaseException:
+            self._slots.release()
+            raise
+        with self._lock:
+            self._uses[driver] = self._uses.get(driver, 0) + 1
+        return driver
+
+    def checkin(self, driver: webdriver.Chrome, discard: bool = False):
+        """Returns a driver to the pool, quitting it instead if it is due to be recycled."""
+        try:
+            if discard or self._should_recycle(driver):
+                self._quit(driver)
+            else:
+                self._reset(driver)
+                with self._lock:
+                    self._idle.append(driver)
+        except WebDriverException:
+            self._quit(driver)
+        finally:
+            self._slots.release()
+
+    @staticmethod
+    def _is_healthy(driver: webdriver.Chrome) -> bool:
+        try:
+            driver.current_url
+            return True
+        except WebDriverException:
+            return False
+
+    def _should_recycle(self, driver: webdriver.Chrome) -> bool:
+        if self._uses.get(driver, 0) >= self.max_uses:
+            return True
+        js_heap_size = driver.execute_script(
+            "return window.performance.memory ? window.performance.memory.usedJSHeapSize : 0"
+        )
+        return (js_heap_size or 0) > self.max_js_heap_mb * 1024**2
+
+    @staticmethod
+    def _reset(driver: webdriver.Chrome):
+        handles = driver.window_handles
+        for handle in handles[1:]:
+            driver.switch_to.window(handle)
+            driver.close()
+        driver.switch_to.window(handles[0])
+        driver.delete_all_cookies()
+        driver.get("about:blank")
+
+    def _quit(self, driver: webdriver.Chrome):
+        with self._lock:
+            self._uses.pop(driver, None)
+        try:
+            driver.quit()
+        except WebDriverException:
+            pass
+
+    def close(self):
+        """Quits every idle driver."""
+        with self._lock:
+            idle, self._idle = self._idle, []
+        for driver in idle:
+            self._quit(driver)
+
+@lru_cache(maxsize=None)
+def get_driver_pool() -> DriverPool:
+    """Returns the process-wide pool of headless drivers."""
+    pool = DriverPool(
+        headless=True,
+        disable_gpu=True,
+        no_sandbox=True,
+        disable_dev_shm_usage=True,
+    )
+    atexit.register(pool.close)
+    return pool
 
 
 def _wait_for_elements(
@@ -0,0 +1,133 @@
+from typing import Any, Dict, List, Optional, Union
+import os
+import time
+import tempfile
+import threading
+import subprocess
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from functools import lru_cache
+from io import BytesIO
+
+
+TRANSCODE_MAX_WORKERS = int(os.getenv("TRANSCODE_MAX_WORKERS", os.cpu_count() or 1))
+TRANSCODE_TIMEOUT = int(os.getenv("TRANSCODE_TIMEOUT", 10 * 60))
+# ffmpeg audio encoder used for each output format
+OUTPUT_CODECS = {
+    "mp3": "libmp3lame",
+    "m4a": "aac",
+    "opus": "libopus",
+    "webm": "libopus",
+    "ogg": "libvorbis",
+    "wav": "pcm_s16le",
+}
+
+class Transcoder:
+    """
+    Audio conversion stage backed by a bounded pool of ffmpeg processes.
+
+    Jobs are queued with submit and run as separate ffmpeg processes, at most
+    max_workers at a time (one per CPU core by default), so CPU-bound conversion
+    overlaps with network-bound downloading instead of running inline with it.
+    Each job is timed out after timeout seconds, and its stats are kept in stats.
+    """
+
+    def __init__(self, max_workers: int = TRANSCODE_MAX_WORKERS, timeout: float = TRANSCODE_TIMEOUT):
+        self.max_workers = max_workers
+        self.timeout = timeout
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="ffmpeg")
+        self._lock = threading.Lock()
+        self.stats = deque(maxlen=1000)
+
+    def submit(
+        self,
+        data: Union[bytes, BytesIO],
+        output_format: str = "mp3",
+        input_format: Optional[str] = None,
+        codec: Optional[str] = None,
+        bitrate: Optional[str] = "192k",
+        timeout: Optional[float] = None,
+    ) -> "Future[BytesIO]":
+        """
+        Queue a conversion of data to output_format.
+
+        Parameters:
+        - data: The source audio.
+        - output_format: The container/extension of the output (e.g. 'mp3', 'm4a').
+        - input_format: The extension of the source, to help ffmpeg detect it.
+        - codec: The ffmpeg audio codec; 'copy' remuxes without re-encoding. Defaults to
+          OUTPUT_CODECS[output_format].
+        - bitrate: The target bitrate when re-encoding.
+        - timeout: Seconds before the ffmpeg process is killed (defaults to self.timeout).
+
+        Returns:
+        - A future resolving to the converted audio.
+        """
+        return self._executor.submit(
+            self._transcode, data, output_format, input_format,
+            codec or OUTPUT_CODECS[output_format], bitrate,
+            self.timeout if timeout is None else timeout,
+        )
+
+    def transcode(self, data: Union[bytes, BytesIO], output_format: str = "mp3", **kwargs) -> BytesIO:
+        """Convert data to output_format, blocking until the job is done."""
+        return self.submit(data, output_format, **kwargs).result()
+
+    def _transcode(
+        self,
+        data: Union[bytes, BytesIO],
+        output_format: str,
+        input_format: Optional[str],
+        codec: str,
+        bitrate: Optional[str],
+        timeout: float,
+    ) -> BytesIO:
+        start = time.perf_counter()
+        stats = {"output_format": output_format, "input_format": input_format, "codec": codec}
+        with tempfile.TemporaryDirectory(prefix="transcode_") as tmp_dir:
+            input_path = os.path.join(tmp_dir, f"input.{input_format or 'bin'}")
+            output_path = os.path.join(tmp_dir, f"output.{output_format}")
+            with open(input_path, "wb") as f:
+                f.write(data.getbuffer() if isinstance(data, BytesIO) else data)
+            command = ["ffmpeg", "-hide_banner", "-loglevel", "error", "-nostdin", "-y", "-i", input_path, "-vn", "-c:a", codec]
+            if codec != "copy" and bitrate:
+                command += ["-b:a", bitrate]
+            command.append(output_path)
+            try:
+                process = subprocess.run(command, capture_output=True, timeout=timeout)
+            except subprocess.TimeoutExpired:
+                self._record(stats, start, status="timeout")
+                raise TimeoutError(f"ffmpeg timed out after {timeout} seconds converting to {output_format}")
+            if process.returncode != 0:
+                self._record(stats, start, status="failed")
+                raise RuntimeError(f"ffmpeg failed converting to {output_format}: {process.stderr.decode(errors='replace')}")
+            with open(output_path, "rb") as f:
+                buffer = BytesIO(f.read())
+        stats["input_bytes"] = data.getbuffer().nbytes if isinstance(data, BytesIO) else len(data)
+        stats["output_bytes"] = buffer.getbuffer().nbytes
+        self._record(stats, start, status="ok")
+        return buffer
+
+    def _record(self, stats: Dict[str, Any], start: float, status: str):
+        stats["status"] = status
+        stats["seconds"] = time.perf_counter() - start
+        with self._lock:
+            self.stats.append(stats)
+
+    def get_stats(self) -> List[Dict[str, Any]]:
+        with self._lock:
+            return list(self.stats)
+
+    def shutdown(self, wait: bool = True):
+        self._executor.shutdown(wait=wait)
+
+def completed_future(result: Any) -> Future:
+    """A future already resolved to result, for audio that needs no conversion."""
+    future = Future()
+    future.set_result(result)
+    return future
+
+@lru_cache(maxsize=None)
+def get_transcoder() -> Transcoder:
+    """Returns the process-wide transcoder."""
+    return Transcoder()
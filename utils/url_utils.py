@@ -1,6 +1,68 @@
-from typing import List
+from typing import List, NamedTuple, Optional
+import re
+from functools import lru_cache
+from http.client import HTTPException
 from urllib.parse import urlparse, urlunparse
+from urllib.request import Request, urlopen
 
+from utils.func_utils import get_unique_elems_ordered
+from utils.http_utils import DEFAULT_HEADERS, DEFAULT_TIMEOUT
+
+
+class MediaURL(NamedTuple):
+    platform: str
+    entity_type: str
+    media_id: str
+    url: str  # Canonical URL, the same for every variant of a URL to the same media
+
+# One pattern for every supported URL form; the named group that matched tells the
+# platform and entity type, and captures the media ID
+MEDIA_URL_REGEX = re.compile(
+    r"""
+    ^(?:https?://)?(?:
+        (?:(?:www|m|music)\.)?youtube\.com/(?:
+            watch\?(?:[^#]*&)?v=(?P<youtube_video>[\w-]{11})
+          | embed/videoseries\?(?:[^#]*&)?list=(?P<youtube_playlist_embed>[\w-]+)
+          | (?:shorts|embed|live|v)/(?P<youtube_short>[\w-]{11})
+          | playlist\?(?:[^#]*&)?list=(?P<youtube_playlist>[\w-]+)
+        )
+      | youtu\.be/(?P<youtube_short_link>[\w-]{11})
+      | open\.spotify\.com/(?:intl-[a-z]{2}(?:-[a-z]{2})?/)?(?:embed/)?
+        (?:track/(?P<spotify_track>[a-z0-9]{22})|playlist/(?P<spotify_playlist>[a-z0-9]{22}))
+      | (?:(?:www|m)\.)?soundcloud\.com/
+        (?P<soundcloud_path>[\w-]+/(?:sets/(?P<soundcloud_playlist>[\w-]+)|(?P<soundcloud_track>[\w-]+)))
+        (?P<soundcloud_secret>/s-[\w-]+)?
+    )(?:[/?#&]|$)
+    | ^spotify:(?:track:(?P<spotify_track_uri>[a-z0-9]{22})|playlist:(?P<spotify_playlist_uri>[a-z0-9]{22}))$
+    """,
+    re.IGNORECASE | re.VERBOSE,
+)
+# SoundCloud share links (on.soundcloud.com/<code>) only redirect to the media URL
+SOUNDCLOUD_SHARE_URL_REGEX = re.compile(r"^(?:https?://)?on\.soundcloud\.com/[\w-]+/?(?:[?#]|$)", re.IGNORECASE)
+# SoundCloud pages shaped like <user>/<track> that are not tracks: site sections in place of
+# the user, and profile tabs in place of the track
+SOUNDCLOUD_RESERVED_PATHS = {
+    "charts", "discover", "jobs", "messages", "mobile", "notifications", "pages", "people",
+    "search", "settings", "stations", "stream", "tags", "upload", "you",
+}
+SOUNDCLOUD_RESERVED_SUBPATHS = {
+    "albums", "comments", "followers", "following", "likes", "popular-tracks", "reposts",
+    "sets", "spotlight", "tracks",
+}
+# Named group of MEDIA_URL_REGEX -> (platform, entity type, canonical URL format)
+MEDIA_URL_GROUPS = {
+    "youtube_video": ("YouTube", "song", "https://www.youtube.com/watch?v={}"),
+    "youtube_short": ("YouTube", "song", "https://www.youtube.com/watch?v={}"),
+    "youtube_short_link": ("YouTube", "song", "https://www.youtube.com/watch?v={}"),
+    "youtube_playlist": ("YouTube", "playlist", "https://www.youtube.com/playlist?list={}"),
+    "youtube_playlist_embed": ("YouTube", "playlist", "https://www.youtube.com/playlist?list={}"),
+    "spotify_track": ("Spotify", "song", "https://open.spotify.com/track/{}"),
+    "spotify_track_uri": ("Spotify", "song", "https://open.spotify.com/track/{}"),
+    "spotify_playlist": ("Spotify", "playlist", "https://open.spotify.com/playlist/{}"),
+    "spotify_playlist_uri": ("Spotify", "playlist", "https://open.spotify.com/playlist/{}"),
+    "soundcloud_track": ("SoundCloud", "song", "https://soundcloud.com/{}"),
+    "soundcloud_playlist": ("SoundCloud", "playlist", "https://soundcloud.com/{}"),
+}
 
 def clean_url(url: str) -> str:
     """Clean and normalize a URL, ensuring it includes a protocol."""
@@ -38,3 +100,58 @@ def extract_and_clean_urls(input_str: str) -> List[str]:
     """Extract, clean, and normalize all URLs from a given input string."""
     urls = input_str.replace(',', ' ').split()
     return list(map(clean_url, urls))
+
+def parse_media_url(url: str) -> Optional[MediaURL]:
+    """
+    Identify the platform, entity type and canonical media ID of a URL in a single match.
+
+    Variants of the same media map to the same ID and canonical URL: youtu.be, Shorts and
+    embed links, extra query parameters (e.g. '&list=' on a video, Spotify's '?si='),
+    Spotify 'intl-xx' paths and 'spotify:' URIs, and SoundCloud's letter case and 'www.'/'m.'.
+    SoundCloud share links (on.soundcloud.com) must be resolved first, see resolve_share_url.
+
+    Returns:
+        MediaURL: The parsed URL, or None if it is not a supported song/playlist URL.
+    """
+    match = MEDIA_URL_REGEX.match(url.strip())
+    if match is None:
+        return None
+    group = next(name for name in MEDIA_URL_GROUPS if match.group(name))
+    platform, entity_type, url_format = MEDIA_URL_GROUPS[group]
+    if platform == "SoundCloud":
+        user, _, name = match.group("soundcloud_path").lower().partition("/")
+        if user in SOUNDCLOUD_RESERVED_PATHS or (group == "soundcloud_track" and name in SOUNDCLOUD_RESERVED_SUBPATHS):
+            return None
+        # SoundCloud paths are case-insensitive, but the secret token of private tracks is not
+        media_id = match.group("soundcloud_path").lower() + (match.group("soundcloud_secret") or "")
+    else:
+        media_id = match.group(group)
+    return MediaURL(platform, entity_type, media_id, url_format.format(media_id))
+
+@lru_cache(maxsize=1024)
+def resolve_share_url(url: str, timeout: float = DEFAULT_TIMEOUT) -> str:
+    """
+    The URL a SoundCloud share link (on.soundcloud.com) redirects to; other URLs, and share
+    links that cannot be resolved, are returned as they are.
+    """
+    if not SOUNDCLOUD_SHARE_URL_REGEX.match(url.strip()):
+        return url
+    request = Request(clean_url(url), headers=DEFAULT_HEADERS, method="HEAD")
+    try:
+        with urlopen(request, timeout=timeout) as response:
+            return response.url
+    except (OSError, HTTPException):
+        return url
+
+def canonicalize_url(url: str) -> str:
+    """Canonical URL of a supported song/playlist URL; other URLs are only cleaned."""
+    media_url = parse_media_url(resolve_share_url(url))
+    return media_url.url if media_url else clean_url(url)
+
+def extract_media_urls(input_str: str) -> List[str]:
+    """
+    Extract the URLs from an input string as canonical URLs, without duplicates (in linear
+    time), so that the same media is never downloaded twice. Unsupported URLs are kept,
+    to be reported as invalid.
+    """
+    return get_unique_elems_ordered(map(canonicalize_url, input_str.replace(',', ' ').split()))
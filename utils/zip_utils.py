@@ -1,17 +1,20 @@
-from typing import List, Optional, Union, Generator, Dict
+from typing import List, Optional, Union, Generator, Dict, Iterator, BinaryIO
 from io import BytesIO
 import zipfile
 from stqdm import stqdm as st_tqdm
 from pathlib import Path
 
+from utils.memory_utils import write_temporary_file
 
 
+CHUNK_SIZE = 1024 * 1024
+
 def zip_audio_files(
-    songs: Union[List, Generator, Dict[str, BytesIO]],
+    songs: Union[List, Generator, Dict[str, BinaryIO]],
     stqdm: bool = False,
     batch_size: Optional[int] = None,
     total: Optional[int] = None,
-) -> Union[BytesIO, List[BytesIO]]:
+) -> Union[BinaryIO, List[BinaryIO]]:
     """
     Zip the audio files of songs or videos and return the zip as a binary object.
     
@@ -22,8 +25,8 @@ def zip_audio_files(
     - batch_size: The number of items to include in each zip file. If None, all items are zipped into a single file.
 
     Returns:
-    - If batch_size is None, returns a single zip file as a BytesIO object.
-    - If batch_size is set, returns a list of BytesIO objects, each representing a zipped batch of songs.
+    - If batch_size is None, returns a single zip file, opened for reading.
+    - If batch_size is set, returns a list of zip files, each holding a batch of songs.
     """
     if batch_size is None:
         # If no batch size is provided, zip everything into one file.
@@ -50,30 +53,81 @@ def zip_audio_files(
     return zipped_files
 
 def _zip_audio_batch(
-    songs: Union[List, Generator, Dict[str, BytesIO]],
+    songs: Union[List, Generator, Dict[str, BinaryIO]],
     stqdm: bool = False,
     total: Optional[int] = None,
-) -> BytesIO:
-    """Helper function to zip a single batch of songs."""
-    buf = BytesIO()
-    with zipfile.ZipFile(buf, "w") as audio_zip:
-        items = st_tqdm(songs) if stqdm else songs
+) -> BinaryIO:
+    """
+    Helper function to zip a single batch of songs. The archive is streamed into a
+    temporary file (deleted once it is closed or garbage collected) rather than memory.
+    """
+    return write_temporary_file(
+        lambda sink: write_zip_audio(songs, sink, stqdm=stqdm, total=total),
+        suffix=".zip",
+    )
+
+def _get_safe_filename(filename: str) -> str:
+    return f"{filename}".replace(' ', '_').replace('/', '_').replace('\\', '_')
+
+def _iter_chunks(data: Union[bytes, BinaryIO]) -> Iterator[memoryview]:
+    """
+    Chunks of the audio, without moving the cursor of data: buffers and files may be
+    shared with other sessions (see utils.identity_utils) that read them concurrently.
+    """
+    if isinstance(data, bytes):
+        view = memoryview(data)
+    elif isinstance(data, BytesIO):
+        view = data.getbuffer()
+    else:
+        # Files (e.g. spilled buffers or zipped batches) are read through a handle of our own
+        with open(data.name, "rb") as f:
+            while chunk := f.read(CHUNK_SIZE):
+                yield memoryview(chunk)
+        return
+    with view:
+        for start in range(0, len(view), CHUNK_SIZE):
+            yield view[start:start + CHUNK_SIZE]
+
+def _copy_to_zip_entry(audio_zip: zipfile.ZipFile, filename: str, data: Union[bytes, BinaryIO]):
+    """Copy audio into a new zip entry in chunks, without making a full second copy of it."""
+    with audio_zip.open(filename, "w", force_zip64=True) as entry:
+        for chunk in _iter_chunks(data):
+            entry.write(chunk)
+            chunk.release()
+
+def write_zip_audio(
+    songs: Union[List, Generator, Dict[str, BinaryIO]],
+    sink: BinaryIO,
+    stqdm: bool = False,
+    total: Optional[int] = None,
+) -> BinaryIO:
+    """
+    Zip the audio files of songs or videos directly into a writable file-like sink.
+
+    Each entry is written as soon as its song's audio is ready; the sink does not need
+    to be seekable (e.g. a socket, pipe or temporary file opened for writing).
+
+    Parameters:
+    - songs: A list of songs or videos to be zipped, or a dict of file names to audio.
+    - sink: The file-like object the zip archive is written to.
+    - stqdm: Whether to use the streamlit tqdm progress bar.
+    - total: The number of songs, for the progress bar.
+
+    Returns:
+    - The sink.
+    """
+    with zipfile.ZipFile(sink, "w") as audio_zip:
+        items = st_tqdm(songs, total=total) if stqdm else songs
         for i, item in enumerate(items):
             if isinstance(songs, dict):
                 if stqdm:
                     items.set_description(f"{i + 1} / {len(songs)} Zipping Zipped Files: {Path(item).stem}")
-                data = songs[item]
-                safe_filename = f"{item}".replace(' ', '_').replace('/', '_').replace('\\', '_')
+                _copy_to_zip_entry(audio_zip, _get_safe_filename(item), songs[item])
             else:
                 if stqdm:
                     actions_str = "Downloading & Zipping" if not item._audio else "Zipping"
                     items.set_description(f"{i + 1} / {total} {actions_str}: {item.title}")
-                item.download_audio()
-                data = item._audio
-                safe_filename = f"{item.filename}".replace(' ', '_').replace('/', '_').replace('\\', '_')
-            try:
-                audio_zip.writestr(safe_filename, data.getvalue())
-            except AttributeError:
-                print("breakpoint")
-    buf.seek(0)
-    return buf
+                # The returned buffer, as the item's own reference may be spilled meanwhile
+                audio = item.download_audio()
+                _copy_to_zip_entry(audio_zip, _get_safe_filename(item.filename), audio)
+    return sink